@@ -478,9 +478,7 @@ def main():
                     data_dir="data",
                     db_dir="db",
                     embedding_model="sentence-transformers/all-MiniLM-L6-v2",
-                    llm_model="google/flan-t5-base",
-                    chunk_size=500,
-                    chunk_overlap=50
+                    llm_model="google/flan-t5-base"
                 )
                 st.session_state.rag_initialized = True
                 st.rerun()
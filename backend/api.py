@@ -22,7 +22,11 @@ import logging
 from datetime import datetime
 
 # Import RAG pipeline
+import config
 from rag_pipeline_enhanced import EnhancedRAGPipeline
+from ingest_jobs import IngestJobManager
+from data_watcher import DataDirWatcher
+from query_cache import shared_query_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -47,6 +51,12 @@ app.add_middleware(
 # Global RAG pipeline instance
 rag_pipeline: Optional[EnhancedRAGPipeline] = None
 
+# Background ingestion of the data directory
+ingest_jobs: Optional[IngestJobManager] = None
+
+# Re-indexes PDFs changed in the data directory (config.WATCH_DATA_DIR)
+data_watcher: Optional[DataDirWatcher] = None
+
 
 # Pydantic models
 class QuestionRequest(BaseModel):
@@ -80,12 +90,33 @@ class HealthResponse(BaseModel):
     message: str
     documents_loaded: int
     model_ready: bool
+    ingest_job_id: Optional[str] = None
+
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    description: str
+    status: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    elapsed_seconds: float
+    eta_seconds: Optional[float] = None
+    files_processed: int
+    files_total: int
+    pages_processed: int
+    pages_total: int
+    chunks_produced: int
+    chunks_embedded: int
+    chunks_stored: int
+    result: Optional[int] = None
+    errors: List[str]
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize RAG pipeline on startup"""
-    global rag_pipeline
+    global rag_pipeline, ingest_jobs, data_watcher
     
     logger.info("Initializing RAG Pipeline...")
     try:
@@ -96,19 +127,37 @@ async def startup_event():
             llm_model="google/flan-t5-base"
         )
         
-        # Check if documents are loaded
+        ingest_jobs = IngestJobManager(rag_pipeline)
+        
+        # Check if documents are loaded; ingest in the background so the API starts serving
         doc_count = rag_pipeline.collection.count()
+        if doc_count == 0 and config.SNAPSHOT_PATH and Path(config.SNAPSHOT_PATH).exists():
+            # A prebuilt index loads in seconds without pypdf or the embedder
+            logger.info(f"No documents found. Loading snapshot {config.SNAPSHOT_PATH}")
+            doc_count = rag_pipeline.import_snapshot(config.SNAPSHOT_PATH)
         if doc_count == 0:
-            logger.info("No documents found. Ingesting PDFs...")
-            doc_count = rag_pipeline.ingest_pdfs()
+            job = ingest_jobs.start()
+            logger.info(f"No documents found. Ingesting PDFs in background job {job.id}")
         
         logger.info(f"✅ RAG Pipeline ready with {doc_count} documents")
         
+        if config.WATCH_DATA_DIR:
+            # Syncs run as ingest jobs, one at a time with uploads and full ingests
+            data_watcher = DataDirWatcher(rag_pipeline, submit=ingest_jobs.start)
+            data_watcher.start()
+        
     except Exception as e:
         logger.error(f"Failed to initialize RAG pipeline: {str(e)}")
         rag_pipeline = None
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the data-directory watcher"""
+    if data_watcher is not None:
+        data_watcher.stop()
+
+
 @app.get("/", response_model=Dict)
 async def root():
     """Root endpoint"""
@@ -118,6 +167,9 @@ async def root():
         "endpoints": {
             "health": "/health",
             "ask": "/api/ask",
+            "ingest": "/api/ingest",
+            "watcher": "/api/watcher",
+            "query_cache": "/api/query-cache",
             "docs": "/docs"
         }
     }
@@ -136,8 +188,18 @@ async def health_check():
     
     doc_count = rag_pipeline.collection.count()
     
+    active_job = ingest_jobs.active if ingest_jobs is not None else None
+    if active_job is not None:
+        return HealthResponse(
+            status="ingesting",
+            message="Ingesting documents; answers may be incomplete",
+            documents_loaded=doc_count,
+            model_ready=True,
+            ingest_job_id=active_job.id
+        )
+    
     return HealthResponse(
-        status="healthy",
+        status="ready",
         message="System operational",
         documents_loaded=doc_count,
         model_ready=True
@@ -198,6 +260,50 @@ async def ask_question(request: QuestionRequest):
         )
 
 
+@app.post("/api/ingest", response_model=IngestJobResponse, status_code=202)
+async def start_ingest():
+    """
+    Ingest new or changed PDFs from the data directory in the background
+    
+    Returns the running job instead of starting a second one.
+    """
+    if rag_pipeline is None or ingest_jobs is None:
+        raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
+    
+    job = ingest_jobs.start()
+    return IngestJobResponse(**ingest_jobs.status(job))
+
+
+@app.get("/api/ingest/{job_id}", response_model=IngestJobResponse)
+async def get_ingest_job(job_id: str):
+    """Progress of an ingest job: pages processed, chunks embedded, ETA and errors"""
+    if ingest_jobs is None:
+        raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
+    
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Ingest job not found"
+        )
+    
+    return IngestJobResponse(**ingest_jobs.status(job))
+
+
+@app.get("/api/watcher")
+async def watcher_status():
+    """Data-directory watcher metrics: mode, pending files, lag and last sync"""
+    if data_watcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **data_watcher.stats()}
+
+
+@app.get("/api/query-cache")
+async def query_cache_status():
+    """Query-embedding cache size and hit rate (shared by all pipelines in the process)"""
+    return shared_query_cache().stats()
+
+
 @app.get("/api/documents")
 async def list_documents():
     """List all loaded documents"""
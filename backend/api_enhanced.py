@@ -15,7 +15,8 @@ os.environ['TRANSFORMERS_NO_TF'] = '1'
 os.environ['USE_TORCH'] = '1'
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict
@@ -24,12 +25,19 @@ from datetime import datetime
 from typing import List
 
 # Import RAG pipeline
+import config
 from rag_pipeline_advanced import AdvancedRAGPipeline
+from ingest_jobs import IngestJobManager
+from data_watcher import DataDirWatcher
+from query_cache import shared_query_cache
+from dedup import collect_pdf_files, find_identical
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PDF_MAGIC = b"%PDF-"  # Every PDF starts with this header
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Legal Rights Education API - Enhanced",
@@ -49,6 +57,12 @@ app.add_middleware(
 # Global RAG pipeline instance
 rag_pipeline: Optional[AdvancedRAGPipeline] = None
 
+# Background ingestion of the data directory
+ingest_jobs: Optional[IngestJobManager] = None
+
+# Re-indexes PDFs changed in the data directory (config.WATCH_DATA_DIR)
+data_watcher: Optional[DataDirWatcher] = None
+
 # In-memory conversation storage (for demo; use database in production)
 conversations: Dict[str, List[Dict]] = {}
 
@@ -92,6 +106,27 @@ class HealthResponse(BaseModel):
     documents_loaded: int
     model_ready: bool
     web_search_enabled: bool
+    ingest_job_id: Optional[str] = None
+
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    description: str
+    status: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    elapsed_seconds: float
+    eta_seconds: Optional[float] = None
+    files_processed: int
+    files_total: int
+    pages_processed: int
+    pages_total: int
+    chunks_produced: int
+    chunks_embedded: int
+    chunks_stored: int
+    result: Optional[int] = None
+    errors: List[str]
 
 
 class ConversationHistoryResponse(BaseModel):
@@ -104,7 +139,7 @@ class ConversationHistoryResponse(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """Initialize RAG pipeline on startup"""
-    global rag_pipeline
+    global rag_pipeline, ingest_jobs, data_watcher
     
     logger.info("Initializing Advanced RAG Pipeline...")
     try:
@@ -116,13 +151,24 @@ async def startup_event():
             enable_web_search=True
         )
         
-        # Check if documents are loaded
+        ingest_jobs = IngestJobManager(rag_pipeline)
+        
+        # Check if documents are loaded; ingest in the background so the API starts serving
         doc_count = rag_pipeline.collection.count()
+        if doc_count == 0 and config.SNAPSHOT_PATH and Path(config.SNAPSHOT_PATH).exists():
+            # A prebuilt index loads in seconds without pypdf or the embedder
+            logger.info(f"No documents found. Loading snapshot {config.SNAPSHOT_PATH}")
+            doc_count = rag_pipeline.import_snapshot(config.SNAPSHOT_PATH)
         if doc_count == 0:
-            logger.info("No documents found. Ingesting PDFs...")
-            doc_count = rag_pipeline.ingest_pdfs()
+            job = ingest_jobs.start()
+            logger.info(f"No documents found. Ingesting PDFs in background job {job.id}")
         
         logger.info(f"✅ Advanced RAG Pipeline ready with {doc_count} documents")
+        
+        if config.WATCH_DATA_DIR:
+            # Syncs run as ingest jobs, one at a time with uploads and full ingests
+            data_watcher = DataDirWatcher(rag_pipeline, submit=ingest_jobs.start)
+            data_watcher.start()
         logger.info(f"Web search: {'Enabled' if rag_pipeline.enable_web_search else 'Disabled'}")
         
     except Exception as e:
@@ -130,6 +176,13 @@ async def startup_event():
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the data-directory watcher"""
+    if data_watcher is not None:
+        data_watcher.stop()
+
+
 @app.get("/", response_model=Dict)
 async def root():
     """Root endpoint"""
@@ -145,6 +198,10 @@ async def root():
         "endpoints": {
             "health": "/health",
             "ask": "/api/ask",
+            "ingest": "/api/ingest",
+            "watcher": "/api/watcher",
+            "query_cache": "/api/query-cache",
+            "documents": "/api/documents",
             "conversations": "/api/conversations",
             "docs": "/docs"
         }
@@ -165,8 +222,19 @@ async def health_check():
     
     doc_count = rag_pipeline.collection.count()
     
+    active_job = ingest_jobs.active if ingest_jobs is not None else None
+    if active_job is not None:
+        return HealthResponse(
+            status="ingesting",
+            message="Ingesting documents; answers may be incomplete",
+            documents_loaded=doc_count,
+            model_ready=True,
+            web_search_enabled=rag_pipeline.enable_web_search,
+            ingest_job_id=active_job.id
+        )
+    
     return HealthResponse(
-        status="healthy",
+        status="ready",
         message="System operational",
         documents_loaded=doc_count,
         model_ready=True,
@@ -307,6 +375,50 @@ async def delete_conversation(conversation_id: str):
     return {"message": "Conversation deleted"}
 
 
+@app.post("/api/ingest", response_model=IngestJobResponse, status_code=202)
+async def start_ingest():
+    """
+    Ingest new or changed PDFs from the data directory in the background
+    
+    Returns the running job instead of starting a second one.
+    """
+    if rag_pipeline is None or ingest_jobs is None:
+        raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
+    
+    job = ingest_jobs.start()
+    return IngestJobResponse(**ingest_jobs.status(job))
+
+
+@app.get("/api/ingest/{job_id}", response_model=IngestJobResponse)
+async def get_ingest_job(job_id: str):
+    """Progress of an ingest job: pages processed, chunks embedded, ETA and errors"""
+    if ingest_jobs is None:
+        raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
+    
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Ingest job not found"
+        )
+    
+    return IngestJobResponse(**ingest_jobs.status(job))
+
+
+@app.get("/api/watcher")
+async def watcher_status():
+    """Data-directory watcher metrics: mode, pending files, lag and last sync"""
+    if data_watcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **data_watcher.stats()}
+
+
+@app.get("/api/query-cache")
+async def query_cache_status():
+    """Query-embedding cache size and hit rate (shared by all pipelines in the process)"""
+    return shared_query_cache().stats()
+
+
 @app.get("/api/documents")
 async def list_documents():
     """List all loaded documents"""
@@ -332,6 +444,103 @@ async def list_documents():
     }
 
 
+@app.post("/api/documents", response_model=IngestJobResponse, status_code=202)
+async def upload_document(request: Request, filename: str):
+    """
+    Upload a PDF and index just that file in the background
+    
+    The request body is the raw PDF (Content-Type: application/pdf), named by
+    the filename query parameter. It is streamed to the data directory in
+    chunks, never held in memory whole; an existing file of the same name is
+    replaced and re-indexed. A byte-identical copy of another PDF, or a name
+    used in an extra data directory, is rejected with 409.
+    """
+    if rag_pipeline is None or ingest_jobs is None:
+        raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
+    
+    name = Path(filename).name
+    if not name.lower().endswith(".pdf") or name.startswith("."):
+        raise HTTPException(status_code=400, detail="Filename must be a .pdf file name")
+    
+    max_bytes = config.MAX_UPLOAD_MB * 1024 * 1024
+    rag_pipeline.data_dir.mkdir(parents=True, exist_ok=True)
+    target = rag_pipeline.data_dir / name
+    # Hidden temp name, so a half-written upload is never picked up as a PDF
+    tmp_path = rag_pipeline.data_dir / f".{name}.upload"
+    
+    size = 0
+    checked = False
+    buffer = bytearray()
+    try:
+        with open(tmp_path, "wb") as f:
+            async for data in request.stream():
+                size += len(data)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"PDF larger than {config.MAX_UPLOAD_MB} MB")
+                buffer += data
+                # The buffer still starts at byte 0 until it is first written out
+                if not checked and len(buffer) >= len(PDF_MAGIC):
+                    if not buffer.startswith(PDF_MAGIC):
+                        raise HTTPException(status_code=400, detail="Body is not a PDF")
+                    checked = True
+                if checked and len(buffer) >= config.UPLOAD_CHUNK_SIZE:
+                    await run_in_threadpool(f.write, bytes(buffer))
+                    buffer.clear()
+            if size == 0:
+                raise HTTPException(status_code=400, detail="Empty upload")
+            if not checked:
+                raise HTTPException(status_code=400, detail="Body is not a PDF")
+            if buffer:
+                await run_in_threadpool(f.write, bytes(buffer))
+        
+        try:
+            existing = collect_pdf_files(rag_pipeline.data_dir)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        # Documents are keyed by file name, so it must not clash with an extra data directory's PDF
+        clash = next((pdf for pdf in existing if pdf.name == name and pdf.parent != rag_pipeline.data_dir), None)
+        if clash is not None:
+            raise HTTPException(status_code=409, detail=f"{clash} already uses the name {name}")
+        # Same rule as collect_pdf_files(): a byte-identical copy is not indexed twice
+        others = [pdf for pdf in existing if pdf.name != name]
+        duplicate = await run_in_threadpool(find_identical, tmp_path, others)
+        if duplicate is not None:
+            raise HTTPException(status_code=409, detail=f"Identical to already indexed {duplicate.name}")
+        os.replace(tmp_path, target)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    
+    logger.info(f"Received {name} ({size} bytes)")
+    job = ingest_jobs.start(lambda: rag_pipeline.ingest_files([target]), description=f"Index {name}")
+    return IngestJobResponse(**ingest_jobs.status(job))
+
+
+@app.delete("/api/documents/{name}", response_model=IngestJobResponse, status_code=202)
+def delete_document(name: str):
+    """
+    Delete a PDF from the data directory and its chunks from the index
+    
+    The file is removed right away; its chunks are removed by a background
+    job queued behind any running ingest, upload or watcher job.
+    """
+    if rag_pipeline is None or ingest_jobs is None:
+        raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
+    
+    name = Path(name).name
+    path = rag_pipeline.data_dir / name
+    indexed = rag_pipeline.collection.get(where={"source": name}, limit=1, include=[])["ids"]
+    if not path.exists() and not indexed:
+        raise HTTPException(
+            status_code=404,
+            detail="Document not found"
+        )
+    if path.exists():
+        path.unlink()
+    
+    job = ingest_jobs.start(lambda: rag_pipeline.remove_document(name), description=f"Remove {name}")
+    return IngestJobResponse(**ingest_jobs.status(job))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
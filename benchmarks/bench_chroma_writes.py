@@ -0,0 +1,90 @@
+"""
+Benchmark: ChromaDB write throughput by write batch size and writer threads
+Loads synthetic chunks (random unit vectors of the embedding model's size)
+into a fresh persistent collection per setting and reports chunks/sec
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import chromadb
+
+from chroma_loader import ChromaBulkLoader, client_max_batch_size
+
+
+def synthetic_records(count, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    words = ["right", "worker", "wage", "court", "consumer", "police", "section", "act", "appeal", "notice"]
+    documents = [" ".join(rng.choice(words, size=80)) for _ in range(count)]
+    ids = [f"bench_{i:08d}" for i in range(count)]
+    metadatas = [{"source": f"doc{i % 50}.pdf", "page": i % 300} for i in range(count)]
+    return ids, vectors.tolist(), documents, metadatas
+
+
+def run(db_root, records, write_batch_size, writers, index):
+    client = chromadb.PersistentClient(path=str(db_root / f"run{index}"))
+    collection = client.create_collection(name="bench", metadata={"hnsw:space": "cosine"})
+    loader = ChromaBulkLoader(collection, write_batch_size=write_batch_size, writers=writers)
+    start = time.perf_counter()
+    loader.write(*records)
+    elapsed = time.perf_counter() - start
+    loader.close()
+    assert collection.count() == len(records[0])
+    return loader, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=20000, help="Synthetic chunks to write")
+    parser.add_argument("--dim", type=int, default=384, help="Vector size (all-MiniLM-L6-v2: 384)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 256, 1000, 2500, 0],
+                        help="Write batch sizes (0 = client max)")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--db-root", help="Where to create the collections (default: a temp dir)")
+    args = parser.parse_args()
+
+    db_root = Path(args.db_root) if args.db_root else Path(tempfile.mkdtemp(prefix="bench_chroma_"))
+    records = synthetic_records(args.chunks, args.dim)
+
+    probe = chromadb.PersistentClient(path=str(db_root / "probe")).get_or_create_collection("probe")
+    max_batch = client_max_batch_size(probe)
+    print(f"chromadb {chromadb.__version__}, client max batch size {max_batch}, {args.chunks} chunks x {args.dim} dims")
+
+    index = 0
+    try:
+        # A single unsplit write is what failed before beyond max_batch_size
+        if max_batch is not None and args.chunks > max_batch:
+            client = chromadb.PersistentClient(path=str(db_root / "unsplit"))
+            collection = client.create_collection(name="bench")
+            try:
+                collection.upsert(ids=records[0], embeddings=records[1], documents=records[2], metadatas=records[3])
+                print("unsplit write: succeeded")
+            except Exception as e:
+                print(f"unsplit write: failed ({type(e).__name__}: {str(e)[:80]})")
+
+        for batch_size in args.batch_sizes:
+            for writers in args.writers:
+                loader, elapsed = run(db_root, records, batch_size or None, writers, index)
+                index += 1
+                stats = loader.stats()
+                print(
+                    f"batch {stats['write_batch_size']:>6}  writers {writers}  "
+                    f"{args.chunks / elapsed:9.1f} chunks/sec  ({stats['writes']} writes, {elapsed:.2f}s)"
+                )
+    finally:
+        if not args.db_root:
+            shutil.rmtree(db_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Microbenchmark: dict chunk records vs zero-copy ChunkSpan records
+Chunks every page of the data directory and runs both representations
+through the same batching/materialization path ingestion uses
+"""
+
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import config
+from chunking import TokenChunker, PageText, ChunkSpan
+from ingestion import batched, chunk_id
+from pdf_extraction import ParallelPdfExtractor
+from common import REPO_DIR
+
+
+def dict_records(pages, spans_per_page):
+    """Previous representation: chunk_text builds a dict per chunk, then a record dict with the ID"""
+    for (text, metadata), spans in zip(pages, spans_per_page):
+        chunks = []
+        for start, end, num_tokens in spans:
+            chunks.append({
+                "text": text[start:end],
+                "metadata": {**metadata, "chunk_index": len(chunks), "token_count": num_tokens},
+                "offset": start
+            })
+        for chunk in chunks:
+            yield {
+                "id": chunk_id(metadata["source"], metadata["page"], chunk["offset"], chunk["text"]),
+                "text": chunk["text"],
+                "metadata": chunk["metadata"]
+            }
+
+
+def span_records(pages, spans_per_page):
+    """Offsets into the shared page text; nothing is copied until a batch is sent"""
+    for (text, metadata), spans in zip(pages, spans_per_page):
+        page = PageText(text, metadata, chunk_info=True)
+        for index, (start, end, num_tokens) in enumerate(spans):
+            yield ChunkSpan(page, start, end, index, num_tokens)
+
+
+def consume(records, batch_size):
+    """What IngestionPipeline does with every batch before embedding/storing it"""
+    total = 0
+    for batch in batched(records, batch_size):
+        sources = [chunk["metadata"]["source"] for chunk in batch]
+        ids = [chunk["id"] for chunk in batch]
+        texts = [chunk["text"] for chunk in batch]
+        metadatas = [chunk["metadata"] for chunk in batch]
+        total += len(sources) + len(ids) + len(texts) + len(metadatas)
+    return total
+
+
+def measure(label, make_records, batch_size, repeats):
+    """Best-of-N time for streaming, plus peak memory streaming and holding all records"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        consume(make_records(), batch_size)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    consume(make_records(), batch_size)
+    _, stream_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    held = list(make_records())
+    held_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:<8} {len(held):>7} chunks  {best * 1000:8.1f} ms  "
+        f"stream peak {stream_peak / 1e6:7.2f} MB  all records held {held_bytes / 1e6:7.2f} MB"
+    )
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default=str(REPO_DIR / config.DATA_DIR))
+    parser.add_argument("--scale", type=int, default=10, help="Repeat the corpus this many times")
+    parser.add_argument("--batch-size", type=int, default=config.INGEST_BATCH_SIZE)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    chunker = TokenChunker.from_model(SentenceTransformer(config.EMBEDDING_MODEL))
+
+    extracted = ParallelPdfExtractor().extract(sorted(Path(args.data_dir).glob("*.pdf")))
+    pages = [
+        (page["text"], {"source": f"{copy}_{page['source']}", "page": page["page_num"]})
+        for copy in range(args.scale)
+        for page in extracted
+    ]
+    # Chunk boundaries are the same for both representations; tokenize once
+    spans_per_page = [chunker.split(page["text"]) for page in extracted] * args.scale
+    print(f"{len(pages)} pages ({args.scale}x corpus), batch size {args.batch_size}")
+
+    dict_time = measure("dict", lambda: dict_records(pages, spans_per_page), args.batch_size, args.repeats)
+    span_time = measure("span", lambda: span_records(pages, spans_per_page), args.batch_size, args.repeats)
+    print(f"span records: {dict_time / span_time:.2f}x the throughput of dict records")
+
+
+if __name__ == "__main__":
+    main()
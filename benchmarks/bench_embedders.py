@@ -0,0 +1,84 @@
+"""
+Benchmark: PyTorch (sentence-transformers) vs ONNX Runtime embedding backends
+Single-query latency over the app's common questions, bulk throughput over
+the data directory's chunks, and how far the ONNX vectors drift
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+import config
+from chunking import TokenChunker
+from embedders import create_embedder, ONNX_AVAILABLE
+from common import REPO_DIR, load_common_questions, load_chunk_texts
+
+
+def query_latency(model, queries, rounds):
+    """Per-query latencies (ms) of single-string encode calls, as retrieve() makes them"""
+    latencies = []
+    for _ in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            model.encode(query, convert_to_numpy=True)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def bulk_throughput(model, texts):
+    start = time.perf_counter()
+    vectors = model.encode(texts, batch_size=config.BATCH_SIZE, show_progress_bar=False, convert_to_numpy=True)
+    return vectors, len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default=str(REPO_DIR / config.DATA_DIR))
+    parser.add_argument("--cache-dir", default=str(REPO_DIR / config.CACHE_DIR))
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--rounds", type=int, default=20, help="Passes over the query set")
+    parser.add_argument("--limit", type=int, default=512, help="Chunks for the bulk test (0 = all)")
+    args = parser.parse_args()
+
+    queries = load_common_questions()
+    texts = None
+    results = {}
+    for backend in args.backends:
+        if backend == "onnx" and not ONNX_AVAILABLE:
+            print("onnx   skipped: onnxruntime is not installed")
+            continue
+        start = time.perf_counter()
+        model = create_embedder(args.model, Path(args.cache_dir), backend=backend)
+        load_seconds = time.perf_counter() - start
+        if texts is None:
+            texts = load_chunk_texts(TokenChunker.from_model(model), args.data_dir, args.limit)
+
+        model.encode(queries, convert_to_numpy=True)  # Warm up
+        latencies = query_latency(model, queries, args.rounds)
+        query_vectors = model.encode(queries, convert_to_numpy=True)
+        chunk_vectors, throughput = bulk_throughput(model, texts)
+        results[backend] = (query_vectors, chunk_vectors)
+
+        print(
+            f"{backend:<6} load {load_seconds:6.2f}s  query p50 {np.percentile(latencies, 50):6.2f} ms  "
+            f"p95 {np.percentile(latencies, 95):6.2f} ms  bulk {throughput:8.1f} chunks/sec ({len(texts)} chunks)"
+        )
+
+    if "torch" in results:
+        reference = results["torch"]
+        for backend, vectors in results.items():
+            if backend == "torch":
+                continue
+            difference = max(float(np.abs(a - b).max()) for a, b in zip(reference, vectors))
+            print(f"{backend} vs torch: max abs difference {difference:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: library-default encode vs length-bucketed, token-budgeted batches
+Embeds the chunks of the data directory in ingestion-sized batches both ways
+and reports chunks/sec and how much of each batch is padding
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+import config
+from chunking import TokenChunker
+from embedding import BucketedEmbedder
+from ingestion import batched
+from common import REPO_DIR, load_chunk_texts
+
+
+def default_padding_efficiency(texts, lengths, ingest_batch_size):
+    """Real/padded tokens when SentenceTransformer sorts each call by characters into BATCH_SIZE batches"""
+    real = padded = 0
+    for offset in range(0, len(texts), ingest_batch_size):
+        indices = list(range(offset, min(offset + ingest_batch_size, len(texts))))
+        indices.sort(key=lambda i: -len(texts[i]))
+        for start in range(0, len(indices), config.BATCH_SIZE):
+            batch = lengths[indices[start:start + config.BATCH_SIZE]]
+            real += int(batch.sum())
+            padded += int(batch.max()) * len(batch)
+    return real / padded
+
+
+def run(label, encode, texts, ingest_batch_size):
+    start = time.perf_counter()
+    vectors = [encode(batch) for batch in batched(texts, ingest_batch_size)]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {len(texts) / elapsed:8.1f} chunks/sec ({elapsed:.2f}s)")
+    return np.vstack(vectors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default=str(REPO_DIR / config.DATA_DIR))
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL)
+    parser.add_argument("--limit", type=int, default=0, help="Only embed the first N chunks")
+    parser.add_argument("--ingest-batch-size", type=int, default=config.INGEST_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(args.model)
+    texts = load_chunk_texts(TokenChunker.from_model(model), args.data_dir, args.limit)
+    embedder = BucketedEmbedder(model, show_progress_bar=False)
+    lengths = embedder.token_lengths(texts)
+    print(
+        f"{len(texts)} chunks, {lengths.min()}-{lengths.max()} tokens (median {int(np.median(lengths))}), "
+        f"{embedder.max_batch_tokens} padded tokens per bucketed batch"
+    )
+
+    # Warm up kernels and caches before timing either variant
+    model.encode(texts[:config.BATCH_SIZE], show_progress_bar=False)
+
+    before = run(
+        "default",
+        lambda batch: model.encode(batch, show_progress_bar=False, convert_to_numpy=True),
+        texts,
+        args.ingest_batch_size
+    )
+    after = run("bucketed", embedder.encode, texts, args.ingest_batch_size)
+
+    stats = embedder.stats()
+    print(f"default:  padding efficiency {default_padding_efficiency(texts, lengths, args.ingest_batch_size):.1%}")
+    print(f"bucketed: {stats['calls']} model calls, padding efficiency {stats['padding_efficiency']:.1%}")
+    # Same vectors in the same order, up to batch-dependent float noise
+    print(f"max abs difference between variants: {np.abs(before - after).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
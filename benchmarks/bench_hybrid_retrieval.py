@@ -0,0 +1,123 @@
+"""
+Benchmark: BM25 hybrid retrieval vs the substring keyword filter
+Builds citation questions ("What does Section 21 of the ... Act say?") from
+the indexed chunks, takes every chunk quoting that citation as relevant, and
+compares recall@k and latency of the advanced pipeline's two modes
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+import config
+from common import REPO_DIR
+from embedders import create_embedder
+from vector_store import open_vector_client
+from bm25 import BM25Index, bm25_path_for, reciprocal_rank_fusion
+from rag_pipeline_advanced import keyword_filter
+
+CITATION = re.compile(r"\b(?:section|article|rule|order|clause)\s+\d+[a-z]?\b", re.IGNORECASE)
+ACT = re.compile(r"\b(?:[A-Z][a-z]+ ){1,5}Act(?:,? \d{4})?")
+
+
+def citation_queries(ids, documents, count, seed=0):
+    """(question, relevant chunk IDs) pairs for citations found in the chunks"""
+    lowered = [" ".join(document.lower().split()) for document in documents]
+    candidates = {}
+    for document in documents:
+        for match in CITATION.finditer(document):
+            citation = " ".join(match.group(0).split())
+            act = ACT.search(document)
+            key = (citation.lower(), act.group(0) if act else None)
+            candidates.setdefault(key, citation)
+    keys = sorted(candidates, key=str)
+    random.Random(seed).shuffle(keys)
+
+    queries = []
+    for citation_lower, act in keys[:count]:
+        needles = [citation_lower] + ([act.lower()] if act else [])
+        relevant = {chunk_id for chunk_id, text in zip(ids, lowered) if all(needle in text for needle in needles)}
+        question = f"What does {candidates[(citation_lower, act)]} of the {act} say?" if act else \
+            f"What does {candidates[(citation_lower, act)]} say?"
+        queries.append((question, relevant))
+    return queries
+
+
+def as_docs(result, q):
+    return [
+        {"id": chunk_id, "text": text}
+        for chunk_id, text in zip(result["ids"][q], result["documents"][q])
+    ]
+
+
+def recall(retrieved, relevant, top_k):
+    return len(set(retrieved) & relevant) / min(len(relevant), top_k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db-dir", default=str(REPO_DIR / config.DB_DIR))
+    parser.add_argument("--collection", default="legal_docs")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=config.DEFAULT_TOP_K)
+    args = parser.parse_args()
+
+    collection = open_vector_client(Path(args.db_dir), args.collection).get_collection(name=args.collection)
+    stored = collection.get(include=["documents"])
+    queries = citation_queries(stored["ids"], stored["documents"], args.queries)
+    if not queries:
+        parser.exit(1, "No citations found in the indexed chunks\n")
+
+    index = BM25Index(bm25_path_for(Path(args.db_dir), args.collection))
+    start = time.perf_counter()
+    index.sync(collection)
+    print(f"{collection.count()} chunks, BM25 index ready in {time.perf_counter() - start:.2f}s, {len(queries)} citation queries")
+
+    model = create_embedder(args.model, REPO_DIR / config.CACHE_DIR)
+    vectors = model.encode([question for question, _ in queries], convert_to_numpy=True).tolist()
+
+    modes = {"substring filter": ([], [], []), "bm25 hybrid": ([], [], [])}
+    for q, (question, relevant) in enumerate(queries):
+        # Old path: over-fetch vector hits, keep those containing a query word
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[vectors[q]], n_results=min(args.top_k * 2, 10))
+        stage = time.perf_counter()
+        kept = keyword_filter(question, as_docs(result, 0), args.top_k)
+        end = time.perf_counter()
+        recalls, totals, stages = modes["substring filter"]
+        recalls.append(recall([doc["id"] for doc in kept], relevant, args.top_k))
+        totals.append((end - start) * 1000)
+        stages.append((end - stage) * 1000)
+
+        # Hybrid path: vector and BM25 candidates, reciprocal rank fusion
+        candidates = max(config.HYBRID_CANDIDATES, args.top_k)
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[vectors[q]], n_results=candidates)
+        stage = time.perf_counter()
+        lexical = [chunk_id for chunk_id, _ in index.search(question, candidates)]
+        fused = [chunk_id for chunk_id, _ in reciprocal_rank_fusion([result["ids"][0], lexical])][:args.top_k]
+        end = time.perf_counter()
+        recalls, totals, stages = modes["bm25 hybrid"]
+        recalls.append(recall(fused, relevant, args.top_k))
+        totals.append((end - start) * 1000)
+        stages.append((end - stage) * 1000)
+
+    print(f"{'mode':<17}  {'recall@' + str(args.top_k):>9}  {'stage p50 ms':>12}  {'total p50 ms':>12}  {'total p95 ms':>12}")
+    for name, (recalls, totals, stages) in modes.items():
+        print(
+            f"{name:<17}  {np.mean(recalls):9.3f}  {np.percentile(stages, 50):12.3f}  "
+            f"{np.percentile(totals, 50):12.2f}  {np.percentile(totals, 95):12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Ingestion benchmark suite
+Runs extraction, chunking, embedding and ChromaDB writes over the data
+directory and synthetic 10x/100x copies of it, each scale in a fresh process,
+and writes per-stage wall time, throughput and peak RSS as JSON
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import config
+from common import REPO_DIR, peak_rss_mb, format_mb
+
+RESULTS_VERSION = 1
+
+
+def scaled_corpus(pdf_files, scale, out_dir):
+    """
+    The data directory's PDFs repeated `scale` times under distinct names
+
+    Copies are byte-identical, so the benchmark doesn't dedupe files or
+    chunks and extracts without the page cache.
+    """
+    if scale == 1:
+        return list(pdf_files)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    corpus = []
+    for copy in range(scale):
+        for pdf_path in pdf_files:
+            target = out_dir / f"{pdf_path.stem}__x{copy:03d}.pdf"
+            if not target.exists():
+                try:
+                    os.link(pdf_path, target)
+                except OSError:
+                    shutil.copyfile(pdf_path, target)
+            corpus.append(target)
+    return corpus
+
+
+def rate(count, seconds):
+    return count / seconds if seconds > 0 else 0.0
+
+
+def run_scale(options, pdf_files, results):
+    """Benchmark one corpus in this (fresh) process and put the result dict on the queue"""
+    import chromadb
+    from chunking import TokenChunker, PageText
+    from embedders import create_embedder
+    from embedding import BucketedEmbedder
+    from pdf_extraction import ParallelPdfExtractor
+    from chroma_loader import ChromaBulkLoader
+    from ingestion import ingest_chunk_stream
+
+    result = {"files": len(pdf_files), "bytes": sum(Path(p).stat().st_size for p in pdf_files)}
+
+    start = time.perf_counter()
+    model = create_embedder(options["model"], REPO_DIR / config.CACHE_DIR)
+    chunker = TokenChunker.from_model(model)
+    result["model_load_seconds"] = time.perf_counter() - start
+
+    # Extraction: pages/sec with every PDF parsed (no page cache)
+    extractor = ParallelPdfExtractor(workers=options["workers"], page_cache=None)
+    start = time.perf_counter()
+    pages = list(extractor.iter_pages(pdf_files))
+    seconds = time.perf_counter() - start
+    result["extraction"] = {
+        "seconds": seconds,
+        "pages": extractor.stats["pages"],
+        "non_empty_pages": len(pages),
+        "pages_per_sec": rate(extractor.stats["pages"], seconds),
+        "workers": extractor.stats["workers"]
+    }
+
+    # Chunking: token-aware chunking of the extracted pages
+    start = time.perf_counter()
+    chunks = []
+    for page in pages:
+        metadata = {"source": page["source"], "page": page["page_num"]}
+        chunks.extend(chunker.chunk_page(PageText(page["text"], metadata)))
+    seconds = time.perf_counter() - start
+    result["chunking"] = {"seconds": seconds, "chunks": len(chunks), "chunks_per_sec": rate(len(chunks), seconds)}
+
+    # Embedding: a bounded sample, since the rate is what matters at large scales
+    sample = chunks[:options["embed_limit"]] if options["embed_limit"] else chunks
+    texts = [chunk.text for chunk in sample]
+    embedder = BucketedEmbedder(model, show_progress_bar=False) if config.EMBED_LENGTH_BUCKETING else None
+    encode = embedder.encode if embedder is not None else (
+        lambda batch: model.encode(batch, batch_size=config.BATCH_SIZE, show_progress_bar=False, convert_to_numpy=True)
+    )
+    encode(texts[:config.BATCH_SIZE])  # Warm up
+    start = time.perf_counter()
+    vectors = encode(texts)
+    seconds = time.perf_counter() - start
+    result["embedding"] = {
+        "seconds": seconds,
+        "chunks": len(texts),
+        "chunks_per_sec": rate(len(texts), seconds),
+        "backend": config.EMBEDDING_BACKEND,
+        "quantized": config.EMBEDDING_QUANTIZE
+    }
+
+    # ChromaDB: writes of every chunk, reusing the sample's vectors
+    db_root = Path(tempfile.mkdtemp(prefix="bench_ingest_db_"))
+    try:
+        collection = chromadb.PersistentClient(path=str(db_root / "writes")).create_collection(name="bench")
+        loader = ChromaBulkLoader(collection, upsert=False)
+        start = time.perf_counter()
+        for offset in range(0, len(chunks), config.INGEST_BATCH_SIZE):
+            batch = chunks[offset:offset + config.INGEST_BATCH_SIZE]
+            loader.write(
+                [chunk.id for chunk in batch],
+                [vectors[(offset + i) % len(vectors)].tolist() for i in range(len(batch))],
+                [chunk.text for chunk in batch],
+                [chunk.metadata for chunk in batch]
+            )
+        seconds = time.perf_counter() - start
+        loader.close()
+        write_stats = loader.stats()
+        result["chroma"] = {
+            "seconds": seconds,
+            "records": write_stats["records"],
+            "writes": write_stats["writes"],
+            "records_per_sec": rate(write_stats["records"], seconds),
+            "writes_per_sec": rate(write_stats["writes"], seconds),
+            "write_batch_size": write_stats["write_batch_size"]
+        }
+
+        # End to end: the pipelined extract -> embed -> store path the pipelines use
+        if options["end_to_end"]:
+            collection = chromadb.PersistentClient(path=str(db_root / "e2e")).create_collection(name="bench")
+
+            def records():
+                for page in ParallelPdfExtractor(workers=options["workers"], page_cache=None).iter_pages(pdf_files):
+                    metadata = {"source": page["source"], "page": page["page_num"]}
+                    yield from chunker.chunk_page(PageText(page["text"], metadata))
+
+            stats = ingest_chunk_stream(records(), model, collection, upsert=True)
+            result["end_to_end"] = {
+                "seconds": stats["seconds"],
+                "chunks": stats["chunks"],
+                "chunks_per_sec": stats["chunks_per_sec"],
+                "bottleneck": stats["bottleneck"],
+                "stages": stats["stages"]
+            }
+    finally:
+        shutil.rmtree(db_root, ignore_errors=True)
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    # Largest peak RSS among finished child processes (the extraction workers)
+    result["workers_peak_rss_mb"] = peak_rss_mb(children=True)
+    results.put(result)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default=str(REPO_DIR / config.DATA_DIR))
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="Corpus multiples of data/")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL)
+    parser.add_argument("--workers", type=int, default=config.EXTRACTION_WORKERS, help="Extraction processes (0 = all cores)")
+    parser.add_argument("--embed-limit", type=int, default=2000, help="Chunks embedded per scale (0 = all)")
+    parser.add_argument("--end-to-end-scales", type=int, nargs="*", default=[1],
+                        help="Scales that also run the full pipelined ingest (embeds every chunk)")
+    parser.add_argument("--output", help="JSON file to write (default: stdout)")
+    args = parser.parse_args()
+
+    pdf_files = sorted(Path(args.data_dir).glob("*.pdf"))
+    if not pdf_files:
+        parser.exit(1, f"No PDFs in {args.data_dir}\n")
+
+    report = {
+        "version": RESULTS_VERSION,
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": args.model,
+        "config": {
+            "embedding_backend": config.EMBEDDING_BACKEND,
+            "embedding_quantize": config.EMBEDDING_QUANTIZE,
+            "embed_length_bucketing": config.EMBED_LENGTH_BUCKETING,
+            "batch_size": config.BATCH_SIZE,
+            "ingest_batch_size": config.INGEST_BATCH_SIZE,
+            "chroma_write_batch_size": config.CHROMA_WRITE_BATCH_SIZE,
+            "chroma_writers": config.CHROMA_WRITERS,
+            "chunk_max_tokens": config.CHUNK_MAX_TOKENS,
+            "chunk_overlap_tokens": config.CHUNK_OVERLAP_TOKENS
+        },
+        "scales": []
+    }
+
+    corpus_root = Path(tempfile.mkdtemp(prefix="bench_ingest_corpus_"))
+    # Fresh process per scale, so peak RSS belongs to that scale alone
+    context = multiprocessing.get_context("spawn")
+    try:
+        for scale in args.scales:
+            corpus = scaled_corpus(pdf_files, scale, corpus_root / f"x{scale}")
+            options = {
+                "model": args.model,
+                "workers": args.workers,
+                "embed_limit": args.embed_limit,
+                "end_to_end": scale in args.end_to_end_scales
+            }
+            results = context.Queue()
+            process = context.Process(target=run_scale, args=(options, corpus, results))
+            start = time.perf_counter()
+            process.start()
+            while True:
+                try:
+                    result = results.get(timeout=5)
+                    break
+                except queue.Empty:
+                    if not process.is_alive():
+                        raise RuntimeError(f"Scale {scale}x failed (exit code {process.exitcode})")
+            process.join()
+            result["scale"] = scale
+            result["wall_seconds"] = time.perf_counter() - start
+            report["scales"].append(result)
+            print(
+                f"{scale:>4}x: {result['extraction']['pages']} pages at {result['extraction']['pages_per_sec']:.1f}/s, "
+                f"chunking {result['chunking']['chunks_per_sec']:.0f} chunks/s, "
+                f"embedding {result['embedding']['chunks_per_sec']:.1f} chunks/s, "
+                f"chroma {result['chroma']['records_per_sec']:.0f} records/s, "
+                f"peak RSS {format_mb(result['peak_rss_mb'])}",
+                file=sys.stderr
+            )
+    finally:
+        shutil.rmtree(corpus_root, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
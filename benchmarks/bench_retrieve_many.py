@@ -0,0 +1,61 @@
+"""
+Benchmark: retrieve() in a loop vs one retrieve_many() call
+Runs the app's common questions against the existing index both ways, with
+the query-embedding cache cleared before each run, and checks that both
+return the same chunks
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import config
+from common import REPO_DIR, load_common_questions
+from rag_pipeline import RAGPipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top-k", type=int, default=config.DEFAULT_TOP_K)
+    parser.add_argument("--repeat", type=int, default=4, help="Copies of the question list (distinct spellings)")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    questions = load_common_questions()
+    # Suffixed copies, so the batch is bigger without hitting the query cache
+    queries = [f"{question}{' ?' * copy}" for copy in range(args.repeat) for question in questions]
+
+    pipeline = RAGPipeline(data_dir=str(REPO_DIR / config.DATA_DIR), db_dir=str(REPO_DIR / config.DB_DIR))
+    if pipeline.collection.count() == 0:
+        parser.exit(1, "Index is empty; build it first\n")
+    pipeline.retrieve_many(queries[:2], top_k=args.top_k)  # Warm up
+
+    loop_times, batch_times = [], []
+    for _ in range(args.rounds):
+        pipeline.query_cache.clear()
+        start = time.perf_counter()
+        single = [pipeline.retrieve(query, top_k=args.top_k) for query in queries]
+        loop_times.append(time.perf_counter() - start)
+
+        pipeline.query_cache.clear()
+        start = time.perf_counter()
+        batched = pipeline.retrieve_many(queries, top_k=args.top_k)
+        batch_times.append(time.perf_counter() - start)
+
+    same = sum(
+        [chunk["text"] for chunk in a] == [chunk["text"] for chunk in b]
+        for a, b in zip(single, batched)
+    )
+    loop, batch = min(loop_times), min(batch_times)
+    print(f"{len(queries)} queries, top_k {args.top_k}")
+    print(f"retrieve() loop:  {loop * 1000:8.1f} ms  ({len(queries) / loop:.1f} queries/sec)")
+    print(f"retrieve_many():  {batch * 1000:8.1f} ms  ({len(queries) / batch:.1f} queries/sec)")
+    print(f"speedup {loop / batch:.2f}x, same chunks for {same}/{len(queries)} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: query latency of the exact NumPy vector store vs ChromaDB (HNSW)
+Loads the same synthetic chunks into both backends at several corpus sizes
+and reports single-query latency percentiles, batched throughput, and
+ChromaDB's recall against the exact results
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import chromadb
+
+from chroma_loader import ChromaBulkLoader
+from vector_store import NumpyVectorClient
+from bench_chroma_writes import synthetic_records
+
+
+def load(collection, records):
+    loader = ChromaBulkLoader(collection, upsert=False)
+    loader.write(*records)
+    loader.close()
+
+
+def latencies(collection, queries, top_k):
+    """Per-query latencies (ms) of single-vector queries, as retrieve() makes them"""
+    times, ids = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=top_k)
+        times.append((time.perf_counter() - start) * 1000)
+        ids.append(result["ids"][0])
+    return np.array(times), ids
+
+
+def batched(collection, queries, top_k):
+    start = time.perf_counter()
+    collection.query(query_embeddings=queries, n_results=top_k)
+    return len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 50000])
+    parser.add_argument("--dim", type=int, default=384, help="Vector size (all-MiniLM-L6-v2: 384)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=6, help="n_results (advanced pipeline asks for top_k * 2)")
+    parser.add_argument("--space", default="l2", choices=["l2", "cosine", "ip"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    queries = queries.tolist()
+    metadata = {"hnsw:space": args.space}
+
+    print(f"{args.queries} queries, top_k {args.top_k}, {args.dim} dims, {args.space} space")
+    print(f"{'chunks':>7}  {'backend':<7}  {'p50 ms':>7}  {'p95 ms':>7}  {'batched q/s':>11}  {'recall':>6}")
+    for size in args.sizes:
+        records = synthetic_records(size, args.dim)
+        db_root = Path(tempfile.mkdtemp(prefix="bench_vector_store_"))
+        try:
+            stores = {
+                "numpy": NumpyVectorClient(db_root / "numpy").create_collection("bench", metadata=metadata),
+                "chroma": chromadb.PersistentClient(path=str(db_root / "chroma")).create_collection("bench", metadata=metadata)
+            }
+            results = {}
+            for name, collection in stores.items():
+                load(collection, records)
+                latencies(collection, queries[:10], args.top_k)  # Warm up
+                times, ids = latencies(collection, queries, args.top_k)
+                results[name] = (times, ids, batched(collection, queries, args.top_k))
+
+            exact = results["numpy"][1]
+            for name, (times, ids, throughput) in results.items():
+                recall = np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(ids, exact)])
+                print(
+                    f"{size:>7}  {name:<7}  {np.percentile(times, 50):7.2f}  {np.percentile(times, 95):7.2f}  "
+                    f"{throughput:11.1f}  {recall:6.3f}"
+                )
+        finally:
+            shutil.rmtree(db_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Shared helpers for the benchmark scripts
+Loads the sample queries and the chunk texts of the data directory, and
+reads the process's memory use
+"""
+
+import ast
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chunking import TokenChunker, PageText
+from pdf_extraction import ParallelPdfExtractor
+
+REPO_DIR = Path(__file__).parent.parent
+
+
+def load_common_questions(app_path: Path = REPO_DIR / "app_simple.py") -> List[str]:
+    """
+    Read COMMON_QUESTIONS out of app_simple.py without importing it
+
+    Importing the app would pull in streamlit, so the list literal is found
+    in the module's syntax tree instead.
+    """
+    tree = ast.parse(Path(app_path).read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "COMMON_QUESTIONS" for target in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"COMMON_QUESTIONS not found in {app_path}")
+
+
+def load_chunk_texts(chunker: TokenChunker, data_dir: Path, limit: int = 0) -> List[str]:
+    """Chunk texts of every PDF page in data_dir, in ingestion order"""
+    texts = []
+    pdf_files = sorted(Path(data_dir).glob("*.pdf"))
+    for page in ParallelPdfExtractor().iter_pages(pdf_files):
+        metadata = {"source": page["source"], "page": page["page_num"]}
+        texts.extend(span.text for span in chunker.chunk_page(PageText(page["text"], metadata)))
+    return texts[:limit] if limit else texts
+
+
+def _psutil_process():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process()
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process (peak RSS where neither /proc nor psutil is available)"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    process = _psutil_process()
+    if process is not None:
+        return process.memory_info().rss / (1024 * 1024)
+    return peak_rss_mb()
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """
+    Peak resident set size of this process, or of its finished children
+
+    None where it can't be measured: on Windows `resource` is missing and
+    only psutil's peak working set of this process is available.
+    """
+    try:
+        import resource
+    except ImportError:
+        process = None if children else _psutil_process()
+        peak = getattr(process.memory_info(), "peak_wset", None) if process is not None else None
+        return peak / (1024 * 1024) if peak is not None else None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def format_mb(value: Optional[float]) -> str:
+    """Memory figure for reports ("n/a" where it couldn't be measured)"""
+    return f"{value:.0f} MB" if value is not None else "n/a"
@@ -0,0 +1,184 @@
+"""
+Kill test for resumable ingestion
+Ingests the data directory once cleanly, then again while SIGKILLing the
+ingest at random points and restarting it until it completes, and checks the
+resumed collection matches the clean one (IDs, documents, metadata, vectors)
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import signal
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+import config
+from common import REPO_DIR
+
+PIPELINES = {
+    "rag": ("rag_pipeline", "RAGPipeline"),
+    "enhanced": ("rag_pipeline_enhanced", "EnhancedRAGPipeline"),
+    "advanced": ("rag_pipeline_advanced", "AdvancedRAGPipeline"),
+}
+
+
+def run_child(args):
+    """Build the pipeline and ingest once; prints INGESTING when it starts embedding"""
+    import importlib
+
+    module_name, class_name = PIPELINES[args.pipeline]
+    pipeline_class = getattr(importlib.import_module(module_name), class_name)
+    kwargs = {"enable_web_search": False} if args.pipeline == "advanced" else {}
+    pipeline = pipeline_class(
+        data_dir=args.data_dir,
+        db_dir=args.db_dir,
+        llm_model=args.llm_model,
+        ingest_batch_size=args.batch_size,
+        **kwargs
+    )
+    print("INGESTING", flush=True)
+    start = time.perf_counter()
+    pipeline.ingest_pdfs()
+    stats = pipeline.last_ingest_stats
+    print(f"DONE {time.perf_counter() - start:.3f} {stats.get('resumed_chunks', 0)}", flush=True)
+
+
+def spawn(args, db_dir):
+    command = [
+        sys.executable, __file__, "--child",
+        "--pipeline", args.pipeline,
+        "--data-dir", args.data_dir,
+        "--db-dir", str(db_dir),
+        "--llm-model", args.llm_model,
+        "--batch-size", str(args.batch_size),
+    ]
+    return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+
+def wait_for(process, marker):
+    """Read the child's stdout up to a line starting with marker"""
+    for line in process.stdout:
+        if line.startswith(marker):
+            return line.split()
+    return None
+
+
+def load_collection(db_dir):
+    from vector_store import open_vector_client
+
+    client = open_vector_client(db_dir, "legal_docs")
+    collection = client.get_collection(name="legal_docs")
+    data = collection.get(include=["documents", "metadatas", "embeddings"])
+    return {
+        chunk_id: (document, metadata, np.asarray(embedding, dtype=np.float32))
+        for chunk_id, document, metadata, embedding in zip(
+            data["ids"], data["documents"], data["metadatas"], data["embeddings"]
+        )
+    }
+
+
+def compare(clean, resumed, min_cosine):
+    """List of mismatches between two collections (empty if they match)"""
+    problems = []
+    missing = set(clean) - set(resumed)
+    extra = set(resumed) - set(clean)
+    if missing:
+        problems.append(f"{len(missing)} chunks missing, e.g. {sorted(missing)[:3]}")
+    if extra:
+        problems.append(f"{len(extra)} unexpected chunks, e.g. {sorted(extra)[:3]}")
+    for chunk_id in set(clean) & set(resumed):
+        clean_doc, clean_meta, clean_vec = clean[chunk_id]
+        doc, meta, vec = resumed[chunk_id]
+        if doc != clean_doc or meta != clean_meta:
+            problems.append(f"{chunk_id}: document or metadata differs")
+            continue
+        # Batch composition differs after a restart, which changes float noise only
+        cosine = float(clean_vec @ vec / (np.linalg.norm(clean_vec) * np.linalg.norm(vec)))
+        if cosine < min_cosine:
+            problems.append(f"{chunk_id}: embedding cosine {cosine:.6f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pipeline", choices=sorted(PIPELINES), default="rag")
+    parser.add_argument("--data-dir", default=str(REPO_DIR / config.DATA_DIR))
+    parser.add_argument("--db-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--llm-model", default=config.LLM_MODEL)
+    parser.add_argument("--batch-size", type=int, default=32, help="Small batches give more kill points")
+    parser.add_argument("--trials", type=int, default=3, help="Killed-and-resumed ingests to check")
+    parser.add_argument("--kills", type=int, default=3, help="Kills per trial before letting it finish")
+    parser.add_argument("--min-cosine", type=float, default=0.9999)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    rng = random.Random(args.seed)
+    work_dir = Path(tempfile.mkdtemp(prefix="kill_resume_"))
+    failures = 0
+    try:
+        # Each run gets its own parent directory, so caches are not shared between runs
+        clean_db = work_dir / "clean" / "db"
+        process = spawn(args, clean_db)
+        done = wait_for(process, "DONE")
+        process.wait()
+        if done is None:
+            raise RuntimeError(f"Clean ingest failed (exit code {process.returncode})")
+        clean_seconds = float(done[1])
+        clean = load_collection(clean_db)
+        print(f"clean run: {len(clean)} chunks in {clean_seconds:.1f}s")
+
+        for trial in range(args.trials):
+            db_dir = work_dir / f"trial{trial}" / "db"
+            kill_points = []
+            while True:
+                process = spawn(args, db_dir)
+                if wait_for(process, "INGESTING") is None:
+                    raise RuntimeError(f"Ingest failed to start (exit code {process.wait()})")
+                if len(kill_points) < args.kills:
+                    delay = rng.uniform(0, clean_seconds)
+                    time.sleep(delay)
+                    if process.poll() is None:
+                        os.kill(process.pid, signal.SIGKILL)
+                        process.wait()
+                        kill_points.append(delay)
+                        continue
+                done = wait_for(process, "DONE")
+                process.wait()
+                if done is None:
+                    raise RuntimeError(f"Resumed ingest failed (exit code {process.returncode})")
+                break
+
+            problems = compare(clean, load_collection(db_dir), args.min_cosine)
+            status = "OK" if not problems else "FAIL"
+            print(
+                f"trial {trial}: killed at {', '.join(f'{t:.2f}s' for t in kill_points) or 'never'}; "
+                f"last restart resumed {done[2]} chunks; {status}"
+            )
+            for problem in problems[:10]:
+                print(f"  {problem}")
+            failures += bool(problems)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if failures:
+        print(f"FAIL: {failures}/{args.trials} resumed collections differ from the clean run")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
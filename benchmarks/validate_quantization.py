@@ -0,0 +1,127 @@
+"""
+Validation harness for the int8 dynamically-quantized embedding model
+Measures recall@k of int8 retrieval against fp32 retrieval over the data
+directory's chunks with COMMON_QUESTIONS as queries, plus RSS and latency
+"""
+
+import sys
+import time
+import queue
+import argparse
+import multiprocessing
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+import config
+from common import REPO_DIR, load_common_questions, load_chunk_texts, current_rss_mb, format_mb
+
+
+def run_variant(model_name, quantize, data_dir, limit, rounds, results):
+    """Load one model variant in a fresh process and embed queries and corpus"""
+    from chunking import TokenChunker
+    from embedders import create_embedder
+
+    baseline_rss = current_rss_mb()
+    model = create_embedder(model_name, REPO_DIR / config.CACHE_DIR, backend="torch", quantize=quantize)
+    loaded_rss = current_rss_mb()
+    model_rss = loaded_rss - baseline_rss if loaded_rss is not None and baseline_rss is not None else None
+
+    # Chunk with the fp32 tokenizer settings; quantization doesn't change them
+    texts = load_chunk_texts(TokenChunker.from_model(model), data_dir, limit)
+    queries = load_common_questions()
+
+    model.encode(queries, convert_to_numpy=True)  # Warm up
+    latencies = []
+    for _ in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            model.encode(query, convert_to_numpy=True)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    corpus = model.encode(texts, batch_size=config.BATCH_SIZE, show_progress_bar=False, convert_to_numpy=True)
+    bulk_seconds = time.perf_counter() - start
+
+    results.put({
+        "queries": model.encode(queries, convert_to_numpy=True),
+        "corpus": corpus,
+        "model_rss_mb": model_rss,
+        "total_rss_mb": current_rss_mb(),
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p95_ms": float(np.percentile(latencies, 95)),
+        "chunks_per_sec": len(texts) / bulk_seconds
+    })
+
+
+def top_k(queries, corpus, k):
+    """Indices of the k most cosine-similar chunks per query"""
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default=str(REPO_DIR / config.DATA_DIR))
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--limit", type=int, default=0, help="Only index the first N chunks")
+    parser.add_argument("--rounds", type=int, default=10, help="Passes over the query set for latency")
+    parser.add_argument("--min-recall", type=float, default=0.9,
+                        help="Fail if recall@k (k = config.DEFAULT_TOP_K) drops below this")
+    args = parser.parse_args()
+
+    # Separate processes so each variant's RSS is measured from a clean start
+    context = multiprocessing.get_context("spawn")
+    variants = {}
+    for label, quantize in (("fp32", False), ("int8", True)):
+        results = context.Queue()
+        process = context.Process(
+            target=run_variant,
+            args=(args.model, quantize, args.data_dir, args.limit, args.rounds, results)
+        )
+        process.start()
+        while True:
+            try:
+                variants[label] = results.get(timeout=5)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    raise RuntimeError(f"{label} run failed (exit code {process.exitcode})")
+        process.join()
+
+    for label, result in variants.items():
+        print(
+            f"{label}: model RSS {format_mb(result['model_rss_mb']):>7} (process {format_mb(result['total_rss_mb']):>7})  "
+            f"query p50 {result['latency_p50_ms']:6.2f} ms  p95 {result['latency_p95_ms']:6.2f} ms  "
+            f"bulk {result['chunks_per_sec']:7.1f} chunks/sec"
+        )
+
+    fp32, int8 = variants["fp32"], variants["int8"]
+    similarity = np.sum(fp32["corpus"] * int8["corpus"], axis=1) / (
+        np.linalg.norm(fp32["corpus"], axis=1) * np.linalg.norm(int8["corpus"], axis=1)
+    )
+    print(f"{len(fp32['corpus'])} chunks, {len(fp32['queries'])} queries; "
+          f"fp32/int8 chunk cosine mean {similarity.mean():.4f} min {similarity.min():.4f}")
+
+    recalls = {}
+    for k in sorted(set(args.k + [config.DEFAULT_TOP_K])):
+        expected = top_k(fp32["queries"], fp32["corpus"], k)
+        actual = top_k(int8["queries"], int8["corpus"], k)
+        # Share of the fp32 top-k that int8 retrieval also returns
+        recalls[k] = np.mean([len(set(e) & set(a)) / k for e, a in zip(expected, actual)])
+        print(f"recall@{k:<3} {recalls[k]:.3f}")
+
+    if recalls[config.DEFAULT_TOP_K] < args.min_recall:
+        print(f"FAIL: recall@{config.DEFAULT_TOP_K} below {args.min_recall}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
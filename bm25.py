@@ -0,0 +1,251 @@
+"""
+Persistent BM25 inverted index over chunk text
+Built alongside the vector index at ingestion time and fused with vector
+hits at query time, so exact terms like statute names and section numbers
+count for retrieval
+"""
+
+import os
+import re
+import json
+import math
+import heapq
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_INDEX_VERSION = 1
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Words that appear in nearly every question; dropping them keeps postings short
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i if in is it its me my of on or "
+    "our should so that the their them there these they this to under was we what when where which "
+    "who will with you your".split()
+)
+_READ_PAGE_SIZE = 5000  # Documents fetched from the collection per get() while syncing
+
+
+def bm25_path_for(db_dir: Path, collection_name: str) -> Path:
+    """BM25 index file stored next to the ChromaDB directory"""
+    db_dir = Path(db_dir)
+    return db_dir.parent / f"{db_dir.name}_{collection_name}_bm25.json"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric terms without stopwords ("Section 498A" -> ["section", "498a"])"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a set of documents keyed by chunk ID
+
+    Per-document term counts are what gets persisted; postings, document
+    frequencies and lengths are derived on load. Thread-safe.
+    """
+
+    def __init__(self, path: Optional[Path] = None, k1: float = config.BM25_K1, b: float = config.BM25_B):
+        """
+        Initialize index
+
+        Args:
+            path: JSON file to load from and save to (None = in memory only)
+            k1: Term-frequency saturation
+            b: Document-length normalization
+        """
+        self.path = Path(path) if path is not None else None
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._docs: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self._dirty = False
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable BM25 index {self.path}: {e}")
+            return
+        if data.get("version") != _INDEX_VERSION:
+            logger.info(f"BM25 index {self.path} has an old format; it will be rebuilt")
+            return
+        for doc_id, terms in data["docs"].items():
+            self._index(doc_id, terms)
+
+    def save(self):
+        """Write the index if it changed (atomically)"""
+        with self._lock:
+            if self.path is None or not self._dirty:
+                return
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": _INDEX_VERSION, "docs": self._docs}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def _index(self, doc_id: str, terms: Dict[str, int]):
+        self._docs[doc_id] = terms
+        length = sum(terms.values())
+        self._lengths[doc_id] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _unindex(self, doc_id: str):
+        terms = self._docs.pop(doc_id)
+        self._total_length -= self._lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def add(self, ids: List[str], texts: List[str]):
+        """Index (or re-index) documents"""
+        with self._lock:
+            for doc_id, text in zip(ids, texts):
+                if doc_id in self._docs:
+                    self._unindex(doc_id)
+                self._index(doc_id, dict(Counter(tokenize(text))))
+            self._dirty = True
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Drop documents; returns how many were indexed"""
+        removed = 0
+        with self._lock:
+            for doc_id in ids:
+                if doc_id in self._docs:
+                    self._unindex(doc_id)
+                    removed += 1
+            self._dirty = self._dirty or removed > 0
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._docs, self._lengths, self._postings = {}, {}, {}
+            self._total_length = 0
+            self._dirty = True
+
+    def sync(self, collection) -> Dict[str, int]:
+        """
+        Make the index cover exactly the collection's chunks
+
+        Catches up after deletions made elsewhere, a run that stopped before
+        saving, or a snapshot import; only missing documents are fetched.
+
+        Returns:
+            Dict with added and removed counts
+        """
+        stored = set(collection.get(include=[])["ids"])
+        with self._lock:
+            extra = [doc_id for doc_id in self._docs if doc_id not in stored]
+            missing = [doc_id for doc_id in stored if doc_id not in self._docs]
+        for offset in range(0, len(missing), _READ_PAGE_SIZE):
+            page = collection.get(ids=missing[offset:offset + _READ_PAGE_SIZE], include=["documents"])
+            self.add(page["ids"], [document or "" for document in page["documents"]])
+        removed = self.remove(extra)
+        if missing or removed:
+            logger.info(f"BM25 index synced: {len(missing)} added, {removed} removed ({len(self)} documents)")
+        self.save()
+        return {"added": len(missing), "removed": removed}
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Best-scoring documents for a query
+
+        Args:
+            query: Query text
+            top_k: Results to return
+
+        Returns:
+            (chunk ID, BM25 score) pairs, best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            total = len(self._docs)
+            if not total or not terms:
+                return []
+            avg_length = self._total_length / total
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = config.RRF_K, weights: Optional[List[float]] = None) -> List[Tuple[str, float]]:
+    """
+    Merge ranked ID lists with reciprocal rank fusion
+
+    Args:
+        rankings: ID lists, best first
+        k: Damping constant (60 in the original paper)
+        weights: Optional weight per ranking
+
+    Returns:
+        (ID, fused score) pairs, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights or [1.0] * len(rankings)):
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def weighted_score_fusion(
+    vector_hits: List[Tuple[str, float]],
+    lexical_hits: List[Tuple[str, float]],
+    lexical_weight: float = config.HYBRID_LEXICAL_WEIGHT
+) -> List[Tuple[str, float]]:
+    """
+    Merge vector and BM25 hits by a weighted sum of min-max normalized scores
+
+    Args:
+        vector_hits: (ID, distance) pairs; smaller distance is better
+        lexical_hits: (ID, BM25 score) pairs; larger is better
+        lexical_weight: Share of the BM25 score in the sum (0..1)
+
+    Returns:
+        (ID, fused score) pairs, best first
+    """
+    def normalized(hits, invert):
+        if not hits:
+            return {}
+        values = [score for _, score in hits]
+        low, high = min(values), max(values)
+        span = high - low
+        return {
+            doc_id: (1.0 if span == 0 else ((high - score) if invert else (score - low)) / span)
+            for doc_id, score in hits
+        }
+
+    vector_scores = normalized(vector_hits, invert=True)
+    lexical_scores = normalized(lexical_hits, invert=False)
+    fused = {
+        doc_id: (1 - lexical_weight) * vector_scores.get(doc_id, 0.0) + lexical_weight * lexical_scores.get(doc_id, 0.0)
+        for doc_id in set(vector_scores) | set(lexical_scores)
+    }
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,146 @@
+"""
+Bulk writes to ChromaDB
+Splits large writes to the client's max batch size (one SQLite transaction
+each) and optionally runs several writes concurrently
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def client_max_batch_size(collection) -> Optional[int]:
+    """
+    Largest write the collection's client accepts, or None if it doesn't say
+
+    Newer chromadb clients expose get_max_batch_size(), 0.4.x a
+    max_batch_size property; older ones have no limit to report.
+    """
+    client = getattr(collection, "_client", None)
+    for name in ("get_max_batch_size", "max_batch_size"):
+        value = getattr(client, name, None)
+        if callable(value):
+            try:
+                value = value()
+            except Exception:
+                continue
+        if isinstance(value, int) and value > 0:
+            return value
+    return None
+
+
+class ChromaBulkLoader:
+    """
+    Writes and deletes of any size against one ChromaDB collection
+
+    Each call is split into sub-batches of write_batch_size (never more than
+    the client's max batch size). With writers > 1 the sub-batches of a call
+    are written concurrently; the call returns once all of them are stored.
+    """
+
+    def __init__(
+        self,
+        collection,
+        write_batch_size: Optional[int] = config.CHROMA_WRITE_BATCH_SIZE,
+        writers: int = config.CHROMA_WRITERS,
+        upsert: bool = True
+    ):
+        """
+        Initialize loader
+
+        Args:
+            collection: ChromaDB collection
+            write_batch_size: Records per write/transaction (None = client max)
+            writers: Threads writing sub-batches concurrently
+            upsert: Use collection.upsert instead of collection.add
+        """
+        self.collection = collection
+        self.max_batch_size = client_max_batch_size(collection)
+        if write_batch_size is None:
+            write_batch_size = self.max_batch_size
+        elif self.max_batch_size is not None and write_batch_size > self.max_batch_size:
+            logger.warning(f"Write batch size {write_batch_size} exceeds ChromaDB's max {self.max_batch_size}; capping")
+            write_batch_size = self.max_batch_size
+        self.write_batch_size = write_batch_size
+        self.writers = max(1, writers)
+        self.upsert = upsert
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.writes = 0
+        self.records = 0
+        self.deleted = 0
+        self.seconds = 0.0
+
+    def _spans(self, total: int) -> List[slice]:
+        size = self.write_batch_size or total or 1
+        return [slice(start, start + size) for start in range(0, total, size)]
+
+    def _write_span(self, span: slice, ids, embeddings, documents, metadatas):
+        write = self.collection.upsert if self.upsert else self.collection.add
+        kwargs = {"ids": ids[span], "embeddings": embeddings[span]}
+        if documents is not None:
+            kwargs["documents"] = documents[span]
+        if metadatas is not None:
+            kwargs["metadatas"] = metadatas[span]
+        write(**kwargs)
+        with self._lock:
+            self.writes += 1
+            self.records += len(kwargs["ids"])
+
+    def write(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict]] = None
+    ):
+        """Store records, split into client-sized writes"""
+        if not ids:
+            return
+        start = time.perf_counter()
+        spans = self._spans(len(ids))
+        if self.writers > 1 and len(spans) > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.writers, thread_name_prefix="chroma-writer")
+            futures = [
+                self._executor.submit(self._write_span, span, ids, embeddings, documents, metadatas)
+                for span in spans
+            ]
+            for future in futures:
+                future.result()
+        else:
+            for span in spans:
+                self._write_span(span, ids, embeddings, documents, metadatas)
+        self.seconds += time.perf_counter() - start
+
+    def delete(self, ids: List[str]) -> int:
+        """Delete records by ID, split into client-sized calls"""
+        for span in self._spans(len(ids)):
+            self.collection.delete(ids=ids[span])
+        self.deleted += len(ids)
+        return len(ids)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> Dict:
+        """Write counters since the loader was created"""
+        return {
+            "writes": self.writes,
+            "records": self.records,
+            "deleted": self.deleted,
+            "seconds": self.seconds,
+            "records_per_sec": self.records / self.seconds if self.seconds > 0 else 0.0,
+            "write_batch_size": self.write_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "writers": self.writers
+        }
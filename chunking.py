@@ -0,0 +1,233 @@
+"""
+Token-aware text chunking for the RAG pipelines
+Measures chunks in embedding-model tokens so no chunk is truncated at encode time
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import config
+from ingestion import chunk_id
+
+logger = logging.getLogger(__name__)
+
+# Tokens that end a sentence when they stand alone
+_SENTENCE_END = {".", "!", "?", ";", ":"}
+
+
+class PageText:
+    """One page's text buffer plus the metadata shared by all its chunks"""
+
+    __slots__ = ("text", "metadata", "chunk_info")
+
+    def __init__(self, text: str, metadata: Dict, chunk_info: bool = False):
+        """
+        Args:
+            text: Page text the chunks point into
+            metadata: Metadata common to every chunk (needs source and page)
+            chunk_info: Add chunk_index and token_count to each chunk's metadata
+        """
+        self.text = text
+        self.metadata = metadata
+        self.chunk_info = chunk_info
+
+
+class ChunkSpan:
+    """
+    A chunk stored as (page, start, end) offsets into its page's text
+
+    Text and metadata are only built when asked for, i.e. when the chunk is
+    sent to the embedder or ChromaDB. Supports chunk["text"] style access so
+    it can go anywhere a dict chunk record (id, text, metadata) can.
+    """
+
+    __slots__ = ("page", "start", "end", "index", "num_tokens", "_id", "_metadata")
+
+    def __init__(self, page: PageText, start: int, end: int, index: int, num_tokens: int):
+        self.page = page
+        self.start = start
+        self.end = end
+        self.index = index
+        self.num_tokens = num_tokens
+        self._id: Optional[str] = None
+        self._metadata: Optional[Dict] = None
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __getitem__(self, key: str):
+        if key == "text":
+            return self.page.text[self.start:self.end]
+        if key == "id":
+            return self._id or self.id
+        if key == "metadata":
+            return self._metadata or self.metadata
+        raise KeyError(key)
+
+    @property
+    def text(self) -> str:
+        return self.page.text[self.start:self.end]
+
+    @property
+    def metadata(self) -> Dict:
+        if self._metadata is None:
+            if self.page.chunk_info:
+                self._metadata = {**self.page.metadata, "chunk_index": self.index, "token_count": self.num_tokens}
+            else:
+                # Read-only downstream, so every chunk of a page shares one dict
+                self._metadata = self.page.metadata
+        return self._metadata
+
+    @property
+    def id(self) -> str:
+        if self._id is None:
+            metadata = self.page.metadata
+            self._id = chunk_id(metadata["source"], metadata["page"], self.start, self.text)
+        return self._id
+
+
+class TokenChunker:
+    """
+    Split text into overlapping chunks of at most max_tokens model tokens
+
+    The text is tokenized once with the fast tokenizer's offset mapping, and
+    chunks are cut on token boundaries, so re-tokenizing a chunk gives the
+    same tokens. Cuts prefer the end of a sentence, then the end of a word.
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        max_tokens: int,
+        overlap_tokens: int = config.CHUNK_OVERLAP_TOKENS,
+        min_fill: float = config.CHUNK_MIN_FILL
+    ):
+        """
+        Initialize chunker
+
+        Args:
+            tokenizer: Hugging Face fast tokenizer (must support offset mapping)
+            max_tokens: Maximum tokens per chunk, excluding special tokens
+            overlap_tokens: Tokens repeated between consecutive chunks
+            min_fill: Only cut at a sentence/word boundary if the chunk keeps
+                at least this fraction of max_tokens
+        """
+        if not getattr(tokenizer, "is_fast", False):
+            raise ValueError("TokenChunker needs a fast tokenizer (return_offsets_mapping)")
+        if max_tokens <= 0:
+            raise ValueError(f"max_tokens must be positive, got {max_tokens}")
+
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = min(max(0, overlap_tokens), max_tokens // 2)
+        self.min_tokens = max(1, int(max_tokens * min_fill))
+
+    @property
+    def signature(self) -> str:
+        """Identifies the chunking settings; chunks change whenever this does"""
+        name = getattr(self.tokenizer, "name_or_path", type(self.tokenizer).__name__)
+        return f"tokens:{name}:{self.max_tokens}:{self.overlap_tokens}:{self.min_tokens}"
+
+    @classmethod
+    def from_model(
+        cls,
+        embedding_model,
+        max_tokens: Optional[int] = config.CHUNK_MAX_TOKENS,
+        **kwargs
+    ) -> "TokenChunker":
+        """
+        Build a chunker matching a SentenceTransformer's input window
+
+        Args:
+            embedding_model: SentenceTransformer (uses .tokenizer and .max_seq_length)
+            max_tokens: Cap on chunk size (None = the model's max_seq_length)
+            **kwargs: Passed to TokenChunker
+
+        Returns:
+            TokenChunker whose chunks fit the model without truncation
+        """
+        tokenizer = embedding_model.tokenizer
+        # [CLS]/[SEP] (or <s>/</s>) count against max_seq_length too
+        window = embedding_model.max_seq_length - tokenizer.num_special_tokens_to_add(pair=False)
+        if max_tokens is None or max_tokens > window:
+            max_tokens = window
+        logger.info(f"Chunking to at most {max_tokens} tokens ({window}-token model window)")
+        return cls(tokenizer, max_tokens, **kwargs)
+
+    def chunk_page(self, page: PageText, min_chars: int = 0) -> List[ChunkSpan]:
+        """
+        Chunk one page without copying its text
+
+        Args:
+            page: Page text and shared metadata
+            min_chars: Drop chunks shorter than this many characters
+
+        Returns:
+            ChunkSpans pointing into page.text
+        """
+        spans = []
+        for start, end, num_tokens in self.split(page.text):
+            if end - start >= min_chars:
+                spans.append(ChunkSpan(page, start, end, len(spans), num_tokens))
+        return spans
+
+    def split(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        Compute chunk boundaries for one page of text
+
+        Args:
+            text: Text to chunk
+
+        Returns:
+            List of (start_char, end_char, token_count) spans into text
+        """
+        offsets = self.tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False  # Pages are longer than the model window on purpose
+        )["offset_mapping"]
+        n = len(offsets)
+        if n == 0:
+            return []
+
+        # Last sentence end / word end at or before each token, in one pass
+        last_sentence = [-1] * n
+        last_word = [-1] * n
+        sentence, word = -1, -1
+        for i, (start, end) in enumerate(offsets):
+            next_start = offsets[i + 1][0] if i + 1 < n else len(text)
+            gap = text[end:next_start]
+            if gap or i + 1 == n:
+                word = i
+                # PDF text breaks every line, so only a blank line ends a paragraph
+                if text[start:end] in _SENTENCE_END or "\n\n" in gap:
+                    sentence = i
+            last_sentence[i] = sentence
+            last_word[i] = word
+
+        spans = []
+        start_tok = 0
+        while start_tok < n:
+            end_tok = min(start_tok + self.max_tokens, n)
+            if end_tok < n:
+                # Cut after the last sentence end (or else word end) in the window
+                floor = start_tok + self.min_tokens - 1
+                if last_sentence[end_tok - 1] >= floor:
+                    end_tok = last_sentence[end_tok - 1] + 1
+                elif last_word[end_tok - 1] >= floor:
+                    end_tok = last_word[end_tok - 1] + 1
+
+            spans.append((offsets[start_tok][0], offsets[end_tok - 1][1], end_tok - start_tok))
+            if end_tok == n:
+                break
+
+            # Start the overlap on a word boundary so it isn't a word fragment
+            next_tok = max(end_tok - self.overlap_tokens, start_tok + 1)
+            if next_tok < end_tok and last_word[next_tok - 1] > start_tok:
+                next_tok = last_word[next_tok - 1] + 1
+            start_tok = next_tok
+
+        return spans
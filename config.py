@@ -15,13 +15,62 @@ LLM_MODEL = "google/flan-t5-small"
 # EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"  # Better quality, slower
 # LLM_MODEL = "google/flan-t5-base"  # Better quality, requires more RAM
 
+# Embedding Backend Settings
+EMBEDDING_BACKEND = "torch"  # "torch" (sentence-transformers) or "onnx" (ONNX Runtime on CPU, needs onnxruntime)
+ONNX_THREADS = 0             # ONNX Runtime intra-op threads (0 = library default)
+EMBEDDING_QUANTIZE = False   # int8 dynamic quantization of the torch model's Linear layers (less RAM, small recall drift)
+
 # Chunking Settings
-CHUNK_SIZE = 500        # Size of text chunks (characters)
-CHUNK_OVERLAP = 50      # Overlap between chunks (characters)
+CHUNK_MAX_TOKENS = None    # Max embedding-model tokens per chunk (None = model's max_seq_length)
+CHUNK_OVERLAP_TOKENS = 32  # Tokens shared by consecutive chunks
+CHUNK_MIN_FILL = 0.5       # Cut at a sentence/word end only if the chunk keeps this fraction of max tokens
+
+# Ingestion Settings
+EXTRACTION_WORKERS = 0  # Processes for PDF text extraction (0 = all CPU cores, 1 = serial)
+INGEST_BATCH_SIZE = 256  # Chunks embedded and written to ChromaDB per batch (bounds peak memory)
+INGEST_PIPELINED = True  # Overlap extraction, embedding and ChromaDB writes on separate threads
+INGEST_QUEUE_DEPTH = 4   # Batches buffered between two ingestion stages
+INGEST_JOBS_KEPT = 50    # Finished background jobs kept for /api/ingest/{job_id} status queries
+CHROMA_WRITE_BATCH_SIZE = None  # Records per ChromaDB write/transaction (None = client max_batch_size; capped at it)
+CHROMA_WRITERS = 1       # Threads writing the sub-batches of one store call concurrently
+MAX_UPLOAD_MB = 100      # Largest PDF accepted by POST /api/documents
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes written to disk per read while streaming an upload
+WATCH_DATA_DIR = False    # API backends: re-index PDFs added/changed/removed in DATA_DIR while running
+WATCH_DEBOUNCE_SECONDS = 2.0  # Quiet time after the last file event before a sync starts
+WATCH_POLL_INTERVAL = 5.0     # Seconds between directory scans when inotify is unavailable
+
+# Deduplication Settings
+EXTRA_DATA_DIRS = []         # More PDF directories (next to DATA_DIR) to ingest, e.g. ["knowledge_base"]
+DEDUP_ENABLED = True         # Drop identical PDFs, and duplicate chunks within a PDF, during ingestion
+DEDUP_NEAR_THRESHOLD = 0.85  # MinHash Jaccard at/above which chunks are near duplicates (None = exact only)
+DEDUP_NUM_PERM = 64          # MinHash permutations per chunk signature
+
+# Vector Store Settings
+VECTOR_STORE = "auto"                 # "numpy" (exact in-process search), "chroma", or "auto" (where the index is; new ones in NumPy)
+VECTOR_STORE_AUTO_MAX_CHUNKS = 10000  # Larger NumPy indexes are flagged for `python vector_store.py migrate --to chroma`
+
+# Snapshot Settings
+SNAPSHOT_PATH = None  # Index snapshot (python snapshot.py export) loaded at API startup when the collection is empty
+
+# Cache Settings
+CACHE_DIR = "cache"                # Directory (next to DB_DIR) for ingestion caches
+EMBEDDING_CACHE_ENABLED = True     # Reuse embeddings of unchanged chunk text across rebuilds
+EMBEDDING_CACHE_DTYPE = "float16"  # Storage precision of cached embeddings (float16 or float32)
+PAGE_CACHE_ENABLED = True          # Reuse extracted PDF page text so re-chunking skips pypdf
+QUERY_CACHE_SIZE = 1024            # Query embeddings kept in memory, shared by all pipelines (0 = off)
 
 # Retrieval Settings
 DEFAULT_TOP_K = 3       # Number of chunks to retrieve by default
 MAX_TOP_K = 5          # Maximum number of chunks user can select
+HYBRID_SEARCH = True          # Advanced pipeline: fuse BM25 keyword hits with vector hits (False = substring filter)
+HYBRID_FUSION = "rrf"         # "rrf" (reciprocal rank fusion) or "weighted" (normalized score sum)
+HYBRID_CANDIDATES = 20        # Hits taken from each index before fusion
+HYBRID_LEXICAL_WEIGHT = 0.5   # BM25 share of the score in weighted fusion
+RRF_K = 60                    # Reciprocal rank fusion damping constant
+QUERY_SYNONYMS_FILE = "query_synonyms.json"  # Term -> synonyms used to expand questions (relative to this file)
+QUERY_EXPANSION_MAX_VARIANTS = 4  # Synonym variants searched besides the original question (0 = no expansion)
+BM25_K1 = 1.5                 # BM25 term-frequency saturation
+BM25_B = 0.75                 # BM25 document-length normalization
 
 # Generation Settings
 MAX_INPUT_LENGTH = 512   # Maximum input tokens for LLM
@@ -37,6 +86,8 @@ LAYOUT = "wide"
 # Performance Settings
 SHOW_PROGRESS_BAR = True  # Show progress during embedding computation
 BATCH_SIZE = 32           # Batch size for embedding computation
+EMBED_LENGTH_BUCKETING = True  # Sort chunks by token length before batching them for the embedding model
+EMBED_MAX_BATCH_TOKENS = None  # Padded tokens (chunks x longest chunk) per embedding batch (None = BATCH_SIZE x model max length)
 
 # Logging
 LOG_LEVEL = "INFO"  # Options: DEBUG, INFO, WARNING, ERROR
@@ -0,0 +1,224 @@
+"""
+Data-directory watcher for continuous ingestion
+Debounces PDF file events (inotify on Linux, directory polling elsewhere) and
+re-indexes only the files that were added, changed or removed
+"""
+
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+INOTIFY_AVAILABLE = False
+try:
+    from inotify_simple import INotify, flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    logger.info("inotify not available, data watcher will poll. Install with: pip install inotify_simple")
+
+
+class DataDirWatcher:
+    """
+    Watches a pipeline's data directory and keeps its index in sync
+
+    Changed and new PDFs are passed to pipeline.ingest_files(), removed ones
+    to pipeline.remove_document(). Both upsert/delete in place, so queries
+    keep being served from the current index while a sync runs.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        data_dir: Optional[Path] = None,
+        debounce: float = config.WATCH_DEBOUNCE_SECONDS,
+        poll_interval: float = config.WATCH_POLL_INTERVAL,
+        use_inotify: bool = True,
+        submit: Optional[Callable[[Callable, str], object]] = None
+    ):
+        """
+        Initialize watcher
+
+        Args:
+            pipeline: RAG pipeline with ingest_files() and remove_document()
+            data_dir: Directory to watch (default: pipeline.data_dir)
+            debounce: Seconds without new events before a sync starts
+            poll_interval: Seconds between scans when polling
+            use_inotify: Use inotify when available (polling otherwise)
+            submit: Called with (sync function, description) to run a sync,
+                e.g. IngestJobManager.start; default runs it on the watcher thread
+        """
+        self.pipeline = pipeline
+        self.data_dir = Path(data_dir) if data_dir is not None else Path(pipeline.data_dir)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.mode = "inotify" if use_inotify and INOTIFY_AVAILABLE else "polling"
+        self.submit = submit
+
+        self._pending: Dict[str, float] = {}  # File name -> time of its first unsynced event
+        self._last_event = 0.0
+        self._in_flight: Dict[int, float] = {}  # Sync number -> oldest event time it covers
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.events = 0
+        self.syncs = 0
+        self.files_ingested = 0
+        self.files_removed = 0
+        self.errors: List[str] = []
+        self.last_event_at: Optional[float] = None
+        self.last_sync_at: Optional[float] = None
+        self.last_sync_seconds: Optional[float] = None
+        self.last_sync_lag: Optional[float] = None
+
+    def start(self):
+        """Start watching in a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self._snapshot = self._scan()
+        target = self._watch_inotify if self.mode == "inotify" else self._watch_polling
+        self._thread = threading.Thread(target=target, name="data-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.data_dir} for PDF changes ({self.mode})")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop watching; events not yet synced are dropped"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @staticmethod
+    def _is_pdf(name: str) -> bool:
+        # Hidden names are in-progress uploads and editor temp files
+        return name.lower().endswith(".pdf") and not name.startswith(".")
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """(mtime_ns, size) of every PDF in the data directory"""
+        snapshot = {}
+        if not self.data_dir.exists():
+            return snapshot
+        for path in self.data_dir.iterdir():
+            if self._is_pdf(path.name):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                snapshot[path.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _record(self, names):
+        now = time.time()
+        with self._lock:
+            for name in names:
+                self._pending.setdefault(name, now)
+                self.events += 1
+            self._last_event = now
+            self.last_event_at = now
+
+    def _watch_polling(self):
+        while not self._stop.wait(self.poll_interval):
+            snapshot = self._scan()
+            # A file still being copied changes size between scans, which restarts the debounce
+            changed = [name for name, state in snapshot.items() if self._snapshot.get(name) != state]
+            removed = [name for name in self._snapshot if name not in snapshot]
+            self._snapshot = snapshot
+            if changed or removed:
+                self._record(changed + removed)
+            self._flush_if_quiet()
+
+    def _watch_inotify(self):
+        inotify = INotify()
+        # No CREATE: a file is only complete at CLOSE_WRITE (copy) or MOVED_TO (rename into place)
+        mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE
+        inotify.add_watch(str(self.data_dir), mask)
+        try:
+            while not self._stop.is_set():
+                # Wake at least once a second to check the debounce and stop flag
+                names = [event.name for event in inotify.read(timeout=1000) if self._is_pdf(event.name)]
+                if names:
+                    self._record(names)
+                self._flush_if_quiet()
+        finally:
+            inotify.close()
+
+    def _flush_if_quiet(self):
+        """Sync the pending files once no event arrived for `debounce` seconds"""
+        with self._lock:
+            if not self._pending or time.time() - self._last_event < self.debounce:
+                return
+            batch, self._pending = self._pending, {}
+            self.syncs += 1
+            sync_number = self.syncs
+            self._in_flight[sync_number] = min(batch.values())
+
+        names = sorted(batch)
+        description = f"Sync {len(names)} changed file(s) in {self.data_dir.name}"
+        if self.submit is not None:
+            self.submit(lambda: self._sync(sync_number, names), description)
+        else:
+            self._sync(sync_number, names)
+
+    def _sync(self, sync_number: int, names: List[str]) -> int:
+        """Re-index existing files and drop removed ones; returns chunks produced"""
+        start = time.time()
+        produced = 0
+        try:
+            existing = [self.data_dir / name for name in names if (self.data_dir / name).exists()]
+            removed = [name for name in names if not (self.data_dir / name).exists()]
+            for name in removed:
+                self.pipeline.remove_document(name)
+            if existing:
+                produced = self.pipeline.ingest_files(existing)
+            self.files_ingested += len(existing)
+            self.files_removed += len(removed)
+            logger.info(f"Data watcher synced {len(existing)} changed and {len(removed)} removed file(s)")
+        except Exception as e:
+            logger.exception("Data watcher sync failed")
+            self.errors.append(f"{', '.join(names)}: {e}")
+        finally:
+            finished = time.time()
+            with self._lock:
+                oldest_event = self._in_flight.pop(sync_number, start)
+            self.last_sync_at = finished
+            self.last_sync_seconds = finished - start
+            self.last_sync_lag = finished - oldest_event
+        return produced
+
+    def stats(self) -> Dict:
+        """
+        Watcher metrics
+
+        Returns:
+            Dict with mode, event/sync/file counters, pending files, current
+            lag (seconds since the oldest event not yet synced, 0 when up to
+            date), last sync time/duration/lag and errors
+        """
+        now = time.time()
+        with self._lock:
+            unsynced = list(self._pending.values()) + list(self._in_flight.values())
+            pending = len(self._pending)
+        return {
+            "mode": self.mode,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "data_dir": str(self.data_dir),
+            "events": self.events,
+            "syncs": self.syncs,
+            "files_ingested": self.files_ingested,
+            "files_removed": self.files_removed,
+            "pending_files": pending,
+            "lag_seconds": now - min(unsynced) if unsynced else 0.0,
+            "last_event_at": self.last_event_at,
+            "last_sync_at": self.last_sync_at,
+            "last_sync_seconds": self.last_sync_seconds,
+            "last_sync_lag_seconds": self.last_sync_lag,
+            "errors": self.errors[-10:]
+        }
@@ -0,0 +1,262 @@
+"""
+Ingestion-time duplicate elimination
+Drops byte-identical PDFs, and exact and near-duplicate chunks (MinHash +
+LSH) within each document, before they are embedded
+"""
+
+import re
+import zlib
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+import config
+from ingestion import chunk_source
+from ingest_manifest import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Smallest prime above 2**32: a * h + b stays below 2**64 for 32-bit a, b, h
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_WORD_RE = re.compile(r"\w+")
+
+
+def dedupe_files(pdf_paths: List[Path]) -> Tuple[List[Path], List[Tuple[Path, Path]]]:
+    """
+    Drop PDFs whose bytes are identical to an earlier PDF in the list
+
+    Args:
+        pdf_paths: Candidate PDFs, possibly from several directories
+
+    Returns:
+        Tuple of (unique PDFs in input order, (duplicate, original) pairs)
+    """
+    seen: Dict[str, Path] = {}
+    unique, duplicates = [], []
+    for pdf_path in pdf_paths:
+        sha = file_sha256(pdf_path)
+        if sha in seen:
+            duplicates.append((pdf_path, seen[sha]))
+            logger.info(f"Skipping {pdf_path}: identical to {seen[sha]}")
+        else:
+            seen[sha] = pdf_path
+            unique.append(pdf_path)
+    return unique, duplicates
+
+
+def find_identical(pdf_path: Path, candidates: List[Path]) -> Optional[Path]:
+    """
+    First candidate whose bytes are identical to pdf_path
+
+    Only candidates of the same size are hashed, so checking one new file
+    against a directory is cheap.
+    """
+    size = Path(pdf_path).stat().st_size
+    sha = None
+    for candidate in candidates:
+        if candidate.stat().st_size != size:
+            continue
+        sha = sha or file_sha256(pdf_path)
+        if file_sha256(candidate) == sha:
+            return candidate
+    return None
+
+
+def collect_pdf_files(
+    data_dir: Path,
+    extra_dirs: List[str] = config.EXTRA_DATA_DIRS,
+    dedupe: bool = config.DEDUP_ENABLED
+) -> List[Path]:
+    """
+    List PDFs in data_dir plus any extra directories next to it
+
+    Args:
+        data_dir: Main PDF directory
+        extra_dirs: Directory names resolved relative to data_dir's parent
+        dedupe: Drop byte-identical copies (first occurrence wins)
+
+    Returns:
+        Sorted PDFs of data_dir followed by those of each extra directory
+
+    Raises:
+        ValueError: Two different PDFs share a file name. Chunk metadata,
+            the manifest, checkpoints and deletes are all keyed by name, so
+            their chunks would overwrite or delete each other.
+    """
+    data_dir = Path(data_dir)
+    pdf_files = sorted(data_dir.glob("*.pdf"))
+    for extra in extra_dirs:
+        pdf_files.extend(sorted((data_dir.parent / extra).glob("*.pdf")))
+
+    if dedupe:
+        pdf_files, duplicates = dedupe_files(pdf_files)
+        if duplicates:
+            logger.info(f"Dropped {len(duplicates)} duplicate PDF files")
+
+    by_name: Dict[str, Path] = {}
+    for pdf_path in pdf_files:
+        first = by_name.setdefault(pdf_path.name, pdf_path)
+        if first is not pdf_path:
+            raise ValueError(f"{first} and {pdf_path} are different PDFs with the same name; rename one of them")
+    return pdf_files
+
+
+def _optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Pick LSH bands/rows minimizing false positives plus false negatives
+
+    A pair with Jaccard s becomes a candidate with probability
+    1 - (1 - s**r)**b; integrate its error on both sides of the threshold.
+    """
+    def area(f, lo, hi, steps=200):
+        width = (hi - lo) / steps
+        return sum(f(lo + (i + 0.5) * width) for i in range(steps)) * width
+
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        if rows == 0:
+            continue
+        false_pos = area(lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold)
+        false_neg = area(lambda s: (1 - s ** rows) ** bands, threshold, 1.0)
+        if false_pos + false_neg < best_error:
+            best, best_error = (bands, rows), false_pos + false_neg
+    return best
+
+
+class ChunkDeduplicator:
+    """
+    Streaming filter for exact and near-duplicate chunks
+
+    filter() only compares chunks of the same document: chunks are stored
+    and deleted per source file, so dropping a chunk because another file
+    holds it would lose that text when the other file is removed or
+    re-indexed. Exact duplicates are detected by the SHA-256 of the whitespace- and
+    case-normalized text. Near duplicates are detected with MinHash
+    signatures over word shingles and banded LSH; a candidate is dropped
+    only if its estimated Jaccard similarity reaches the threshold.
+    """
+
+    def __init__(
+        self,
+        near_threshold: Optional[float] = config.DEDUP_NEAR_THRESHOLD,
+        num_perm: int = config.DEDUP_NUM_PERM,
+        shingle_size: int = 5,
+        seed: int = 1
+    ):
+        """
+        Initialize deduplicator
+
+        Args:
+            near_threshold: Jaccard similarity at or above which a chunk is a
+                near duplicate (None disables near-duplicate detection)
+            num_perm: MinHash permutations per signature
+            shingle_size: Words per shingle
+            seed: Seed for the (fixed) hash permutations
+        """
+        self.near_threshold = near_threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+
+        if near_threshold is not None:
+            self.bands, self.rows = _optimal_bands(near_threshold, num_perm)
+        else:
+            self.bands, self.rows = 0, 0
+
+        self.reset()
+
+        self.kept = 0
+        self.exact_dropped = 0
+        self.near_dropped = 0
+
+    def reset(self):
+        """Forget the chunks seen so far (counters are kept)"""
+        self._exact: set = set()
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+
+    def _signature(self, text: str) -> np.ndarray:
+        words = _WORD_RE.findall(text.lower())
+        k = self.shingle_size
+        if len(words) <= k:
+            shingles = {" ".join(words)}
+        else:
+            shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        # (num_perm, num_shingles) universal hashes, min over shingles
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return (permuted.min(axis=1) & _MAX_HASH).astype(np.uint32)
+
+    def _is_near_duplicate(self, signature: np.ndarray) -> bool:
+        band_keys = [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+        candidates = set()
+        for band, key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(key, ()))
+        for candidate in candidates:
+            similarity = np.count_nonzero(self._signatures[candidate] == signature) / self.num_perm
+            if similarity >= self.near_threshold:
+                return True
+
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for band, key in enumerate(band_keys):
+            self._buckets[band].setdefault(key, []).append(index)
+        return False
+
+    def is_duplicate(self, text: str) -> bool:
+        """Check a chunk against everything seen so far, remembering it if new"""
+        normalized = " ".join(text.lower().split())
+        digest = hashlib.sha256(normalized.encode("utf-8")).digest()
+        if digest in self._exact:
+            self.exact_dropped += 1
+            return True
+        self._exact.add(digest)
+
+        if self.near_threshold is not None and self._is_near_duplicate(self._signature(normalized)):
+            self.near_dropped += 1
+            return True
+
+        self.kept += 1
+        return False
+
+    def filter(self, chunks: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield only chunk records (dicts with text and metadata) that don't duplicate an earlier chunk of their document"""
+        source = None
+        for chunk in chunks:
+            # Records arrive file by file, so a new source starts a new document
+            if chunk_source(chunk["metadata"]) != source:
+                source = chunk_source(chunk["metadata"])
+                self.reset()
+            if not self.is_duplicate(chunk["text"]):
+                yield chunk
+        logger.info(
+            f"Deduplication kept {self.kept} chunks, dropped {self.exact_dropped} exact "
+            f"and {self.near_dropped} near duplicates"
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "kept": self.kept,
+            "exact_dropped": self.exact_dropped,
+            "near_dropped": self.near_dropped,
+            "near_threshold": self.near_threshold,
+            "bands": self.bands,
+            "rows": self.rows
+        }
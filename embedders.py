@@ -0,0 +1,299 @@
+"""
+Pluggable embedding backends for the RAG pipelines
+"torch" is sentence-transformers as-is; "onnx" runs the same model with ONNX
+Runtime from a locally exported and cached copy
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import List, Dict, Optional, Union
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+import config
+from embedding_cache import model_dir_name
+
+logger = logging.getLogger(__name__)
+
+ONNX_AVAILABLE = False
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    logger.info("ONNX Runtime not available. Install with: pip install onnxruntime")
+
+# Exported ONNX vectors must match PyTorch's this closely (max abs difference)
+ONNX_EXPORT_TOLERANCE = 1e-4
+_EXPORT_CHECK_SENTENCES = [
+    "What are my rights if I'm arrested by the police?",
+    "Every worker is entitled to the minimum wages fixed by the appropriate Government.",
+    "Consumer complaint",
+]
+
+
+class Embedder:
+    """
+    Interface the pipelines use for embedding models
+
+    SentenceTransformer already implements it, so the "torch" backend is a
+    plain SentenceTransformer. Other backends subclass this.
+
+    Attributes:
+        tokenizer: Hugging Face fast tokenizer of the model
+        max_seq_length: Tokens the model reads per text (longer input is truncated)
+    """
+
+    tokenizer = None
+    max_seq_length: int
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: Optional[bool] = None,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Embed one text (returns shape (dim,)) or a list (returns (n, dim))
+        """
+        raise NotImplementedError
+
+    def get_sentence_embedding_dimension(self) -> int:
+        raise NotImplementedError
+
+
+def export_onnx(model_name: str, out_dir: Path) -> Dict:
+    """
+    Export a sentence-transformers model's transformer to ONNX
+
+    Pooling and normalization are not part of the graph; they are read from
+    the model's modules and recorded in meta.json for OnnxEmbedder.
+
+    Args:
+        model_name: sentence-transformers model id
+        out_dir: Directory for model.onnx, the tokenizer files and meta.json
+
+    Returns:
+        The metadata written to meta.json
+    """
+    import torch
+    from sentence_transformers import models
+
+    logger.info(f"Exporting {model_name} to ONNX in {out_dir}")
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    if not isinstance(transformer, models.Transformer):
+        raise ValueError(f"Can't export {model_name}: first module is {type(transformer).__name__}")
+
+    pooling = next((module for module in model if isinstance(module, models.Pooling)), None)
+    pooling_mode = pooling.get_pooling_mode_str() if pooling is not None else "mean"
+    if pooling_mode not in ("mean", "cls"):
+        raise ValueError(f"Can't export {model_name}: unsupported pooling mode {pooling_mode}")
+
+    tokenizer = transformer.tokenizer
+    dummy = tokenizer(["export example", "a longer export example sentence"], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs)))[0]
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    onnx_path = out_dir / "model.onnx"
+    tmp_path = out_dir / "model.onnx.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(transformer.auto_model.eval()),
+            tuple(dummy[name] for name in input_names),
+            str(tmp_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "last_hidden_state": {0: "batch", 1: "sequence"}
+            },
+            opset_version=14
+        )
+    tokenizer.save_pretrained(str(out_dir))
+
+    meta = {
+        "model": model_name,
+        "pooling": pooling_mode,
+        "normalize": any(isinstance(module, models.Normalize) for module in model),
+        "max_seq_length": model.max_seq_length,
+        "dim": model.get_sentence_embedding_dimension(),
+        "torch": torch.__version__
+    }
+
+    # Check the exported graph before it replaces anything
+    session = ort.InferenceSession(str(tmp_path), providers=["CPUExecutionProvider"])
+    expected = model.encode(_EXPORT_CHECK_SENTENCES, convert_to_numpy=True)
+    actual = OnnxEmbedder._run(session, tokenizer, meta, _EXPORT_CHECK_SENTENCES)
+    difference = float(np.abs(expected - actual).max())
+    if difference > ONNX_EXPORT_TOLERANCE:
+        tmp_path.unlink()
+        raise RuntimeError(f"ONNX export of {model_name} differs from PyTorch by {difference:.2e}")
+    logger.info(f"ONNX export matches PyTorch (max abs difference {difference:.2e})")
+
+    os.replace(tmp_path, onnx_path)
+    with open(out_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class OnnxEmbedder(Embedder):
+    """
+    Sentence embeddings computed with ONNX Runtime on CPU
+
+    The model is exported once to cache_dir/onnx/<model>/ and loaded from
+    there afterwards without touching PyTorch.
+    """
+
+    def __init__(self, model_name: str, cache_dir: Path, threads: int = config.ONNX_THREADS):
+        """
+        Load (exporting first if needed) the ONNX copy of a model
+
+        Args:
+            model_name: sentence-transformers model id
+            cache_dir: Root cache directory
+            threads: Intra-op threads for ONNX Runtime (0 = library default)
+        """
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.dir = Path(cache_dir) / "onnx" / model_dir_name(model_name)
+        if not (self.dir / "meta.json").exists():
+            export_onnx(model_name, self.dir)
+
+        with open(self.dir / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.dir))
+        self.max_seq_length = self.meta["max_seq_length"]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(self.dir / "model.onnx"),
+            options,
+            providers=["CPUExecutionProvider"]
+        )
+        logger.info(f"Loaded ONNX embedding model from {self.dir}")
+
+    @staticmethod
+    def _run(session, tokenizer, meta: Dict, texts: List[str]) -> np.ndarray:
+        """Tokenize, run the graph and pool one batch"""
+        encoded = tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=meta["max_seq_length"],
+            return_tensors="np"
+        )
+        input_names = {model_input.name for model_input in session.get_inputs()}
+        feed = {name: encoded[name].astype(np.int64) for name in input_names}
+        hidden = session.run(None, feed)[0]
+
+        if meta["pooling"] == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = encoded["attention_mask"][..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if meta["normalize"]:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: Optional[bool] = None,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # Longest first, like SentenceTransformer.encode, to limit padding
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        result = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            indices = order[start:start + batch_size]
+            result[indices] = self._run(self.session, self.tokenizer, self.meta, [texts[i] for i in indices])
+
+        if normalize_embeddings:
+            result /= np.clip(np.linalg.norm(result, axis=1, keepdims=True), 1e-12, None)
+        return result[0] if single else result
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.meta["dim"]
+
+
+def quantize_int8(model: SentenceTransformer) -> SentenceTransformer:
+    """
+    Dynamically quantize a model's Linear layers to int8, in place
+
+    Weights are stored as int8 and activations are quantized on the fly,
+    which shrinks the transformer's weights about 4x and speeds up CPU
+    matmuls. Vectors drift slightly; check retrieval with
+    benchmarks/validate_quantization.py before enabling it.
+    """
+    import torch
+
+    model.to("cpu")
+    torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def embedding_cache_key(model_name: str, quantize: bool = config.EMBEDDING_QUANTIZE) -> str:
+    """Name under which a model's embeddings are cached (int8 vectors differ from fp32)"""
+    return f"{model_name}@int8" if quantize else model_name
+
+
+def create_embedder(
+    model_name: str,
+    cache_dir: Path,
+    backend: str = config.EMBEDDING_BACKEND,
+    quantize: bool = config.EMBEDDING_QUANTIZE
+):
+    """
+    Build the embedding model for the configured backend
+
+    Args:
+        model_name: sentence-transformers model id
+        cache_dir: Root cache directory (exported models live under onnx/)
+        backend: "torch" or "onnx"; falls back to "torch" if ONNX Runtime
+            is not installed
+        quantize: int8 dynamic quantization of the torch model's Linear layers
+
+    Returns:
+        SentenceTransformer or Embedder
+    """
+    if backend == "onnx":
+        if quantize:
+            raise ValueError("EMBEDDING_QUANTIZE applies to the torch backend only")
+        if ONNX_AVAILABLE:
+            return OnnxEmbedder(model_name, cache_dir)
+        logger.warning("EMBEDDING_BACKEND is 'onnx' but onnxruntime is not installed; using PyTorch")
+    elif backend != "torch":
+        raise ValueError(f"Unknown embedding backend: {backend}")
+
+    model = SentenceTransformer(model_name)
+    if quantize:
+        logger.info(f"Quantizing {model_name} Linear layers to int8")
+        model = quantize_int8(model)
+    return model
@@ -0,0 +1,145 @@
+"""
+Length-bucketed batch embedding for ingestion
+Sorts texts by token length and packs batches under a padded-token budget so
+short page-tail chunks are not padded up to the longest chunk in the batch
+"""
+
+import logging
+from typing import List, Dict, Optional
+
+import numpy as np
+from tqdm import tqdm
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class BucketedEmbedder:
+    """
+    Wraps a SentenceTransformer-style model with token-budgeted batching
+
+    encode() returns embeddings in input order, so it can be used anywhere
+    model.encode is (including as the model passed to EmbeddingCache).
+    """
+
+    def __init__(
+        self,
+        model,
+        batch_size: int = config.BATCH_SIZE,
+        max_batch_tokens: Optional[int] = config.EMBED_MAX_BATCH_TOKENS,
+        show_progress_bar: bool = config.SHOW_PROGRESS_BAR
+    ):
+        """
+        Initialize embedder
+
+        Args:
+            model: Model with encode(); .tokenizer/.max_seq_length are used
+                for token counts when present (character counts otherwise)
+            batch_size: Texts per model call when they fill the model window
+            max_batch_tokens: Padded tokens (texts x longest text) per call;
+                None = batch_size x max_seq_length, so batches of short
+                texts hold proportionally more of them
+            show_progress_bar: Show a progress bar over each encode() call
+        """
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.show_progress_bar = show_progress_bar
+        self.tokenizer = getattr(model, "tokenizer", None)
+        self.max_seq_length = getattr(model, "max_seq_length", None)
+        if max_batch_tokens is None:
+            max_batch_tokens = self.batch_size * (self.max_seq_length or 512)
+        self.max_batch_tokens = max_batch_tokens
+
+        self.calls = 0
+        self.texts = 0
+        self.real_tokens = 0
+        self.padded_tokens = 0
+
+    def token_lengths(self, texts: List[str]) -> np.ndarray:
+        """Tokens per text after the model's truncation (special tokens included)"""
+        if self.tokenizer is None:
+            return np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        encoded = self.tokenizer(
+            texts,
+            truncation=self.max_seq_length is not None,
+            max_length=self.max_seq_length,
+            return_attention_mask=False,
+            return_token_type_ids=False
+        )
+        return np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64, count=len(texts))
+
+    def plan_batches(self, lengths: np.ndarray) -> List[np.ndarray]:
+        """
+        Group text indices into batches, longest texts first
+
+        Args:
+            lengths: Token length of every text
+
+        Returns:
+            List of index arrays, one per model call
+        """
+        # Stable sort keeps equal-length texts in input order
+        order = np.argsort(-lengths, kind="stable")
+        batches = []
+        start = 0
+        while start < len(order):
+            # Sorted descending, so the first text sets the batch's padded length
+            longest = max(1, int(lengths[order[start]]))
+            size = min(max(1, self.max_batch_tokens // longest), len(order) - start)
+            batches.append(order[start:start + size])
+            start += size
+        return batches
+
+    def encode(self, texts: List[str], **encode_kwargs) -> np.ndarray:
+        """
+        Embed texts in length-sorted, token-budgeted batches
+
+        Args:
+            texts: Texts to embed
+            **encode_kwargs: Passed to model.encode (batching and progress
+                options are set by this class)
+
+        Returns:
+            float32 array of shape (len(texts), dim), in input order
+        """
+        for key in ("batch_size", "show_progress_bar", "convert_to_numpy"):
+            encode_kwargs.pop(key, None)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        lengths = self.token_lengths(texts)
+        batches = self.plan_batches(lengths)
+
+        result = None
+        with tqdm(total=len(texts), desc="Embedding", disable=not self.show_progress_bar, leave=False) as progress:
+            for indices in batches:
+                vectors = np.asarray(self.model.encode(
+                    [texts[i] for i in indices],
+                    batch_size=len(indices),
+                    show_progress_bar=False,
+                    convert_to_numpy=True,
+                    **encode_kwargs
+                ), dtype=np.float32)
+                if result is None:
+                    result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+                # Scatter back to the caller's order
+                result[indices] = vectors
+
+                self.calls += 1
+                self.padded_tokens += int(lengths[indices[0]]) * len(indices)
+                self.real_tokens += int(lengths[indices].sum())
+                progress.update(len(indices))
+
+        self.texts += len(texts)
+        return result
+
+    def stats(self) -> Dict:
+        """Batching counters since the embedder was created"""
+        return {
+            "texts": self.texts,
+            "calls": self.calls,
+            "avg_batch": self.texts / self.calls if self.calls else 0.0,
+            # Share of the tokens fed to the model that are real (not padding)
+            "padding_efficiency": self.real_tokens / self.padded_tokens if self.padded_tokens else 1.0
+        }
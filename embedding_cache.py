@@ -0,0 +1,248 @@
+"""
+Persistent on-disk cache of chunk embeddings
+Keyed by (embedding model name, SHA-256 of the chunk text) so rebuilding a
+collection with unchanged text reads vectors from disk instead of running
+the embedding model again
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import numpy as np
+
+import config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+KEY_SIZE = 32  # Bytes in a SHA-256 digest
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Exclusive lock on a file, held across processes until the block exits"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after ~10 s; keep waiting
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def text_key(text: str) -> bytes:
+    """Cache key for a chunk of text"""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def model_dir_name(model_name: str) -> str:
+    """Filesystem-safe directory name for a model id"""
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in model_name)
+    return f"{safe}_{hashlib.sha256(model_name.encode('utf-8')).hexdigest()[:8]}"
+
+
+class EmbeddingCache:
+    """
+    Append-only embedding store for one embedding model
+
+    Vectors live in a raw float16/float32 file that is memory-mapped for
+    reads; keys.bin holds the 32-byte text digest of every row in the same
+    order and is loaded into a dict on open. Several instances (pipelines,
+    API servers, CLI ingests) may share one directory: appends hold a file
+    lock and take their row numbers from the files, and rows written by
+    other instances are picked up before every lookup.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        model_name: str,
+        dtype: str = config.EMBEDDING_CACHE_DTYPE
+    ):
+        """
+        Open (or create) the cache for a model
+
+        Args:
+            cache_dir: Root cache directory
+            model_name: Embedding model id, part of the cache key
+            dtype: Storage precision, "float16" or "float32"
+        """
+        self.model_name = model_name
+        self.dir = Path(cache_dir) / "embeddings" / model_dir_name(model_name)
+        self.meta_path = self.dir / "meta.json"
+        self.keys_path = self.dir / "keys.bin"
+        self.vectors_path = self.dir / "vectors.bin"
+        self.lock_path = self.dir / "lock"
+
+        self.dtype = np.dtype(dtype)
+        self.dim: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+        self._index: Dict[bytes, int] = {}
+        self._rows = 0  # Rows of the files indexed so far
+        self._vectors: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        if self.meta_path.exists():
+            with _file_lock(self.lock_path):
+                self._load_meta()
+                self._repair()
+                self._refresh()
+            logger.info(f"Embedding cache for {self.model_name}: {len(self._index)} vectors ({self.dtype.name})")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _load_meta(self) -> bool:
+        """Read dim and dtype once meta.json exists (possibly written by another instance)"""
+        if self.dim is not None:
+            return True
+        if not self.meta_path.exists():
+            return False
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        # Never mix precisions inside one vectors file
+        self.dtype = np.dtype(meta["dtype"])
+        self.dim = meta["dim"]
+        return True
+
+    def _file_rows(self) -> int:
+        """Rows complete in both files (a writer appends vectors before keys)"""
+        keys = self.keys_path.stat().st_size // KEY_SIZE if self.keys_path.exists() else 0
+        vectors = self.vectors_path.stat().st_size // (self.dim * self.dtype.itemsize) if self.vectors_path.exists() else 0
+        return min(keys, vectors)
+
+    def _repair(self):
+        """Drop half-written tail rows (call with the file lock held)"""
+        rows = self._file_rows()
+        # A crash between the two appends leaves one file longer than the other
+        for path, size in ((self.keys_path, rows * KEY_SIZE), (self.vectors_path, rows * self.dim * self.dtype.itemsize)):
+            if path.exists() and path.stat().st_size != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _refresh(self):
+        """Index rows appended since the last refresh, by this or any other instance"""
+        if not self._load_meta():
+            return
+        known = self._rows
+        rows = self._file_rows()
+        if rows <= known:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(known * KEY_SIZE)
+            keys = f.read((rows - known) * KEY_SIZE)
+        for i in range(rows - known):
+            # setdefault: two instances racing on one text keep its first row
+            self._index.setdefault(keys[i * KEY_SIZE:(i + 1) * KEY_SIZE], known + i)
+        self._rows = rows
+        self._remap()
+
+    def _remap(self):
+        if self._rows:
+            self._vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(self._rows, self.dim))
+        else:
+            self._vectors = None
+
+    def _append(self, keys: List[bytes], vectors: np.ndarray):
+        """Append rows whose keys are not cached yet"""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with _file_lock(self.lock_path):
+            if not self._load_meta():
+                self.dim = int(vectors.shape[1])
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"model": self.model_name, "dim": self.dim, "dtype": self.dtype.name}, f)
+            self._repair()
+            # Rows other instances appended: their keys need not be written again
+            self._refresh()
+
+            new_keys = []
+            new_rows = []
+            seen = set()
+            for i, key in enumerate(keys):
+                if key not in self._index and key not in seen:
+                    seen.add(key)
+                    new_keys.append(key)
+                    new_rows.append(i)
+            if not new_keys:
+                return
+
+            # Vectors first, then keys: a crash in between only loses the tail
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(vectors[new_rows], dtype=self.dtype).tobytes())
+            with open(self.keys_path, "ab") as f:
+                f.write(b"".join(new_keys))
+            self._refresh()
+
+    def encode(self, model, texts: List[str], **encode_kwargs) -> np.ndarray:
+        """
+        Embed texts, running the model only for texts not in the cache
+
+        Args:
+            model: Model with a SentenceTransformer-style encode()
+            texts: Texts to embed
+            **encode_kwargs: Passed to model.encode for cache misses
+
+        Returns:
+            float32 array of shape (len(texts), dim), in input order
+        """
+        if not texts:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        keys = [text_key(text) for text in texts]
+
+        with self._lock:
+            self._refresh()
+            rows = [self._index.get(key) for key in keys]
+            missing = [i for i, row in enumerate(rows) if row is None]
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+            fresh = None
+            if missing:
+                encode_kwargs["convert_to_numpy"] = True
+                fresh = np.asarray(model.encode([texts[i] for i in missing], **encode_kwargs))
+                self._append([keys[i] for i in missing], fresh)
+                # Round through the storage dtype so hits and misses return identical vectors
+                fresh = fresh.astype(self.dtype).astype(np.float32)
+
+            result = np.empty((len(texts), self.dim), dtype=np.float32)
+            if fresh is not None:
+                result[missing] = fresh
+            cached = [i for i, row in enumerate(rows) if row is not None]
+            if cached:
+                result[cached] = self._vectors[[rows[i] for i in cached]]
+
+        return result
+
+    def stats(self) -> Dict:
+        """Hit/miss counters since the cache was opened"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "dtype": self.dtype.name
+        }
@@ -0,0 +1,203 @@
+"""
+Resumable ingestion checkpoints
+An append-only log of every chunk batch written to the vector store, so an
+ingestion killed partway through resumes after its last committed batch
+"""
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import config
+from ingestion import chunk_source
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_path_for(db_dir: Path, collection_name: str) -> Path:
+    """Checkpoint log stored next to the ChromaDB directory"""
+    db_dir = Path(db_dir)
+    return db_dir.parent / f"{db_dir.name}_{collection_name}_checkpoint.jsonl"
+
+
+def ingest_run_key(pdf_files: List[Path], chunking: str = "") -> str:
+    """
+    Identify an ingestion run by its input files and settings
+
+    A checkpoint is only resumed by a run with the same key: same files in
+    the same order, unchanged on disk (size and mtime), same chunking
+    settings and dedup config.
+    """
+    dedup = f"{config.DEDUP_ENABLED}:{config.DEDUP_NEAR_THRESHOLD}:{config.DEDUP_NUM_PERM}"
+    digest = hashlib.sha256(f"{chunking}\x00{dedup}".encode("utf-8"))
+    for pdf_path in pdf_files:
+        stat = Path(pdf_path).stat()
+        digest.update(f"\x00{Path(pdf_path).name}\x00{stat.st_size}\x00{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class IngestCheckpoint:
+    """
+    Committed-batch log of one ingestion run
+
+    The first line records the run key; every later line is one committed
+    batch with its cursor (file, page and chunk index of its last chunk)
+    and the IDs it wrote. Lines are flushed and fsynced as they are written,
+    and a torn last line (the process died mid-write) is ignored on load.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize checkpoint
+
+        Args:
+            path: JSONL file holding the log
+        """
+        self.path = Path(path)
+        self.run_key: Optional[str] = None
+        self.committed: Dict[str, Set[str]] = {}  # Source -> chunk IDs already stored
+        self.cursor: Optional[Dict] = None
+        self.batches = 0
+        self.resumed: Dict[str, Set[str]] = {}  # Source -> chunk IDs stored before this run resumed
+        self._committed_ids: Set[str] = set()
+        self._file = None
+
+    def _load(self) -> Optional[str]:
+        """Read the log; returns its run key (None if missing or unreadable)"""
+        if not self.path.exists():
+            return None
+        run_key = None
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring torn checkpoint line in {self.path}")
+                    break
+                if run_key is None:
+                    if record.get("version") != CHECKPOINT_VERSION:
+                        return None
+                    run_key = record["run"]
+                    continue
+                for source, ids in record["ids"].items():
+                    self.committed.setdefault(source, set()).update(ids)
+                    self._committed_ids.update(ids)
+                self.cursor = record["cursor"]
+                self.batches += 1
+        return run_key
+
+    def begin(self, run_key: str) -> bool:
+        """
+        Start (or resume) a run
+
+        Args:
+            run_key: ingest_run_key() of the files about to be ingested
+
+        Returns:
+            True if a checkpoint of the same run was found and will be resumed
+        """
+        self.close()
+        self.committed, self._committed_ids = {}, set()
+        self.cursor, self.batches = None, 0
+
+        resumed = self._load() == run_key and self.batches > 0
+        if resumed:
+            logger.info(
+                f"Resuming ingestion from checkpoint: {len(self._committed_ids)} chunks in "
+                f"{self.batches} batches already stored (last: {self.cursor['source']} "
+                f"page {self.cursor['page']})"
+            )
+            # Rewrite the valid part, dropping a torn trailing line before appending
+            self._rewrite(run_key)
+            self.resumed = {source: set(ids) for source, ids in self.committed.items()}
+        else:
+            self.resumed = {}
+            self.committed, self._committed_ids = {}, set()
+            self.cursor, self.batches = None, 0
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._append({"version": CHECKPOINT_VERSION, "run": run_key})
+        self.run_key = run_key
+        return resumed
+
+    def _rewrite(self, run_key: str):
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": CHECKPOINT_VERSION, "run": run_key}) + "\n")
+            for source, ids in self.committed.items():
+                f.write(json.dumps({"cursor": self.cursor, "ids": {source: sorted(ids)}}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _append(self, record: Dict):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def commit(self, batch: List[Dict]):
+        """Record a batch as stored (call after the vector-store write returns)"""
+        if not batch:
+            return
+        ids: Dict[str, List[str]] = {}
+        for chunk in batch:
+            ids.setdefault(chunk_source(chunk["metadata"]), []).append(chunk["id"])
+        last = batch[-1]["metadata"]
+        self.cursor = {
+            "source": chunk_source(last),
+            "page": last.get("page"),
+            "chunk_index": last.get("chunk_index")
+        }
+        self._append({"cursor": self.cursor, "ids": ids})
+        for source, source_ids in ids.items():
+            self.committed.setdefault(source, set()).update(source_ids)
+            self._committed_ids.update(source_ids)
+        self.batches += 1
+
+    def pending_files(self, pdf_files: List[Path]) -> List[Path]:
+        """
+        Files not yet fully stored
+
+        Files are ingested in order, so every file with committed chunks
+        other than the cursor's is complete. The cursor's file is returned
+        whole; filter() drops its chunks that were already stored.
+        """
+        if self.cursor is None:
+            return list(pdf_files)
+        done = set(self.committed) - {self.cursor["source"]}
+        return [pdf_path for pdf_path in pdf_files if pdf_path.name not in done]
+
+    def filter(self, chunks: Iterable[Dict]) -> Iterator[Dict]:
+        """Drop chunks already stored by the interrupted run"""
+        for chunk in chunks:
+            if chunk["id"] in self._committed_ids:
+                continue
+            yield chunk
+
+    def merge_stats(self, stats: Dict) -> Dict:
+        """Count chunks stored before the restart as part of this run's output"""
+        resumed = 0
+        for source, ids in self.resumed.items():
+            stats["ids_by_source"].setdefault(source, set()).update(ids)
+            stats["per_source"][source] = stats["per_source"].get(source, 0) + len(ids)
+            resumed += len(ids)
+        stats["produced"] += resumed
+        stats["resumed_chunks"] = resumed
+        return stats
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def complete(self):
+        """The run finished: nothing left to resume"""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
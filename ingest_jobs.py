@@ -0,0 +1,230 @@
+"""
+Background ingestion jobs for the API backends
+Runs a pipeline's ingest_pdfs() off the request thread and reports live
+progress (pages, chunks, ETA, errors) from the extractor and ingestion counters
+"""
+
+import time
+import uuid
+import queue
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class IngestJob:
+    """One ingest run: status is queued, running, succeeded or failed"""
+
+    def __init__(self, description: str = "Ingest data directory"):
+        self.id = uuid.uuid4().hex[:12]
+        self.description = description
+        self.status = "queued"
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.result = None
+        self.error: Optional[str] = None
+        self.progress: Optional[Dict] = None  # Final counters, kept once the job is done
+        self._start_time: Optional[float] = None
+        self._elapsed = 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def elapsed(self) -> float:
+        if self._start_time is not None and not self.done:
+            return time.perf_counter() - self._start_time
+        return self._elapsed
+
+
+class IngestJobManager:
+    """
+    Runs ingest jobs for one pipeline on a single daemon worker thread
+
+    Jobs (ingests, uploads, deletes) are queued and run one at a time in
+    the order they were started, so they never write to the collection
+    concurrently. The pipeline must expose ingest_pdfs(); progress is read
+    from pipeline.extractor.progress and pipeline.ingestion.stats() when
+    present.
+    """
+
+    def __init__(self, pipeline, keep: int = config.INGEST_JOBS_KEPT):
+        """
+        Initialize job manager
+
+        Args:
+            pipeline: RAG pipeline whose data directory is ingested
+            keep: Finished jobs remembered for status queries (oldest dropped first)
+        """
+        self.pipeline = pipeline
+        self.keep = keep
+        self.jobs: Dict[str, IngestJob] = {}
+        self.current: Optional[IngestJob] = None  # The running job (or the last one run)
+        self._pending_full: Optional[IngestJob] = None
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def ingesting(self) -> bool:
+        """Whether any job is queued or running"""
+        return any(not job.done for job in list(self.jobs.values()))
+
+    @property
+    def active(self) -> Optional[IngestJob]:
+        """The running job, else the oldest queued one"""
+        current = self.current
+        if current is not None and not current.done:
+            return current
+        return next((job for job in list(self.jobs.values()) if not job.done), None)
+
+    def start(self, target: Optional[Callable] = None, description: str = "Ingest data directory") -> IngestJob:
+        """
+        Queue a background ingest job
+
+        Jobs run one at a time in the order they were started. A data
+        directory ingest (no target) that is already queued or running is
+        returned instead of starting another.
+
+        Args:
+            target: Callable doing the work (default: pipeline.ingest_pdfs)
+            description: Shown in the job's status
+
+        Returns:
+            The started (or already pending) job
+        """
+        with self._lock:
+            if target is None:
+                if self._pending_full is not None and not self._pending_full.done:
+                    return self._pending_full
+                job = IngestJob(description)
+                self._pending_full = job
+            else:
+                job = IngestJob(description)
+            self.jobs[job.id] = job
+            self._queue.put((job, target or self.pipeline.ingest_pdfs))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, name="ingest-jobs", daemon=True)
+                self._worker.start()
+        return job
+
+    def _work(self):
+        while True:
+            job, target = self._queue.get()
+            self.current = job
+            try:
+                self._execute(job, target)
+            finally:
+                self._forget_finished()
+                self._queue.task_done()
+
+    def _forget_finished(self):
+        # Dicts keep insertion order, so the oldest finished jobs go first
+        with self._lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.done and job is not self.current]
+            for job_id in finished[:max(0, len(finished) - self.keep)]:
+                del self.jobs[job_id]
+
+    def _execute(self, job: IngestJob, target: Callable):
+        # Drop the previous run's counters so progress starts from zero
+        self.pipeline.ingestion = None
+        extractor = getattr(self.pipeline, "extractor", None)
+        if extractor is not None:
+            extractor.progress = {}
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+        job._start_time = time.perf_counter()
+        logger.info(f"Ingest job {job.id} started: {job.description}")
+        try:
+            job.result = target()
+            job.status = "succeeded"
+        except Exception as e:
+            logger.exception(f"Ingest job {job.id} failed")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job._elapsed = time.perf_counter() - job._start_time
+            # Later jobs reset the pipeline's counters, so keep this job's own copy
+            job.progress = self._progress()
+            job.finished_at = datetime.now().isoformat()
+        logger.info(f"Ingest job {job.id} {job.status} in {job._elapsed:.1f}s")
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self.jobs.get(job_id)
+
+    def _progress(self) -> Dict:
+        """Counters of the latest run, read from the pipeline's extractor and ingestion"""
+        progress = dict(getattr(getattr(self.pipeline, "extractor", None), "progress", None) or {})
+        counters = {
+            "pages_done": progress.get("pages_done", 0),
+            "pages_total": progress.get("pages_total", 0),
+            "files_done": progress.get("files_done", 0),
+            "files": progress.get("files", 0),
+            "chunks_produced": 0,
+            "chunks_embedded": 0,
+            "chunks_stored": 0,
+            "errors": list(progress.get("errors", []))
+        }
+        ingestion = getattr(self.pipeline, "ingestion", None)
+        if ingestion is not None:
+            stats = ingestion.stats()
+            counters["chunks_produced"] = stats["produced"]
+            counters["chunks_embedded"] = stats["stages"]["embed"]["chunks"]
+            counters["chunks_stored"] = stats["chunks"]
+        return counters
+
+    def status(self, job: IngestJob) -> Dict:
+        """
+        Live status of a job
+
+        Returns:
+            Dict with status, timestamps, pages processed, chunks embedded,
+            ETA in seconds (None until it can be estimated) and errors
+        """
+        if job.progress is not None:
+            progress = job.progress
+        elif job is self.current and job.status != "queued":
+            # Counters belong to the latest run, so only report them live for the current job
+            progress = self._progress()
+        else:
+            progress = {}
+        pages_done = progress.get("pages_done", 0)
+        pages_total = progress.get("pages_total", 0)
+        errors = list(progress.get("errors", []))
+
+        elapsed = job.elapsed()
+        eta = None
+        if job.done:
+            eta = 0.0
+        elif pages_done and pages_total >= pages_done:
+            # Extraction paces the pipeline, so pages are the unit of progress
+            eta = elapsed / pages_done * (pages_total - pages_done)
+
+        if job.error:
+            errors.append(job.error)
+
+        return {
+            "job_id": job.id,
+            "description": job.description,
+            "status": job.status,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "elapsed_seconds": elapsed,
+            "eta_seconds": eta,
+            "files_processed": progress.get("files_done", 0),
+            "files_total": progress.get("files", 0),
+            "pages_processed": pages_done,
+            "pages_total": pages_total,
+            "chunks_produced": progress.get("chunks_produced", 0),
+            "chunks_embedded": progress.get("chunks_embedded", 0),
+            "chunks_stored": progress.get("chunks_stored", 0),
+            "result": job.result if isinstance(job.result, int) else None,
+            "errors": errors
+        }
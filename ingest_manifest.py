@@ -0,0 +1,124 @@
+"""
+Ingestion manifest for incremental re-ingestion
+Tracks the SHA-256 of every ingested PDF so only new, changed or removed
+files touch the vector store
+"""
+
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """Hash a file's bytes without loading it into memory at once"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_path_for(db_dir: Path, collection_name: str) -> Path:
+    """Manifest file stored next to the ChromaDB directory"""
+    db_dir = Path(db_dir)
+    return db_dir.parent / f"{db_dir.name}_{collection_name}_manifest.json"
+
+
+class IngestManifest:
+    """
+    Per-file record of what is currently in a collection
+
+    Each entry maps a PDF name to the SHA-256 of its bytes, the number of
+    chunks stored for it and the chunking settings that produced them.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Load manifest from disk (an empty manifest if it doesn't exist)
+
+        Args:
+            path: JSON file holding the manifest
+        """
+        self.path = Path(path)
+        self.files: Dict[str, Dict] = {}
+
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.files = data.get("files", {})
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+                self.files = {}
+
+    def save(self):
+        """Atomically write the manifest to disk"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Forget every file"""
+        self.files = {}
+
+    def record(self, name: str, sha256: str, num_chunks: int, chunking: str = ""):
+        """Record that a file with the given hash is fully ingested"""
+        self.files[name] = {
+            "sha256": sha256,
+            "chunks": num_chunks,
+            "chunking": chunking,
+            "ingested_at": datetime.now().isoformat()
+        }
+
+    def forget(self, name: str):
+        """Drop a file from the manifest"""
+        self.files.pop(name, None)
+
+    def diff(self, pdf_files: List[Path], chunking: str = "") -> Dict:
+        """
+        Compare PDFs on disk against the manifest
+
+        Args:
+            pdf_files: PDFs currently in the data directory
+            chunking: Current chunking settings; files chunked differently
+                count as changed
+
+        Returns:
+            Dict with new/changed/unchanged paths, removed names and the
+            SHA-256 of every file on disk
+        """
+        hashes = {}
+        new, changed, unchanged = [], [], []
+
+        for pdf_path in pdf_files:
+            sha = file_sha256(pdf_path)
+            hashes[pdf_path.name] = sha
+            entry = self.files.get(pdf_path.name)
+
+            if entry is None:
+                new.append(pdf_path)
+            elif entry["sha256"] != sha or entry.get("chunking", "") != chunking:
+                changed.append(pdf_path)
+            else:
+                unchanged.append(pdf_path)
+
+        on_disk = {pdf_path.name for pdf_path in pdf_files}
+        removed = [name for name in self.files if name not in on_disk]
+
+        return {
+            "new": new,
+            "changed": changed,
+            "removed": removed,
+            "unchanged": unchanged,
+            "hashes": hashes
+        }
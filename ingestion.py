@@ -0,0 +1,498 @@
+"""
+Streaming ingestion helpers shared by the RAG pipelines
+Pages are chunked, embedded and written to the vector store one fixed-size
+batch at a time, so peak memory depends on the batch size, not the corpus
+"""
+
+import time
+import queue
+import hashlib
+import logging
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Set
+
+import config
+from embedding import BucketedEmbedder
+from chroma_loader import ChromaBulkLoader
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+def chunk_id(source: str, page: int, offset: int, text: str) -> str:
+    """
+    Deterministic, content-addressed chunk ID
+
+    Derived from the source file, page, the chunk's offset within the page
+    and the hash of its text, so re-ingesting unchanged text always yields
+    the same ID and any change to the text yields a new one.
+    """
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    digest = hashlib.sha256(f"{source}\x00{page}\x00{offset}\x00{text_hash}".encode("utf-8")).hexdigest()
+    return f"{Path(source).stem}_p{page}_{digest[:16]}"
+
+
+def chunk_source(metadata: Dict) -> str:
+    """Source file of a chunk (the sustainability pipeline calls it 'document')"""
+    return metadata.get("source", metadata.get("document", "Unknown"))
+
+
+def prune_stale_chunks(collection, ids_by_source: Dict[str, Set[str]], source_key: str = "source") -> int:
+    """
+    Delete chunks of the given sources whose IDs were not produced this run
+
+    With content-addressed IDs, a chunk whose text changed gets a new ID, so
+    the old one has to be removed explicitly after upserting the new ones.
+
+    Args:
+        collection: ChromaDB collection
+        ids_by_source: Every chunk ID produced per source file
+        source_key: Metadata key holding the source file name
+
+    Returns:
+        Number of chunks deleted
+    """
+    loader = ChromaBulkLoader(collection)
+    deleted = 0
+    for source, live_ids in ids_by_source.items():
+        stored = collection.get(where={source_key: source}, include=[])
+        stale = [chunk_id for chunk_id in stored["ids"] if chunk_id not in live_ids]
+        if stale:
+            deleted += loader.delete(stale)
+    if deleted:
+        logger.info(f"Deleted {deleted} stale chunks")
+    return deleted
+
+
+def delete_source_chunks(collection, source: str, source_key: str = "source") -> int:
+    """
+    Delete every chunk of one source file from the collection
+
+    Args:
+        collection: ChromaDB collection
+        source: Source file name as stored in the chunk metadata
+        source_key: Metadata key holding the source file name
+
+    Returns:
+        Number of chunks deleted
+    """
+    stored = collection.get(where={source_key: source}, include=[])
+    if stored["ids"]:
+        ChromaBulkLoader(collection).delete(stored["ids"])
+        logger.info(f"Deleted {len(stored['ids'])} chunks of {source}")
+    return len(stored["ids"])
+
+
+def batched(items: Iterable, batch_size: int) -> Iterator[List]:
+    """Yield lists of up to batch_size items from any iterable"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class StageCounter:
+    """Throughput counters for one ingestion stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.batches = 0
+        self.chunks = 0
+        self.busy_seconds = 0.0  # Time spent doing the stage's own work
+        self.wait_seconds = 0.0  # Time blocked on an empty input or full output queue
+
+    def as_dict(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "chunks": self.chunks,
+            "busy_seconds": self.busy_seconds,
+            "wait_seconds": self.wait_seconds,
+            "chunks_per_sec": self.chunks / self.busy_seconds if self.busy_seconds > 0 else 0.0
+        }
+
+
+class MonitoredQueue(queue.Queue):
+    """Bounded queue that records its depth every time an item is added"""
+
+    def __init__(self, name: str, maxsize: int):
+        super().__init__(maxsize=maxsize)
+        self.name = name
+        self.max_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+
+    def _put(self, item):
+        # Called by Queue.put with the queue's mutex held
+        super()._put(item)
+        depth = len(self.queue)
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    def as_dict(self) -> Dict:
+        return {
+            "capacity": self.maxsize,
+            "depth": self.qsize(),
+            "max_depth": self.max_depth,
+            "avg_depth": self._depth_total / self._depth_samples if self._depth_samples else 0.0
+        }
+
+
+class IngestionPipeline:
+    """
+    Embed and store a stream of chunk records batch by batch
+
+    In pipelined mode extraction/chunking, embedding and vector-store writes
+    run on separate threads connected by bounded queues, so PDF parsing,
+    the embedding model and ChromaDB's SQLite writes overlap. Live counters
+    are available from stats() while run() is in progress.
+    """
+
+    def __init__(
+        self,
+        embedding_model,
+        collection,
+        batch_size: int = config.INGEST_BATCH_SIZE,
+        upsert: bool = False,
+        pipelined: bool = config.INGEST_PIPELINED,
+        queue_depth: int = config.INGEST_QUEUE_DEPTH,
+        embedding_cache=None,
+        skip_existing: bool = False,
+        checkpoint=None,
+        lexical_index=None
+    ):
+        """
+        Initialize ingestion pipeline
+
+        Args:
+            embedding_model: Model with a SentenceTransformer-style encode()
+            collection: ChromaDB collection to write to
+            batch_size: Chunks embedded and written per batch
+            upsert: Use collection.upsert instead of collection.add
+            pipelined: Run the three stages concurrently
+            queue_depth: Batches buffered between two stages
+            embedding_cache: Optional EmbeddingCache consulted before encoding
+            skip_existing: Don't re-embed chunks whose ID is already stored
+                (only safe with content-addressed IDs)
+            checkpoint: Optional IngestCheckpoint told about every stored batch
+            lexical_index: Optional BM25Index given the text of every stored chunk
+        """
+        self.embedding_model = embedding_model
+        self.embedder = BucketedEmbedder(embedding_model) if config.EMBED_LENGTH_BUCKETING else None
+        self.collection = collection
+        # Splits writes to ChromaDB's max batch size
+        self.loader = ChromaBulkLoader(collection, upsert=upsert)
+        self.batch_size = batch_size
+        self.upsert = upsert
+        self.pipelined = pipelined
+        self.queue_depth = max(1, queue_depth)
+        self.embedding_cache = embedding_cache
+        self.skip_existing = skip_existing
+        self.checkpoint = checkpoint
+        self.lexical_index = lexical_index
+
+        self.stages = {name: StageCounter(name) for name in ("extract", "embed", "store")}
+        self.queues: Dict[str, MonitoredQueue] = {}
+        self.per_source: Dict[str, int] = {}
+        self.ids_by_source: Dict[str, Set[str]] = {}
+        self.skipped = 0
+        self._start_time: Optional[float] = None
+        self._elapsed = 0.0
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+
+    # Stage work, shared by the sequential and pipelined modes
+
+    def _next_batch(self, batches: Iterator[List[Dict]]):
+        counter = self.stages["extract"]
+        start = time.perf_counter()
+        batch = next(batches, _DONE)
+        counter.busy_seconds += time.perf_counter() - start
+        if batch is not _DONE:
+            counter.batches += 1
+            counter.chunks += len(batch)
+            for chunk in batch:
+                source = chunk_source(chunk["metadata"])
+                self.per_source[source] = self.per_source.get(source, 0) + 1
+                self.ids_by_source.setdefault(source, set()).add(chunk["id"])
+        return batch
+
+    def _embed(self, batch: List[Dict]):
+        counter = self.stages["embed"]
+        start = time.perf_counter()
+        # Checkpointed as a whole once stored, including chunks that were already there
+        full_batch = batch
+
+        if self.skip_existing:
+            # Same ID means same source, page, offset and text: nothing to do
+            existing = set(self.collection.get(ids=[chunk["id"] for chunk in batch], include=[])["ids"])
+            if existing:
+                batch = [chunk for chunk in batch if chunk["id"] not in existing]
+                self.skipped += len(existing)
+        if not batch:
+            counter.busy_seconds += time.perf_counter() - start
+            return batch, [], [], full_batch
+
+        # The one place chunk text is materialized for embedding and storage
+        texts = [chunk["text"] for chunk in batch]
+        model = self.embedder if self.embedder is not None else self.embedding_model
+        if self.embedding_cache is not None:
+            embeddings = self.embedding_cache.encode(
+                model,
+                texts,
+                batch_size=config.BATCH_SIZE,
+                show_progress_bar=config.SHOW_PROGRESS_BAR
+            ).tolist()
+        else:
+            embeddings = model.encode(
+                texts,
+                batch_size=config.BATCH_SIZE,
+                show_progress_bar=config.SHOW_PROGRESS_BAR,
+                convert_to_numpy=True
+            ).tolist()
+        counter.busy_seconds += time.perf_counter() - start
+        counter.batches += 1
+        counter.chunks += len(batch)
+        return batch, texts, embeddings, full_batch
+
+    def _store(self, batch: List[Dict], texts: List[str], embeddings: List[List[float]], full_batch: List[Dict]):
+        if not batch:
+            if self.checkpoint is not None:
+                self.checkpoint.commit(full_batch)
+            return
+        counter = self.stages["store"]
+        metadatas = [chunk["metadata"] for chunk in batch]
+
+        start = time.perf_counter()
+        self.loader.write(
+            ids=[chunk["id"] for chunk in batch],
+            embeddings=embeddings,
+            documents=texts,
+            metadatas=metadatas
+        )
+        if self.lexical_index is not None:
+            self.lexical_index.add([chunk["id"] for chunk in batch], texts)
+        counter.busy_seconds += time.perf_counter() - start
+        counter.batches += 1
+        counter.chunks += len(batch)
+        # Batches are stored in stream order, so the checkpoint cursor only moves forward
+        if self.checkpoint is not None:
+            self.checkpoint.commit(full_batch)
+        logger.info(f"Stored batch {counter.batches} ({counter.chunks} chunks so far)")
+
+    # Pipelined mode
+
+    def _put(self, q: MonitoredQueue, item, counter: StageCounter):
+        """Put with backpressure, giving up if another stage failed"""
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        counter.wait_seconds += time.perf_counter() - start
+
+    def _get(self, q: MonitoredQueue, counter: StageCounter):
+        """Get the next item, or _DONE if another stage failed"""
+        start = time.perf_counter()
+        item = _DONE
+        while not self._stop.is_set():
+            try:
+                item = q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        counter.wait_seconds += time.perf_counter() - start
+        return item
+
+    def _run_stage(self, target, *args):
+        try:
+            target(*args)
+        except BaseException as e:
+            logger.error(f"Ingestion stage failed: {e}")
+            self._errors.append(e)
+            self._stop.set()
+
+    def _extract_loop(self, batches: Iterator[List[Dict]], out_q: MonitoredQueue):
+        while not self._stop.is_set():
+            batch = self._next_batch(batches)
+            self._put(out_q, batch, self.stages["extract"])
+            if batch is _DONE:
+                break
+
+    def _embed_loop(self, in_q: MonitoredQueue, out_q: MonitoredQueue):
+        while True:
+            batch = self._get(in_q, self.stages["embed"])
+            if batch is _DONE:
+                self._put(out_q, _DONE, self.stages["embed"])
+                return
+            self._put(out_q, self._embed(batch), self.stages["embed"])
+
+    def _store_loop(self, in_q: MonitoredQueue):
+        while True:
+            item = self._get(in_q, self.stages["store"])
+            if item is _DONE:
+                return
+            self._store(*item)
+
+    def _run_pipelined(self, batches: Iterator[List[Dict]]):
+        to_embed = MonitoredQueue("extract->embed", self.queue_depth)
+        to_store = MonitoredQueue("embed->store", self.queue_depth)
+        self.queues = {to_embed.name: to_embed, to_store.name: to_store}
+
+        threads = [
+            threading.Thread(target=self._run_stage, args=(self._extract_loop, batches, to_embed),
+                             name="ingest-extract", daemon=True),
+            threading.Thread(target=self._run_stage, args=(self._embed_loop, to_embed, to_store),
+                             name="ingest-embed", daemon=True),
+            threading.Thread(target=self._run_stage, args=(self._store_loop, to_store),
+                             name="ingest-store", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+    # Sequential mode
+
+    def _run_sequential(self, batches: Iterator[List[Dict]]):
+        while True:
+            batch = self._next_batch(batches)
+            if batch is _DONE:
+                return
+            self._store(*self._embed(batch))
+
+    def run(self, chunks: Iterable[Dict]) -> Dict:
+        """
+        Embed and store all chunk records
+
+        Args:
+            chunks: Iterable of chunk records (dicts or ChunkSpans) with id,
+                text and metadata
+
+        Returns:
+            Dict with total chunks, batches, chunks per source, timing and
+            per-stage/queue counters
+        """
+        self._stop.clear()
+        self._errors = []
+        self._start_time = time.perf_counter()
+        batches = batched(chunks, self.batch_size)
+        try:
+            if self.pipelined:
+                self._run_pipelined(batches)
+            else:
+                self._run_sequential(batches)
+        finally:
+            self._elapsed = time.perf_counter() - self._start_time
+            self._start_time = None
+            self.loader.close()
+            if self.lexical_index is not None:
+                self.lexical_index.save()
+            # Shuts down the extractor's process pool if a stage failed early
+            batches.close()
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+        stats = self.stats()
+        logger.info(
+            f"Ingested {stats['chunks']} chunks in {stats['seconds']:.2f}s "
+            f"({stats['chunks_per_sec']:.1f} chunks/sec, bottleneck: {stats['bottleneck']})"
+        )
+        return stats
+
+    def stats(self) -> Dict:
+        """Current counters (safe to call from another thread during run())"""
+        if self._start_time is not None:
+            elapsed = time.perf_counter() - self._start_time
+        else:
+            elapsed = self._elapsed
+
+        stages = {name: counter.as_dict() for name, counter in self.stages.items()}
+        total = self.stages["store"].chunks
+        return {
+            "chunks": total,
+            "produced": self.stages["extract"].chunks,
+            "batches": self.stages["store"].batches,
+            "skipped_existing": self.skipped,
+            "per_source": dict(self.per_source),
+            "seconds": elapsed,
+            "chunks_per_sec": total / elapsed if elapsed > 0 else 0.0,
+            "pipelined": self.pipelined,
+            "stages": stages,
+            "queues": {name: q.as_dict() for name, q in self.queues.items()},
+            "embedding_cache": self.embedding_cache.stats() if self.embedding_cache is not None else None,
+            "embedder": self.embedder.stats() if self.embedder is not None else None,
+            "writes": self.loader.stats(),
+            # The stage that spent the most time working is the one to optimize
+            "bottleneck": max(stages, key=lambda name: stages[name]["busy_seconds"])
+        }
+
+
+def ingest_chunk_stream(
+    chunks: Iterable[Dict],
+    embedding_model,
+    collection,
+    batch_size: int = config.INGEST_BATCH_SIZE,
+    upsert: bool = False,
+    pipelined: bool = config.INGEST_PIPELINED,
+    embedding_cache=None,
+    skip_existing: bool = False,
+    on_start: Optional[Callable[["IngestionPipeline"], None]] = None,
+    checkpoint=None,
+    lexical_index=None
+) -> Dict:
+    """
+    Embed and store a stream of chunks batch by batch
+
+    Args:
+        chunks: Iterable of chunk records (dicts or ChunkSpans) with id,
+            text and metadata
+        embedding_model: Model with a SentenceTransformer-style encode()
+        collection: ChromaDB collection to write to
+        batch_size: Chunks embedded and written per batch
+        upsert: Use collection.upsert instead of collection.add
+        pipelined: Overlap extraction, embedding and storage on separate threads
+        embedding_cache: Optional EmbeddingCache consulted before encoding
+        skip_existing: Don't re-embed chunks whose ID is already stored
+        on_start: Called with the IngestionPipeline before it runs, so
+            callers can poll its live stats()
+        checkpoint: Optional IngestCheckpoint (already begun); chunks it
+            recorded as stored are skipped and every stored batch is logged
+        lexical_index: Optional BM25Index built up alongside the collection
+
+    Returns:
+        Dict with total chunks, batches, chunks per source, timing and
+        per-stage/queue counters
+    """
+    pipeline = IngestionPipeline(
+        embedding_model,
+        collection,
+        batch_size=batch_size,
+        upsert=upsert,
+        pipelined=pipelined,
+        embedding_cache=embedding_cache,
+        skip_existing=skip_existing,
+        checkpoint=checkpoint,
+        lexical_index=lexical_index
+    )
+    if on_start is not None:
+        on_start(pipeline)
+    if checkpoint is not None:
+        chunks = checkpoint.filter(chunks)
+    stats = pipeline.run(chunks)
+    stats["ids_by_source"] = pipeline.ids_by_source
+    if checkpoint is not None:
+        stats = checkpoint.merge_stats(stats)
+    return stats
@@ -0,0 +1,87 @@
+"""
+On-disk cache of extracted PDF page text
+Keyed by the SHA-256 of the PDF bytes, so re-chunking or rebuilding the
+index never has to run pypdf on an unchanged file again
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import pypdf
+
+logger = logging.getLogger(__name__)
+
+# Cached text is only valid for the extractor that produced it
+EXTRACTOR_VERSION = f"pypdf-{pypdf.__version__}"
+
+
+class PageTextCache:
+    """
+    One JSON file per (PDF hash, extractor version) holding every page's text
+
+    Page texts are stored as a list indexed by 0-based page number, with
+    empty strings for pages that have no text.
+    """
+
+    def __init__(self, cache_dir: Path):
+        """
+        Initialize cache
+
+        Args:
+            cache_dir: Root cache directory (pages are stored under pages/)
+        """
+        self.dir = Path(cache_dir) / "pages"
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, pdf_sha256: str) -> Path:
+        return self.dir / f"{pdf_sha256}.{EXTRACTOR_VERSION}.json"
+
+    def contains(self, pdf_sha256: str) -> bool:
+        """Check for an entry without loading it"""
+        return self._path(pdf_sha256).exists()
+
+    def get(self, pdf_sha256: str) -> Optional[List[str]]:
+        """
+        Look up the page texts of a PDF
+
+        Args:
+            pdf_sha256: SHA-256 of the PDF bytes
+
+        Returns:
+            List of page texts, or None if not cached
+        """
+        path = self._path(pdf_sha256)
+        if not path.exists():
+            self.misses += 1
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable page cache entry {path.name}: {e}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data["pages"]
+
+    def put(self, pdf_sha256: str, source: str, pages: List[str]):
+        """
+        Store the page texts of a PDF
+
+        Args:
+            pdf_sha256: SHA-256 of the PDF bytes
+            source: File name, kept for debugging only
+            pages: Text of every page in order
+        """
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(pdf_sha256)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"extractor": EXTRACTOR_VERSION, "source": source, "pages": pages}, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,265 @@
+"""
+Parallel PDF text extraction for the RAG pipelines
+Spreads individual pages (not just files) across a process pool
+"""
+
+import os
+import time
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Iterator, Optional, Tuple
+
+from pypdf import PdfReader
+
+from ingest_manifest import file_sha256
+from page_cache import PageTextCache
+
+logger = logging.getLogger(__name__)
+
+# Each worker process keeps the most recently opened reader so consecutive
+# page ranges of the same PDF don't re-parse the cross-reference table
+_worker_reader: Dict[str, PdfReader] = {}
+
+
+def _get_reader(pdf_path: str) -> PdfReader:
+    """Return a cached reader for pdf_path, opening it on first use"""
+    reader = _worker_reader.get(pdf_path)
+    if reader is None:
+        _worker_reader.clear()
+        reader = PdfReader(pdf_path)
+        _worker_reader[pdf_path] = reader
+    return reader
+
+
+def _extract_page_range(task: Tuple[str, int, int]) -> List[Tuple[int, str, Optional[str]]]:
+    """
+    Extract text for pages [start, end) of one PDF
+
+    Runs inside a worker process, so it only takes and returns picklable values.
+    Returns (page_index, text, error message or None) per page.
+    """
+    pdf_path, start, end = task
+    reader = _get_reader(pdf_path)
+    results = []
+    for page_index in range(start, end):
+        error = None
+        try:
+            text = reader.pages[page_index].extract_text() or ""
+        except Exception as e:
+            error = f"Error extracting page {page_index + 1} of {Path(pdf_path).name}: {e}"
+            logger.error(error)
+            text = ""
+        results.append((page_index, text, error))
+    return results
+
+
+def _worker_context():
+    """
+    Start method for extraction workers: forkserver where available, else spawn
+
+    Never fork: iter_pages runs on ingestion and API worker threads while
+    torch/tokenizers thread pools are live, and forking then can deadlock.
+    The forkserver imports the caller's __main__ once, so each worker only
+    has to unpickle a task for this (light) module.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _ordered_map(executor: ProcessPoolExecutor, tasks: List, max_in_flight: int) -> Iterator:
+    """
+    Like executor.map, but keeps at most max_in_flight tasks outstanding
+
+    Executor.map submits every task up front, so finished pages pile up in
+    memory whenever the consumer (embedding) is slower than extraction.
+    """
+    task_iter = iter(tasks)
+    pending = deque()
+    for task in task_iter:
+        pending.append(executor.submit(_extract_page_range, task))
+        if len(pending) >= max_in_flight:
+            break
+
+    while pending:
+        result = pending.popleft().result()
+        next_task = next(task_iter, None)
+        if next_task is not None:
+            pending.append(executor.submit(_extract_page_range, next_task))
+        yield result
+
+
+class ParallelPdfExtractor:
+    """
+    Extract page text from PDFs using a pool of worker processes
+
+    Pages are yielded in file order and then page order, exactly as a serial
+    loop over PdfReader(...).pages would produce them.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        pages_per_task: int = 4,
+        page_cache: Optional[PageTextCache] = None
+    ):
+        """
+        Initialize extractor
+
+        Args:
+            workers: Number of worker processes (None or 0 = all CPU cores, 1 = serial)
+            pages_per_task: Pages sent to a worker per task
+            page_cache: Optional cache of page text keyed by PDF hash
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = max(1, pages_per_task)
+        self.page_cache = page_cache
+        self.stats: Dict[str, float] = {}
+        # Live counters of the running iter_pages() call, safe to read from other threads
+        self.progress: Dict = {}
+
+    def _plan_tasks(self, pdf_paths: List[Path]) -> List[Dict]:
+        """Split every PDF without cached page text into page-range tasks"""
+        plan = []
+        for pdf_path in pdf_paths:
+            entry = {"path": pdf_path, "sha256": None, "cached": False, "total_pages": 0, "tasks": []}
+
+            if self.page_cache is not None:
+                entry["sha256"] = file_sha256(pdf_path)
+                entry["cached"] = self.page_cache.contains(entry["sha256"])
+            if entry["cached"]:
+                # Loaded lazily in _iter_file_pages to keep memory bounded
+                plan.append(entry)
+                continue
+
+            try:
+                total_pages = len(PdfReader(str(pdf_path)).pages)
+            except Exception as e:
+                logger.error(f"Error opening {pdf_path.name}: {e}")
+                self.progress["errors"].append(f"Error opening {pdf_path.name}: {e}")
+                self.progress["files_done"] += 1
+                continue
+
+            entry["total_pages"] = total_pages
+            entry["tasks"] = [
+                (str(pdf_path), start, min(start + self.pages_per_task, total_pages))
+                for start in range(0, total_pages, self.pages_per_task)
+            ]
+            plan.append(entry)
+        return plan
+
+    def _iter_file_pages(self, entry: Dict, results: Iterator) -> Iterator[Tuple[int, str]]:
+        """Yield (page_index, text) for one planned PDF from cache or workers"""
+        if entry["cached"]:
+            pages = self.page_cache.get(entry["sha256"])
+            if pages is not None:
+                entry["total_pages"] = len(pages)
+                self.progress["pages_total"] += len(pages)
+                yield from enumerate(pages)
+                return
+
+            # Unreadable cache entry: extract this file in-process instead
+            entry["cached"] = False
+            try:
+                entry["total_pages"] = len(PdfReader(str(entry["path"])).pages)
+            except Exception as e:
+                logger.error(f"Error opening {entry['path'].name}: {e}")
+                self.progress["errors"].append(f"Error opening {entry['path'].name}: {e}")
+                return
+            self.progress["pages_total"] += entry["total_pages"]
+            page_results = iter(_extract_page_range((str(entry["path"]), 0, entry["total_pages"])))
+        else:
+            # This file's share of the ordered worker results
+            page_results = (item for _ in entry["tasks"] for item in next(results))
+
+        texts = []
+        failed_pages = 0
+        for page_index, text, error in page_results:
+            if error is not None:
+                self.progress["errors"].append(error)
+                failed_pages += 1
+            texts.append(text)
+            yield page_index, text
+
+        # A failed page would stay empty for as long as the file is unchanged,
+        # so files with extraction errors aren't cached and are retried next run
+        if self.page_cache is not None and entry["sha256"] is not None:
+            if failed_pages:
+                logger.warning(f"Not caching {entry['path'].name}: {failed_pages} pages failed to extract")
+            else:
+                self.page_cache.put(entry["sha256"], entry["path"].name, texts)
+
+    def iter_pages(self, pdf_paths: List[Path]) -> Iterator[Dict]:
+        """
+        Yield non-empty pages from all PDFs in order
+
+        Args:
+            pdf_paths: PDF files to extract
+
+        Yields:
+            Dicts with text, page_num (1-based), source and total_pages
+        """
+        start_time = time.perf_counter()
+        self.progress = {
+            "files": len(pdf_paths),
+            "files_done": 0,
+            "pages_total": 0,  # Grows as cached files are opened
+            "pages_done": 0,
+            "errors": []
+        }
+        plan = self._plan_tasks(pdf_paths)
+        self.progress["pages_total"] = sum(entry["total_pages"] for entry in plan)
+        all_tasks = [task for entry in plan for task in entry["tasks"]]
+        workers = min(self.workers, len(all_tasks)) if all_tasks else 1
+
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=_worker_context())
+            # Results come back in submission order
+            results = _ordered_map(executor, all_tasks, max_in_flight=workers * 2)
+        else:
+            executor = None
+            results = map(_extract_page_range, all_tasks)
+
+        emitted = 0
+        try:
+            for entry in plan:
+                for page_index, text in self._iter_file_pages(entry, results):
+                    self.progress["pages_done"] += 1
+                    if text.strip():  # Only yield non-empty pages
+                        emitted += 1
+                        yield {
+                            "text": text,
+                            "page_num": page_index + 1,
+                            "source": entry["path"].name,
+                            "total_pages": entry["total_pages"]
+                        }
+                self.progress["files_done"] += 1
+                origin = " (cached)" if entry["cached"] else ""
+                logger.info(f"✓ Extracted {entry['path'].name}: {entry['total_pages']} pages{origin}")
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            _worker_reader.clear()
+
+        elapsed = time.perf_counter() - start_time
+        total_pages = sum(entry["total_pages"] for entry in plan)
+        cached_pages = sum(entry["total_pages"] for entry in plan if entry["cached"])
+        self.stats = {
+            "files": len(plan),
+            "pages": total_pages,
+            "non_empty_pages": emitted,
+            "cached_pages": cached_pages,
+            "workers": workers,
+            "seconds": elapsed,
+            "pages_per_sec": total_pages / elapsed if elapsed > 0 else 0.0
+        }
+        logger.info(
+            f"Extracted {total_pages} pages from {len(plan)} PDFs in {elapsed:.2f}s "
+            f"({self.stats['pages_per_sec']:.1f} pages/sec, {workers} workers, {cached_pages} pages from cache)"
+        )
+
+    def extract(self, pdf_paths: List[Path]) -> List[Dict]:
+        """Extract all non-empty pages from pdf_paths into a list"""
+        return list(self.iter_pages(pdf_paths))
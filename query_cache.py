@@ -0,0 +1,144 @@
+"""
+Process-wide LRU cache of query embeddings
+Shared by every pipeline instance, so repeated questions (the suggested
+questions in the UIs especially) skip the encoder
+"""
+
+import re
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str, lowercase: bool = False) -> str:
+    """Cache key form of a query: NFKC, collapsed whitespace, optionally lowercased"""
+    text = _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", query)).strip()
+    return text.lower() if lowercase else text
+
+
+def _lowercases(model) -> bool:
+    """Whether the model's tokenizer lowercases input (case then can't change the vector)"""
+    tokenizer = getattr(model, "tokenizer", None)
+    if getattr(tokenizer, "do_lower_case", False):
+        return True
+    return bool(getattr(tokenizer, "init_kwargs", {}).get("do_lower_case", False))
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU map from (embedding model, normalized query) to its vector
+
+    Thread-safe; callers get copies, so cached vectors can't be modified.
+    """
+
+    def __init__(self, max_size: int = config.QUERY_CACHE_SIZE):
+        """
+        Initialize cache
+
+        Args:
+            max_size: Entries kept before the least recently used is evicted
+                (0 disables caching)
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def resize(self, max_size: int):
+        """Change the capacity, evicting the oldest entries if needed"""
+        with self._lock:
+            self.max_size = max_size
+            while len(self._entries) > max(0, max_size):
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def encode_many(self, model, model_key: str, queries: List[str]) -> np.ndarray:
+        """
+        Embeddings of queries, encoding only the ones not cached (in one batch)
+
+        Args:
+            model: Embedding model with encode()
+            model_key: Identifies the model's vectors (embedding_cache_key())
+            queries: Query texts
+
+        Returns:
+            float32 array of shape (len(queries), dim), in input order
+        """
+        lowercase = _lowercases(model)
+        keys = [(model_key, normalize_query(query, lowercase)) for query in queries]
+        vectors: List[Optional[np.ndarray]] = [None] * len(queries)
+        missing: Dict[Tuple[str, str], List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    vectors[i] = vector
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+                    self.misses += 1
+
+        if missing:
+            # The normalized text is what gets embedded, so the cached vector is exact for every spelling
+            texts = [key[1] for key in missing]
+            encoded = np.asarray(model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+            with self._lock:
+                for (key, indices), vector in zip(missing.items(), encoded):
+                    for i in indices:
+                        vectors[i] = vector
+                    if self.max_size > 0:
+                        self._entries[key] = vector
+                        self._entries.move_to_end(key)
+                while len(self._entries) > max(0, self.max_size):
+                    self._entries.popitem(last=False)
+
+        return np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+
+    def encode(self, model, model_key: str, query: str) -> np.ndarray:
+        """Embedding of one query (shape (dim,)), from the cache when possible"""
+        return self.encode_many(model, model_key, [query])[0]
+
+    def stats(self) -> Dict:
+        """Hit/miss counters since the cache was created or cleared"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+_shared: Optional[QueryEmbeddingCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_query_cache() -> QueryEmbeddingCache:
+    """The process-wide cache every pipeline uses (sized by config.QUERY_CACHE_SIZE)"""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = QueryEmbeddingCache(config.QUERY_CACHE_SIZE)
+    return _shared
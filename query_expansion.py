@@ -0,0 +1,99 @@
+"""
+Synonym-based query expansion
+Turns a question into separate variants (one synonym substituted in each)
+that are embedded and searched together, instead of one long concatenated
+query string
+"""
+
+import re
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def load_synonyms(path: Path) -> Dict[str, List[str]]:
+    """
+    Read a synonym table: a JSON object mapping a term to its synonyms
+
+    A missing or unreadable file disables expansion rather than failing.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            table = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"Synonym file {path} not found; queries won't be expanded")
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable synonym file {path}: {e}")
+        return {}
+    return {
+        term.lower(): [synonym for synonym in synonyms if synonym.lower() != term.lower()]
+        for term, synonyms in table.items()
+    }
+
+
+class QueryExpander:
+    """
+    Produces synonym variants of a question
+
+    Each variant replaces one term (and its plural) with one synonym, so
+    every variant stays as short as the question and within the embedder's
+    window.
+    """
+
+    def __init__(self, synonyms: Dict[str, List[str]], max_variants: int = config.QUERY_EXPANSION_MAX_VARIANTS):
+        """
+        Initialize expander
+
+        Args:
+            synonyms: Term -> synonyms (see load_synonyms())
+            max_variants: Variants returned besides the original question
+        """
+        self.synonyms = synonyms
+        self.max_variants = max_variants
+        self._patterns = {
+            term: re.compile(rf"\b{re.escape(term)}(s?)\b", re.IGNORECASE) for term in synonyms
+        }
+
+    @classmethod
+    def from_file(cls, path: Optional[Path] = None, max_variants: int = config.QUERY_EXPANSION_MAX_VARIANTS) -> "QueryExpander":
+        """Expander for a synonym file (default config.QUERY_SYNONYMS_FILE, next to config.py)"""
+        if path is None:
+            path = Path(config.QUERY_SYNONYMS_FILE)
+            if not path.is_absolute():
+                path = Path(config.__file__).parent / path
+        return cls(load_synonyms(path), max_variants)
+
+    def expand(self, query: str) -> List[str]:
+        """
+        The question followed by up to max_variants synonym variants
+
+        Args:
+            query: User question
+
+        Returns:
+            Distinct query strings, the original first
+        """
+        variants = [query]
+        seen = {query.lower()}
+        for term, pattern in self._patterns.items():
+            if len(variants) > self.max_variants:
+                break
+            if not pattern.search(query):
+                continue
+            for synonym in self.synonyms[term]:
+                if re.search(rf"\b{re.escape(synonym)}s?\b", query, re.IGNORECASE):
+                    continue
+                # "workers" -> "employees": a plural stays plural
+                variant = pattern.sub(lambda match: synonym + match.group(1), query)
+                if variant.lower() not in seen:
+                    seen.add(variant.lower())
+                    variants.append(variant)
+                if len(variants) > self.max_variants:
+                    break
+        return variants
@@ -5,7 +5,7 @@ Handles PDF ingestion, embeddings, retrieval, and generation
 
 import os
 import logging
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterator
 from pathlib import Path
 
 # Disable TensorFlow (we use PyTorch only)
@@ -13,12 +13,8 @@ os.environ['TRANSFORMERS_NO_TF'] = '1'
 os.environ['USE_TORCH'] = '1'
 
 # PDF processing
-from pypdf import PdfReader
 
 # Embeddings and vector store
-from sentence_transformers import SentenceTransformer
-import chromadb
-from chromadb.config import Settings
 
 # LLM for generation
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
@@ -27,6 +23,20 @@ import torch
 # Prompts
 from prompts import RAG_PROMPT_TEMPLATE, SYSTEM_PROMPT
 
+import config
+from pdf_extraction import ParallelPdfExtractor
+from page_cache import PageTextCache
+from dedup import ChunkDeduplicator, collect_pdf_files
+from chunking import TokenChunker, PageText, ChunkSpan
+from ingest_checkpoint import IngestCheckpoint, checkpoint_path_for, ingest_run_key
+from snapshot import export_snapshot, import_snapshot
+from ingest_manifest import IngestManifest, manifest_path_for
+from ingestion import ingest_chunk_stream, IngestionPipeline
+from embedding_cache import EmbeddingCache
+from embedders import create_embedder, embedding_cache_key
+from query_cache import shared_query_cache
+from vector_store import open_vector_client
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,9 +53,11 @@ class RAGPipeline:
         db_dir: str = "db",
         embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
         llm_model: str = "google/flan-t5-small",
-        chunk_size: int = 500,
-        chunk_overlap: int = 50,
-        collection_name: str = "legal_docs"
+        chunk_size: Optional[int] = config.CHUNK_MAX_TOKENS,
+        chunk_overlap: int = config.CHUNK_OVERLAP_TOKENS,
+        collection_name: str = "legal_docs",
+        extraction_workers: int = config.EXTRACTION_WORKERS,
+        ingest_batch_size: int = config.INGEST_BATCH_SIZE
     ):
         """
         Initialize RAG pipeline
@@ -55,28 +67,50 @@ class RAGPipeline:
             db_dir: Directory for ChromaDB persistence
             embedding_model: HuggingFace embedding model name
             llm_model: HuggingFace LLM model name
-            chunk_size: Size of text chunks
-            chunk_overlap: Overlap between chunks
+            chunk_size: Max embedding-model tokens per chunk (None = model's max_seq_length)
+            chunk_overlap: Tokens shared by consecutive chunks
             collection_name: ChromaDB collection name
+            extraction_workers: Processes for PDF text extraction (0 = all cores)
+            ingest_batch_size: Chunks embedded and stored per ingestion batch
         """
         self.data_dir = Path(data_dir)
         self.db_dir = Path(db_dir)
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.collection_name = collection_name
+        self.ingest_batch_size = ingest_batch_size
+        self.last_ingest_stats: Dict = {}  # Per-stage throughput and queue depths of the last run
+        self.ingestion: Optional[IngestionPipeline] = None  # Running (or last) ingestion, for live progress
+        self.extractor = ParallelPdfExtractor(
+            workers=extraction_workers,
+            page_cache=PageTextCache(self.db_dir.parent / config.CACHE_DIR) if config.PAGE_CACHE_ENABLED else None
+        )
+        self.manifest = IngestManifest(manifest_path_for(self.db_dir, collection_name))
+        self.checkpoint = IngestCheckpoint(checkpoint_path_for(self.db_dir, collection_name))
         
         logger.info("Initializing RAG Pipeline...")
         
         # Initialize embedding model
         logger.info(f"Loading embedding model: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model)
+        self.embedding_model = create_embedder(embedding_model, self.db_dir.parent / config.CACHE_DIR)
+        self.chunker = TokenChunker.from_model(
+            self.embedding_model,
+            max_tokens=chunk_size,
+            overlap_tokens=chunk_overlap
+        )
         
-        # Initialize ChromaDB
-        logger.info(f"Initializing ChromaDB at {self.db_dir}")
-        self.chroma_client = chromadb.PersistentClient(
-            path=str(self.db_dir)
+        # Reuse embeddings of unchanged chunk text across rebuilds
+        self.embedding_key = embedding_cache_key(embedding_model)  # Model id the stored vectors belong to
+        self.query_cache = shared_query_cache()  # Process-wide, so every pipeline instance shares hits
+        self.embedding_cache = (
+            EmbeddingCache(self.db_dir.parent / config.CACHE_DIR, self.embedding_key)
+            if config.EMBEDDING_CACHE_ENABLED else None
         )
         
+        # Initialize vector store (ChromaDB or the exact NumPy index)
+        logger.info(f"Initializing vector store at {self.db_dir}")
+        self.chroma_client = open_vector_client(self.db_dir, self.collection_name)
+        
         # Get or create collection
         try:
             self.collection = self.chroma_client.get_collection(
@@ -116,76 +150,63 @@ class RAGPipeline:
         pages = []
         
         try:
-            reader = PdfReader(str(pdf_path))
-            for page_num, page in enumerate(reader.pages, start=1):
-                text = page.extract_text()
-                if text.strip():  # Only add non-empty pages
-                    pages.append({
-                        "text": text,
-                        "page_num": page_num,
-                        "source": pdf_path.name
-                    })
+            pages = self.extractor.extract([pdf_path])
             logger.info(f"Extracted {len(pages)} pages from {pdf_path.name}")
         except Exception as e:
             logger.error(f"Error extracting text from {pdf_path.name}: {e}")
         
         return pages
     
-    def chunk_text(self, text: str, metadata: Dict) -> List[Dict]:
+    def chunk_text(self, text: str, metadata: Dict) -> List[ChunkSpan]:
         """
-        Split text into overlapping chunks
+        Split text into overlapping chunks that fit the embedding model
         
         Args:
             text: Text to chunk
-            metadata: Metadata to attach to each chunk
+            metadata: Metadata shared by every chunk (source and page)
             
         Returns:
-            List of chunks with metadata
+            List of chunks as character offsets into text
+        """
+        return self.chunker.chunk_page(PageText(text, metadata))
+    
+    def iter_chunk_records(self, pdf_files: List[Path]) -> Iterator[ChunkSpan]:
         """
-        chunks = []
-        start = 0
-        text_length = len(text)
+        Lazily turn PDFs into chunk records ready for embedding
         
-        while start < text_length:
-            end = start + self.chunk_size
-            chunk_text = text[start:end]
-            
-            # Try to break at sentence boundary
-            if end < text_length:
-                last_period = chunk_text.rfind('.')
-                last_newline = chunk_text.rfind('\n')
-                break_point = max(last_period, last_newline)
-                
-                if break_point > self.chunk_size * 0.5:  # At least 50% of chunk
-                    chunk_text = chunk_text[:break_point + 1]
-                    end = start + break_point + 1
-            
-            if chunk_text.strip():
-                chunks.append({
-                    "text": chunk_text.strip(),
-                    "metadata": metadata.copy()
-                })
+        Args:
+            pdf_files: PDFs to extract and chunk
             
-            start = end - self.chunk_overlap
-        
-        return chunks
+        Yields:
+            ChunkSpans with id, text and metadata (text is sliced on demand)
+        """
+        # Pages are extracted in parallel but arrive in file/page order
+        for page_data in self.extractor.iter_pages(pdf_files):
+            metadata = {
+                "source": page_data["source"],
+                "page": page_data["page_num"]
+            }
+            # IDs are content-addressed, so re-ingesting unchanged text is a no-op
+            yield from self.chunk_text(page_data["text"], metadata)
+    
+    def _track_ingestion(self, ingestion: IngestionPipeline):
+        """Keep the running ingestion so its live counters can be polled"""
+        self.ingestion = ingestion
     
     def ingest_pdfs(self, force_reingest: bool = False) -> int:
         """
-        Ingest all PDFs from data directory
+        Incrementally ingest PDFs from data directory
+        
+        Only PDFs whose SHA-256 is not in the manifest are embedded; chunks of
+        changed or removed PDFs are deleted from the collection first.
         
         Args:
             force_reingest: If True, clear existing collection and reingest
             
         Returns:
-            Number of chunks ingested
+            Number of chunks in the collection after ingestion
         """
-        # Check if collection already has documents
         existing_count = self.collection.count()
-        if existing_count > 0 and not force_reingest:
-            logger.info(f"Collection already contains {existing_count} documents. Skipping ingestion.")
-            logger.info("Use force_reingest=True to reingest.")
-            return existing_count
         
         if force_reingest and existing_count > 0:
             logger.info("Force reingest: Deleting existing collection...")
@@ -194,60 +215,139 @@ class RAGPipeline:
                 name=self.collection_name,
                 metadata={"description": "Legal documents for RAG"}
             )
+            existing_count = 0
+        if force_reingest:
+            self.manifest.clear()
+            self.checkpoint.complete()
         
         logger.info(f"Starting PDF ingestion from {self.data_dir}")
         
         # Get all PDF files
-        pdf_files = list(self.data_dir.glob("*.pdf"))
-        if not pdf_files:
+        pdf_files = collect_pdf_files(self.data_dir)
+        if not pdf_files and not self.manifest.files:
             logger.warning(f"No PDF files found in {self.data_dir}")
-            return 0
+            return existing_count
         
         logger.info(f"Found {len(pdf_files)} PDF files")
+        changes = self.manifest.diff(pdf_files, chunking=self.chunker.signature)
+        
+        # Collections built before the manifest existed: trust their contents
+        # instead of re-embedding everything once (unless a first ingest was interrupted)
+        if existing_count > 0 and not self.manifest.files and not self.checkpoint.path.exists():
+            logger.info(f"Collection already contains {existing_count} documents. Recording them in manifest.")
+            for pdf_path in pdf_files:
+                self.manifest.record(pdf_path.name, changes["hashes"][pdf_path.name], 0, self.chunker.signature)
+            self.manifest.save()
+            return existing_count
         
-        all_chunks = []
+        # Keep data-directory order so an interrupted run is resumed with the same file sequence
+        pending = set(changes["new"] + changes["changed"])
+        to_ingest = [pdf_path for pdf_path in pdf_files if pdf_path in pending]
+        stale = changes["removed"] + [pdf_path.name for pdf_path in changes["changed"]]
+        
+        if not to_ingest and not stale:
+            logger.info(f"Collection is up to date ({existing_count} documents). Skipping ingestion.")
+            return existing_count
+        
+        logger.info(
+            f"{len(changes['new'])} new, {len(changes['changed'])} changed, "
+            f"{len(changes['removed'])} removed, {len(changes['unchanged'])} unchanged PDFs"
+        )
+        
+        # Drop chunks of removed and changed PDFs
+        for name in stale:
+            logger.info(f"Deleting chunks of {name}")
+            self.collection.delete(where={"source": name})
+            self.manifest.forget(name)
+        # Saved now so a restart sees changed files as new and keeps their resumed chunks
+        self.manifest.save()
+        
+        resumed = self.checkpoint.begin(ingest_run_key(to_ingest, self.chunker.signature))
+        deduplicator = ChunkDeduplicator() if config.DEDUP_ENABLED else None
+        # Fully stored files need not even be extracted again; dedup is per
+        # document, so the interrupted file is replayed from its start
+        chunks = self.iter_chunk_records(self.checkpoint.pending_files(to_ingest) if resumed else to_ingest)
+        if deduplicator is not None:
+            chunks = deduplicator.filter(chunks)
+        
+        # Stream page -> chunk -> embedding batch -> upsert batch
+        stats = ingest_chunk_stream(
+            chunks,
+            self.embedding_model,
+            self.collection,
+            batch_size=self.ingest_batch_size,
+            upsert=True,
+            embedding_cache=self.embedding_cache,
+            skip_existing=True,
+            on_start=self._track_ingestion,
+            checkpoint=self.checkpoint
+        )
+        stats['dedup'] = deduplicator.stats() if deduplicator is not None else None
+        self.last_ingest_stats = stats
+        chunk_counts = stats["per_source"]
+        if stats["produced"] == 0:
+            logger.warning("No chunks created from new or changed PDFs")
+        
+        for pdf_path in to_ingest:
+            self.manifest.record(
+                pdf_path.name,
+                changes["hashes"][pdf_path.name],
+                chunk_counts.get(pdf_path.name, 0),
+                self.chunker.signature
+            )
+        self.manifest.save()
+        self.checkpoint.complete()
         
-        # Process each PDF
-        for pdf_path in pdf_files:
-            pages = self.extract_text_from_pdf(pdf_path)
+        total = self.collection.count()
+        logger.info(f"Successfully ingested {stats['chunks']} chunks! Collection now has {total}.")
+        return total
+    
+    def export_snapshot(self, path: str) -> Dict:
+        """
+        Write the collection to a snapshot archive (see snapshot.py)
+        
+        Args:
+            path: Archive to create
             
-            for page_data in pages:
-                metadata = {
-                    "source": page_data["source"],
-                    "page": page_data["page_num"]
-                }
-                chunks = self.chunk_text(page_data["text"], metadata)
-                all_chunks.extend(chunks)
-        
-        if not all_chunks:
-            logger.warning("No chunks created from PDFs")
-            return 0
-        
-        logger.info(f"Created {len(all_chunks)} chunks. Computing embeddings...")
-        
-        # Prepare data for ChromaDB
-        documents = [chunk["text"] for chunk in all_chunks]
-        metadatas = [chunk["metadata"] for chunk in all_chunks]
-        ids = [f"chunk_{i}" for i in range(len(all_chunks))]
-        
-        # Compute embeddings
-        embeddings = self.embedding_model.encode(
-            documents,
-            show_progress_bar=True,
-            convert_to_numpy=True
-        ).tolist()
-        
-        # Add to ChromaDB
-        logger.info("Adding chunks to ChromaDB...")
-        self.collection.add(
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
+        Returns:
+            The snapshot's manifest
+        """
+        return export_snapshot(
+            self.collection,
+            Path(path),
+            self.embedding_key,
+            data_dir=self.data_dir,
+            chunking=self.chunker.signature
         )
+    
+    def import_snapshot(self, path: str, replace: bool = False) -> int:
+        """
+        Load the collection from a snapshot archive instead of ingesting
         
-        logger.info(f"Successfully ingested {len(all_chunks)} chunks!")
-        return len(all_chunks)
+        Args:
+            path: Snapshot archive made with export_snapshot()
+            replace: Overwrite a non-empty collection
+            
+        Returns:
+            Number of chunks loaded
+        """
+        self.collection, snapshot = import_snapshot(
+            Path(path),
+            self.chroma_client,
+            self.collection_name,
+            self.embedding_key,
+            chunking=self.chunker.signature,
+            dim=self.embedding_model.get_sentence_embedding_dimension(),
+            replace=replace
+        )
+        # The snapshot's PDFs count as ingested, so the next ingest only embeds what changed since
+        self.manifest.clear()
+        # Archives without a chunker signature are taken to match ours; an empty one would re-embed everything
+        chunking = snapshot.get("chunking") or self.chunker.signature
+        for name, sha in snapshot["pdfs"].items():
+            self.manifest.record(name, sha, 0, chunking)
+        self.manifest.save()
+        return snapshot["count"]
     
     def retrieve(self, query: str, top_k: int = 3) -> List[Dict]:
         """
@@ -261,31 +361,47 @@ class RAGPipeline:
             List of retrieved chunks with metadata
         """
         logger.info(f"Retrieving top-{top_k} chunks for query: {query[:50]}...")
+        retrieved_chunks = self.retrieve_many([query], top_k=top_k)[0]
+        logger.info(f"Retrieved {len(retrieved_chunks)} chunks")
+        return retrieved_chunks
+    
+    def retrieve_many(self, queries: List[str], top_k: int = 3) -> List[List[Dict]]:
+        """
+        Retrieve top-k chunks for several queries with one encode and one query
         
-        # Encode query
-        query_embedding = self.embedding_model.encode(
-            query,
-            convert_to_numpy=True
-        ).tolist()
+        Args:
+            queries: User queries
+            top_k: Number of chunks to retrieve per query
+            
+        Returns:
+            One list of retrieved chunks per query, as retrieve() returns them
+        """
+        if not queries:
+            return []
+        
+        # Encode queries (one batch for the ones not cached)
+        query_embeddings = self.query_cache.encode_many(self.embedding_model, self.embedding_key, queries).tolist()
         
         # Query ChromaDB
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=query_embeddings,
             n_results=top_k
         )
         
         # Format results
-        retrieved_chunks = []
-        if results['documents'] and results['documents'][0]:
-            for i, doc in enumerate(results['documents'][0]):
-                retrieved_chunks.append({
-                    "text": doc,
-                    "metadata": results['metadatas'][0][i],
-                    "distance": results['distances'][0][i] if 'distances' in results else None
-                })
+        all_chunks = []
+        for q in range(len(queries)):
+            retrieved_chunks = []
+            if results['documents'] and results['documents'][q]:
+                for i, doc in enumerate(results['documents'][q]):
+                    retrieved_chunks.append({
+                        "text": doc,
+                        "metadata": results['metadatas'][q][i],
+                        "distance": results['distances'][q][i] if 'distances' in results else None
+                    })
+            all_chunks.append(retrieved_chunks)
         
-        logger.info(f"Retrieved {len(retrieved_chunks)} chunks")
-        return retrieved_chunks
+        return all_chunks
     
     def generate_answer(self, query: str, context_chunks: List[Dict]) -> str:
         """
@@ -5,7 +5,7 @@ Combines local knowledge base with internet search for comprehensive answers
 
 import os
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator
 from pathlib import Path
 import re
 import json
@@ -17,12 +17,8 @@ os.environ['TRANSFORMERS_NO_TF'] = '1'
 os.environ['USE_TORCH'] = '1'
 
 # PDF processing
-from pypdf import PdfReader
 
 # Embeddings and vector store
-from sentence_transformers import SentenceTransformer
-import chromadb
-from chromadb.config import Settings
 
 # LLM for generation
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
@@ -47,6 +43,43 @@ except Exception as e:
 
 from prompts import RAG_PROMPT_TEMPLATE, SYSTEM_PROMPT
 
+import config
+from pdf_extraction import ParallelPdfExtractor
+from page_cache import PageTextCache
+from dedup import ChunkDeduplicator, collect_pdf_files
+from chunking import TokenChunker, PageText, ChunkSpan
+from ingestion import ingest_chunk_stream, prune_stale_chunks, delete_source_chunks, IngestionPipeline
+from ingest_checkpoint import IngestCheckpoint, checkpoint_path_for, ingest_run_key
+from snapshot import export_snapshot, import_snapshot
+from embedding_cache import EmbeddingCache
+from embedders import create_embedder, embedding_cache_key
+from query_cache import shared_query_cache
+from vector_store import open_vector_client
+from bm25 import BM25Index, bm25_path_for, reciprocal_rank_fusion, weighted_score_fusion
+from query_expansion import QueryExpander
+
+
+def keyword_filter(query: str, docs: List[Dict], top_k: int) -> List[Dict]:
+    """
+    Keep documents containing a query word longer than 3 characters
+    
+    Retrieval's relevance filter when hybrid search is off.
+    """
+    query_keywords = set(query.lower().split())
+    relevant_docs = []
+    
+    for doc in docs:
+        text_lower = doc['text'].lower()
+        # Check if document contains any query keywords
+        keywords_found = sum(1 for word in query_keywords if len(word) > 3 and word in text_lower)
+        
+        # Only include if it has at least some relevance
+        if keywords_found > 0 or len(query_keywords) <= 2:
+            relevant_docs.append(doc)
+    
+    # Return top_k most relevant
+    return relevant_docs[:top_k] if relevant_docs else docs[:top_k]
+
 
 class AdvancedRAGPipeline:
     """
@@ -59,10 +92,12 @@ class AdvancedRAGPipeline:
         db_dir: str = "db",
         embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
         llm_model: str = "google/flan-t5-base",
-        chunk_size: int = 600,
-        chunk_overlap: int = 100,
+        chunk_size: Optional[int] = config.CHUNK_MAX_TOKENS,
+        chunk_overlap: int = config.CHUNK_OVERLAP_TOKENS,
         collection_name: str = "legal_docs",
-        enable_web_search: bool = True
+        enable_web_search: bool = True,
+        extraction_workers: int = config.EXTRACTION_WORKERS,
+        ingest_batch_size: int = config.INGEST_BATCH_SIZE
     ):
         """
         Initialize Advanced RAG pipeline
@@ -72,18 +107,38 @@ class AdvancedRAGPipeline:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.collection_name = collection_name
+        self.ingest_batch_size = ingest_batch_size
+        self.last_ingest_stats: Dict = {}  # Per-stage throughput and queue depths of the last run
+        self.ingestion: Optional[IngestionPipeline] = None  # Running (or last) ingestion, for live progress
+        self.checkpoint = IngestCheckpoint(checkpoint_path_for(self.db_dir, collection_name))
+        self.extractor = ParallelPdfExtractor(
+            workers=extraction_workers,
+            page_cache=PageTextCache(self.db_dir.parent / config.CACHE_DIR) if config.PAGE_CACHE_ENABLED else None
+        )
         self.enable_web_search = enable_web_search and WEB_SEARCH_AVAILABLE
         
         logger.info("Initializing Advanced RAG Pipeline...")
         
         # Initialize embedding model
         logger.info(f"Loading embedding model: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model)
+        self.embedding_model = create_embedder(embedding_model, self.db_dir.parent / config.CACHE_DIR)
+        self.chunker = TokenChunker.from_model(
+            self.embedding_model,
+            max_tokens=chunk_size,
+            overlap_tokens=chunk_overlap
+        )
+        
+        # Reuse embeddings of unchanged chunk text across rebuilds
+        self.embedding_key = embedding_cache_key(embedding_model)  # Model id the stored vectors belong to
+        self.query_cache = shared_query_cache()  # Process-wide, so every pipeline instance shares hits
+        self.embedding_cache = (
+            EmbeddingCache(self.db_dir.parent / config.CACHE_DIR, self.embedding_key)
+            if config.EMBEDDING_CACHE_ENABLED else None
+        )
         
-        # Initialize ChromaDB
-        logger.info(f"Initializing ChromaDB at {self.db_dir}")
-        self.db_dir.mkdir(parents=True, exist_ok=True)
-        self.chroma_client = chromadb.PersistentClient(path=str(self.db_dir))
+        # Initialize vector store (ChromaDB or the exact NumPy index)
+        logger.info(f"Initializing vector store at {self.db_dir}")
+        self.chroma_client = open_vector_client(self.db_dir, self.collection_name)
         
         # Get or create collection
         try:
@@ -96,6 +151,16 @@ class AdvancedRAGPipeline:
             )
             logger.info(f"Created new collection: {self.collection_name}")
         
+        # Synonym variants of each question, searched together
+        self.query_expander = QueryExpander.from_file()
+        
+        # Keyword index fused with vector hits at query time
+        self.lexical_index = (
+            BM25Index(bm25_path_for(self.db_dir, collection_name)) if config.HYBRID_SEARCH else None
+        )
+        if self.lexical_index is not None:
+            self.lexical_index.sync(self.collection)
+        
         # Initialize LLM
         logger.info(f"Loading LLM: {llm_model}")
         self.tokenizer = AutoTokenizer.from_pretrained(llm_model)
@@ -118,26 +183,30 @@ class AdvancedRAGPipeline:
         text = re.sub(r'[^\w\s.,;:!?()\-\'\"]+', '', text)
         return text.strip()
     
-    def chunk_text(self, text: str, metadata: Dict) -> List[Dict]:
+    def chunk_text(self, text: str, metadata: Dict) -> List[ChunkSpan]:
         """Split text into overlapping chunks with metadata"""
-        words = text.split()
-        chunks = []
-        
-        for i in range(0, len(words), self.chunk_size - self.chunk_overlap):
-            chunk_words = words[i:i + self.chunk_size]
-            chunk_text = ' '.join(chunk_words)
+        # Chunks are offsets into text; chunk_index/token_count are added on demand
+        return self.chunker.chunk_page(PageText(text, metadata, chunk_info=True), min_chars=51)
+    
+    def iter_chunk_records(self, pdf_files: List[Path]) -> Iterator[ChunkSpan]:
+        """Lazily turn PDFs into chunk records (id, text, metadata) ready for embedding"""
+        # Pages are extracted in parallel but arrive in file/page order
+        for page_data in self.extractor.iter_pages(pdf_files):
+            cleaned_text = self.clean_text(page_data['text'])
             
-            if len(chunk_text.strip()) > 50:
-                chunks.append({
-                    'text': chunk_text,
-                    'metadata': {
-                        **metadata,
-                        'chunk_index': len(chunks),
-                        'word_count': len(chunk_words)
-                    }
-                })
-        
-        return chunks
+            # Content-addressed IDs, so re-ingesting unchanged text is a no-op
+            yield from self.chunk_text(
+                cleaned_text,
+                {
+                    'source': page_data['source'],
+                    'page': page_data['page_num'],
+                    'total_pages': page_data['total_pages']
+                }
+            )
+    
+    def _track_ingestion(self, ingestion: IngestionPipeline):
+        """Keep the running ingestion so its live counters can be polled"""
+        self.ingestion = ingestion
     
     def ingest_pdfs(self) -> int:
         """Ingest all PDFs from data directory"""
@@ -145,115 +214,229 @@ class AdvancedRAGPipeline:
             logger.error(f"Data directory not found: {self.data_dir}")
             return 0
         
-        pdf_files = list(self.data_dir.glob("*.pdf"))
+        pdf_files = collect_pdf_files(self.data_dir)
         if not pdf_files:
             logger.warning(f"No PDF files found in {self.data_dir}")
             return 0
         
         logger.info(f"Found {len(pdf_files)} PDF files to process")
+        return self.ingest_files(pdf_files, resumable=True)
+    
+    def ingest_files(self, pdf_files: List[Path], resumable: bool = False) -> int:
+        """
+        Ingest (or re-index) just the given PDFs
         
-        all_chunks = []
-        all_embeddings = []
-        all_ids = []
-        all_metadatas = []
+        Chunks are upserted, so queries keep being served from the collection
+        while it runs; chunks of these files whose text changed are pruned.
         
-        for pdf_path in pdf_files:
-            logger.info(f"Processing: {pdf_path.name}")
+        Args:
+            pdf_files: PDF paths to index
+            resumable: Log stored batches to the checkpoint so a killed run
+                resumes. Only full data-directory runs use it; a single-file
+                ingest would otherwise replace an interrupted run's log.
             
-            try:
-                reader = PdfReader(str(pdf_path))
-                
-                for page_num, page in enumerate(reader.pages):
-                    text = page.extract_text()
-                    
-                    if text.strip():
-                        cleaned_text = self.clean_text(text)
-                        
-                        # Create chunks
-                        chunks = self.chunk_text(
-                            cleaned_text,
-                            {
-                                'source': pdf_path.name,
-                                'page': page_num + 1,
-                                'total_pages': len(reader.pages)
-                            }
-                        )
-                        
-                        for chunk in chunks:
-                            chunk_id = f"{pdf_path.stem}_p{page_num+1}_c{chunk['metadata']['chunk_index']}"
-                            
-                            all_chunks.append(chunk['text'])
-                            all_ids.append(chunk_id)
-                            all_metadatas.append(chunk['metadata'])
-                
-                logger.info(f"✓ Processed {pdf_path.name}: {len(reader.pages)} pages")
-                
-            except Exception as e:
-                logger.error(f"Error processing {pdf_path.name}: {str(e)}")
-                continue
-        
-        if not all_chunks:
+        Returns:
+            Number of chunks produced
+        """
+        checkpoint = self.checkpoint if resumable else None
+        resumed = checkpoint is not None and checkpoint.begin(ingest_run_key(pdf_files, self.chunker.signature))
+        deduplicator = ChunkDeduplicator() if config.DEDUP_ENABLED else None
+        # Fully stored files need not even be extracted again; dedup is per
+        # document, so the interrupted file is replayed from its start
+        chunks = self.iter_chunk_records(checkpoint.pending_files(pdf_files) if resumed else pdf_files)
+        if deduplicator is not None:
+            chunks = deduplicator.filter(chunks)
+        
+        # Stream page -> chunk -> embedding batch -> ChromaDB batch
+        stats = ingest_chunk_stream(
+            chunks,
+            self.embedding_model,
+            self.collection,
+            batch_size=self.ingest_batch_size,
+            upsert=True,
+            embedding_cache=self.embedding_cache,
+            skip_existing=True,
+            on_start=self._track_ingestion,
+            checkpoint=checkpoint,
+            lexical_index=self.lexical_index
+        )
+        stats['dedup'] = deduplicator.stats() if deduplicator is not None else None
+        self.last_ingest_stats = stats
+        
+        if stats['produced'] == 0:
+            if checkpoint is not None:
+                checkpoint.complete()
             logger.error("No text chunks extracted from PDFs")
             return 0
         
-        # Generate embeddings
-        logger.info(f"Generating embeddings for {len(all_chunks)} chunks...")
-        all_embeddings = self.embedding_model.encode(
-            all_chunks,
-            show_progress_bar=True,
-            convert_to_numpy=True
-        ).tolist()
-        
-        # Add to ChromaDB
-        logger.info("Adding to vector database...")
-        self.collection.add(
-            ids=all_ids,
-            embeddings=all_embeddings,
-            documents=all_chunks,
-            metadatas=all_metadatas
+        # Remove chunks whose text changed since the last ingestion
+        prune_stale_chunks(self.collection, stats['ids_by_source'])
+        if checkpoint is not None:
+            checkpoint.complete()
+        if self.lexical_index is not None:
+            self.lexical_index.sync(self.collection)
+        
+        logger.info(f"✅ Successfully ingested {stats['produced']} text chunks ({stats['skipped_existing']} already stored)!")
+        return stats['produced']
+    
+    def remove_document(self, name: str) -> int:
+        """
+        Remove one document's chunks from the collection
+        
+        Args:
+            name: PDF file name, as stored in the chunks' 'source' metadata
+            
+        Returns:
+            Number of chunks deleted
+        """
+        deleted = delete_source_chunks(self.collection, name)
+        if self.lexical_index is not None:
+            self.lexical_index.sync(self.collection)
+        return deleted
+    
+    def export_snapshot(self, path: str) -> Dict:
+        """
+        Write the collection to a snapshot archive (see snapshot.py)
+        
+        Args:
+            path: Archive to create
+            
+        Returns:
+            The snapshot's manifest
+        """
+        return export_snapshot(
+            self.collection,
+            Path(path),
+            self.embedding_key,
+            data_dir=self.data_dir,
+            chunking=self.chunker.signature
         )
+    
+    def import_snapshot(self, path: str, replace: bool = False) -> int:
+        """
+        Load the collection from a snapshot archive instead of ingesting
         
-        logger.info(f"✅ Successfully ingested {len(all_chunks)} text chunks!")
-        return len(all_chunks)
+        Args:
+            path: Snapshot archive made with export_snapshot()
+            replace: Overwrite a non-empty collection
+            
+        Returns:
+            Number of chunks loaded
+        """
+        self.collection, snapshot = import_snapshot(
+            Path(path),
+            self.chroma_client,
+            self.collection_name,
+            self.embedding_key,
+            chunking=self.chunker.signature,
+            dim=self.embedding_model.get_sentence_embedding_dimension(),
+            replace=replace
+        )
+        if self.lexical_index is not None:
+            self.lexical_index.sync(self.collection)
+        return snapshot['count']
     
     def retrieve(self, query: str, top_k: int = 3) -> List[Dict]:
         """Retrieve relevant documents for a query with improved relevance"""
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode(query).tolist()
+        return self.retrieve_many([query], top_k=top_k)[0]
+
+    def retrieve_expanded(self, question: str, top_k: int = 3) -> List[Dict]:
+        """
+        Retrieve for a question and its synonym variants, merged by reciprocal rank fusion
+
+        All variants are embedded in one batch and searched with one
+        multi-vector query; documents several variants agree on rank first.
+        """
+        variants = self._expand_query(question)
+        if len(variants) == 1:
+            return self.retrieve(question, top_k=top_k)
+
+        rankings = self.retrieve_many(variants, top_k=top_k * 2)
+        docs = {doc['id']: doc for ranking in rankings for doc in ranking}
+        fused = reciprocal_rank_fusion([[doc['id'] for doc in ranking] for ranking in rankings])
+        return [dict(docs[chunk_id], score=score) for chunk_id, score in fused[:top_k]]
+
+    def retrieve_many(self, queries: List[str], top_k: int = 3) -> List[List[Dict]]:
+        """Retrieve for several queries with one encode and one ChromaDB query"""
+        if not queries:
+            return []
+        
+        # Generate query embeddings (one batch for the ones not cached)
+        query_embeddings = self.query_cache.encode_many(self.embedding_model, self.embedding_key, queries).tolist()
+        
+        if self.lexical_index is not None and len(self.lexical_index):
+            # Hybrid: vector and BM25 candidates, fused
+            candidates = max(config.HYBRID_CANDIDATES, top_k)
+            results = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=candidates
+            )
+            return self._fuse_results(queries, results, candidates, top_k)
         
         # Query ChromaDB with more results for better filtering
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=query_embeddings,
             n_results=min(top_k * 2, 10)  # Get more candidates
         )
         
+        return [self._filter_results(query, results, q, top_k) for q, query in enumerate(queries)]
+    
+    def _fuse_results(self, queries: List[str], results: Dict, candidates: int, top_k: int) -> List[List[Dict]]:
+        """Merge each query's vector hits with its BM25 hits and keep the top_k"""
+        docs = {}
+        fused_ids = []
+        for q, query in enumerate(queries):
+            vector_ids = results['ids'][q]
+            distances = results['distances'][q] if results.get('distances') else [None] * len(vector_ids)
+            for i, chunk_id in enumerate(vector_ids):
+                docs[chunk_id] = {
+                    'id': chunk_id,
+                    'text': results['documents'][q][i],
+                    'source': results['metadatas'][q][i].get('source', 'Unknown'),
+                    'page': results['metadatas'][q][i].get('page', 'N/A'),
+                    'distance': distances[i]
+                }
+            lexical_hits = self.lexical_index.search(query, candidates)
+            if config.HYBRID_FUSION == "weighted" and distances[:1] != [None]:
+                fused = weighted_score_fusion(list(zip(vector_ids, distances)), lexical_hits)
+            else:
+                fused = reciprocal_rank_fusion([vector_ids, [chunk_id for chunk_id, _ in lexical_hits]])
+            fused_ids.append(fused[:top_k])
+        
+        # Keyword-only hits weren't in the vector results; fetch them in one call
+        missing = list({chunk_id for fused in fused_ids for chunk_id, _ in fused if chunk_id not in docs})
+        if missing:
+            fetched = self.collection.get(ids=missing, include=['documents', 'metadatas'])
+            for chunk_id, text, metadata in zip(fetched['ids'], fetched['documents'], fetched['metadatas']):
+                docs[chunk_id] = {
+                    'id': chunk_id,
+                    'text': text,
+                    'source': (metadata or {}).get('source', 'Unknown'),
+                    'page': (metadata or {}).get('page', 'N/A'),
+                    'distance': None
+                }
+        
+        return [
+            [dict(docs[chunk_id], score=score) for chunk_id, score in fused if chunk_id in docs]
+            for fused in fused_ids
+        ]
+    
+    def _filter_results(self, query: str, results: Dict, q: int, top_k: int) -> List[Dict]:
+        """Format one query's ChromaDB results and keep the keyword-relevant ones"""
         # Format results
         retrieved_docs = []
-        if results['documents'] and len(results['documents'][0]) > 0:
-            for i in range(len(results['documents'][0])):
+        if results['documents'] and len(results['documents'][q]) > 0:
+            for i in range(len(results['documents'][q])):
                 doc = {
-                    'text': results['documents'][0][i],
-                    'source': results['metadatas'][0][i].get('source', 'Unknown'),
-                    'page': results['metadatas'][0][i].get('page', 'N/A'),
-                    'distance': results['distances'][0][i] if 'distances' in results else None
+                    'id': results['ids'][q][i],
+                    'text': results['documents'][q][i],
+                    'source': results['metadatas'][q][i].get('source', 'Unknown'),
+                    'page': results['metadatas'][q][i].get('page', 'N/A'),
+                    'distance': results['distances'][q][i] if 'distances' in results else None
                 }
                 retrieved_docs.append(doc)
         
-        # Filter by relevance - only keep documents that contain keywords from query
-        query_keywords = set(query.lower().split())
-        relevant_docs = []
-        
-        for doc in retrieved_docs:
-            text_lower = doc['text'].lower()
-            # Check if document contains any query keywords
-            keywords_found = sum(1 for word in query_keywords if len(word) > 3 and word in text_lower)
-            
-            # Only include if it has at least some relevance
-            if keywords_found > 0 or len(query_keywords) <= 2:
-                relevant_docs.append(doc)
-        
-        # Return top_k most relevant
-        return relevant_docs[:top_k] if relevant_docs else retrieved_docs[:top_k]
+        return keyword_filter(query, retrieved_docs, top_k)
     
     def web_search(self, query: str, num_results: int = 3) -> List[Dict]:
         """
@@ -398,16 +581,9 @@ Answer:"""
         Complete RAG query: retrieve + generate + optional web search
         """
         try:
-            # Expand query with synonyms for better retrieval
-            expanded_query = self._expand_query(question)
-            
-            # Retrieve from local knowledge base
+            # Retrieve from local knowledge base (question plus synonym variants)
             logger.info(f"Retrieving top {top_k} documents for: {question}")
-            retrieved_docs = self.retrieve(expanded_query, top_k=top_k)
-            
-            # If no relevant docs, try with original query
-            if not retrieved_docs:
-                retrieved_docs = self.retrieve(question, top_k=top_k)
+            retrieved_docs = self.retrieve_expanded(question, top_k=top_k)
             
             # Optionally perform web search
             web_docs = []
@@ -466,25 +642,9 @@ Answer:"""
                 'error': str(e)
             }
     
-    def _expand_query(self, query: str) -> str:
-        """Add synonyms to query for better retrieval"""
-        expansions = {
-            'rights': ['rights', 'protection', 'entitlements'],
-            'worker': ['worker', 'employee', 'labor'],
-            'consumer': ['consumer', 'customer', 'buyer'],
-            'law': ['law', 'regulation', 'act', 'legislation'],
-        }
-        
-        query_lower = query.lower()
-        expanded_terms = [query]
-        
-        for term, synonyms in expansions.items():
-            if term in query_lower:
-                for syn in synonyms:
-                    if syn not in query_lower:
-                        expanded_terms.append(query.replace(term, syn))
-        
-        return " ".join(expanded_terms)
+    def _expand_query(self, query: str) -> List[str]:
+        """The query and its synonym variants (see query_synonyms.json)"""
+        return self.query_expander.expand(query)
     
     def _is_answer_relevant(self, answer: str, question: str) -> bool:
         """Check if answer is relevant to the question"""
@@ -5,7 +5,7 @@ Improved retrieval, generation, and error handling
 
 import os
 import logging
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterator
 from pathlib import Path
 import re
 
@@ -14,12 +14,8 @@ os.environ['TRANSFORMERS_NO_TF'] = '1'
 os.environ['USE_TORCH'] = '1'
 
 # PDF processing
-from pypdf import PdfReader
 
 # Embeddings and vector store
-from sentence_transformers import SentenceTransformer
-import chromadb
-from chromadb.config import Settings
 
 # LLM for generation
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
@@ -28,6 +24,19 @@ import torch
 # Prompts
 from prompts import RAG_PROMPT_TEMPLATE, SYSTEM_PROMPT
 
+import config
+from pdf_extraction import ParallelPdfExtractor
+from page_cache import PageTextCache
+from dedup import ChunkDeduplicator, collect_pdf_files
+from chunking import TokenChunker, PageText, ChunkSpan
+from ingestion import ingest_chunk_stream, prune_stale_chunks, delete_source_chunks, IngestionPipeline
+from ingest_checkpoint import IngestCheckpoint, checkpoint_path_for, ingest_run_key
+from snapshot import export_snapshot, import_snapshot
+from embedding_cache import EmbeddingCache
+from embedders import create_embedder, embedding_cache_key
+from query_cache import shared_query_cache
+from vector_store import open_vector_client
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -44,9 +53,11 @@ class EnhancedRAGPipeline:
         db_dir: str = "db",
         embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
         llm_model: str = "google/flan-t5-base",
-        chunk_size: int = 600,
-        chunk_overlap: int = 100,
-        collection_name: str = "legal_docs"
+        chunk_size: Optional[int] = config.CHUNK_MAX_TOKENS,
+        chunk_overlap: int = config.CHUNK_OVERLAP_TOKENS,
+        collection_name: str = "legal_docs",
+        extraction_workers: int = config.EXTRACTION_WORKERS,
+        ingest_batch_size: int = config.INGEST_BATCH_SIZE
     ):
         """
         Initialize Enhanced RAG pipeline
@@ -56,17 +67,37 @@ class EnhancedRAGPipeline:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.collection_name = collection_name
+        self.ingest_batch_size = ingest_batch_size
+        self.last_ingest_stats: Dict = {}  # Per-stage throughput and queue depths of the last run
+        self.ingestion: Optional[IngestionPipeline] = None  # Running (or last) ingestion, for live progress
+        self.checkpoint = IngestCheckpoint(checkpoint_path_for(self.db_dir, collection_name))
+        self.extractor = ParallelPdfExtractor(
+            workers=extraction_workers,
+            page_cache=PageTextCache(self.db_dir.parent / config.CACHE_DIR) if config.PAGE_CACHE_ENABLED else None
+        )
         
         logger.info("Initializing Enhanced RAG Pipeline...")
         
         # Initialize embedding model
         logger.info(f"Loading embedding model: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model)
+        self.embedding_model = create_embedder(embedding_model, self.db_dir.parent / config.CACHE_DIR)
+        self.chunker = TokenChunker.from_model(
+            self.embedding_model,
+            max_tokens=chunk_size,
+            overlap_tokens=chunk_overlap
+        )
+        
+        # Reuse embeddings of unchanged chunk text across rebuilds
+        self.embedding_key = embedding_cache_key(embedding_model)  # Model id the stored vectors belong to
+        self.query_cache = shared_query_cache()  # Process-wide, so every pipeline instance shares hits
+        self.embedding_cache = (
+            EmbeddingCache(self.db_dir.parent / config.CACHE_DIR, self.embedding_key)
+            if config.EMBEDDING_CACHE_ENABLED else None
+        )
         
-        # Initialize ChromaDB
-        logger.info(f"Initializing ChromaDB at {self.db_dir}")
-        self.db_dir.mkdir(parents=True, exist_ok=True)
-        self.chroma_client = chromadb.PersistentClient(path=str(self.db_dir))
+        # Initialize vector store (ChromaDB or the exact NumPy index)
+        logger.info(f"Initializing vector store at {self.db_dir}")
+        self.chroma_client = open_vector_client(self.db_dir, self.collection_name)
         
         # Get or create collection
         try:
@@ -102,28 +133,32 @@ class EnhancedRAGPipeline:
         text = re.sub(r'[^\w\s.,;:!?()\-\'\"]+', '', text)
         return text.strip()
     
-    def chunk_text(self, text: str, metadata: Dict) -> List[Dict]:
+    def chunk_text(self, text: str, metadata: Dict) -> List[ChunkSpan]:
         """
         Split text into overlapping chunks with metadata
         """
-        words = text.split()
-        chunks = []
-        
-        for i in range(0, len(words), self.chunk_size - self.chunk_overlap):
-            chunk_words = words[i:i + self.chunk_size]
-            chunk_text = ' '.join(chunk_words)
+        # Chunks are offsets into text; chunk_index/token_count are added on demand
+        return self.chunker.chunk_page(PageText(text, metadata, chunk_info=True), min_chars=51)
+    
+    def iter_chunk_records(self, pdf_files: List[Path]) -> Iterator[ChunkSpan]:
+        """Lazily turn PDFs into chunk records (id, text, metadata) ready for embedding"""
+        # Pages are extracted in parallel but arrive in file/page order
+        for page_data in self.extractor.iter_pages(pdf_files):
+            cleaned_text = self.clean_text(page_data['text'])
             
-            if len(chunk_text.strip()) > 50:  # Minimum chunk size
-                chunks.append({
-                    'text': chunk_text,
-                    'metadata': {
-                        **metadata,
-                        'chunk_index': len(chunks),
-                        'word_count': len(chunk_words)
-                    }
-                })
-        
-        return chunks
+            # Content-addressed IDs, so re-ingesting unchanged text is a no-op
+            yield from self.chunk_text(
+                cleaned_text,
+                {
+                    'source': page_data['source'],
+                    'page': page_data['page_num'],
+                    'total_pages': page_data['total_pages']
+                }
+            )
+    
+    def _track_ingestion(self, ingestion: IngestionPipeline):
+        """Keep the running ingestion so its live counters can be polled"""
+        self.ingestion = ingestion
     
     def ingest_pdfs(self) -> int:
         """
@@ -133,102 +168,157 @@ class EnhancedRAGPipeline:
             logger.error(f"Data directory not found: {self.data_dir}")
             return 0
         
-        pdf_files = list(self.data_dir.glob("*.pdf"))
+        pdf_files = collect_pdf_files(self.data_dir)
         if not pdf_files:
             logger.warning(f"No PDF files found in {self.data_dir}")
             return 0
         
         logger.info(f"Found {len(pdf_files)} PDF files to process")
+        return self.ingest_files(pdf_files, resumable=True)
+    
+    def ingest_files(self, pdf_files: List[Path], resumable: bool = False) -> int:
+        """
+        Ingest (or re-index) just the given PDFs
         
-        all_chunks = []
-        all_embeddings = []
-        all_ids = []
-        all_metadatas = []
+        Chunks are upserted, so queries keep being served from the collection
+        while it runs; chunks of these files whose text changed are pruned.
         
-        for pdf_path in pdf_files:
-            logger.info(f"Processing: {pdf_path.name}")
+        Args:
+            pdf_files: PDF paths to index
+            resumable: Log stored batches to the checkpoint so a killed run
+                resumes. Only full data-directory runs use it; a single-file
+                ingest would otherwise replace an interrupted run's log.
             
-            try:
-                reader = PdfReader(str(pdf_path))
-                
-                for page_num, page in enumerate(reader.pages):
-                    text = page.extract_text()
-                    
-                    if text.strip():
-                        cleaned_text = self.clean_text(text)
-                        
-                        # Create chunks
-                        chunks = self.chunk_text(
-                            cleaned_text,
-                            {
-                                'source': pdf_path.name,
-                                'page': page_num + 1,
-                                'total_pages': len(reader.pages)
-                            }
-                        )
-                        
-                        for chunk in chunks:
-                            chunk_id = f"{pdf_path.stem}_p{page_num+1}_c{chunk['metadata']['chunk_index']}"
-                            
-                            all_chunks.append(chunk['text'])
-                            all_ids.append(chunk_id)
-                            all_metadatas.append(chunk['metadata'])
-                
-                logger.info(f"✓ Processed {pdf_path.name}: {len(reader.pages)} pages")
-                
-            except Exception as e:
-                logger.error(f"Error processing {pdf_path.name}: {str(e)}")
-                continue
+        Returns:
+            Number of chunks produced
+        """
+        checkpoint = self.checkpoint if resumable else None
+        resumed = checkpoint is not None and checkpoint.begin(ingest_run_key(pdf_files, self.chunker.signature))
+        deduplicator = ChunkDeduplicator() if config.DEDUP_ENABLED else None
+        # Fully stored files need not even be extracted again; dedup is per
+        # document, so the interrupted file is replayed from its start
+        chunks = self.iter_chunk_records(checkpoint.pending_files(pdf_files) if resumed else pdf_files)
+        if deduplicator is not None:
+            chunks = deduplicator.filter(chunks)
+        
+        # Stream page -> chunk -> embedding batch -> ChromaDB batch
+        stats = ingest_chunk_stream(
+            chunks,
+            self.embedding_model,
+            self.collection,
+            batch_size=self.ingest_batch_size,
+            upsert=True,
+            embedding_cache=self.embedding_cache,
+            skip_existing=True,
+            on_start=self._track_ingestion,
+            checkpoint=checkpoint
+        )
+        stats['dedup'] = deduplicator.stats() if deduplicator is not None else None
+        self.last_ingest_stats = stats
         
-        if not all_chunks:
+        if stats['produced'] == 0:
+            if checkpoint is not None:
+                checkpoint.complete()
             logger.error("No text chunks extracted from PDFs")
             return 0
         
-        # Generate embeddings
-        logger.info(f"Generating embeddings for {len(all_chunks)} chunks...")
-        all_embeddings = self.embedding_model.encode(
-            all_chunks,
-            show_progress_bar=True,
-            convert_to_numpy=True
-        ).tolist()
+        # Remove chunks whose text changed since the last ingestion
+        prune_stale_chunks(self.collection, stats['ids_by_source'])
+        if checkpoint is not None:
+            checkpoint.complete()
+        
+        logger.info(f"✅ Successfully ingested {stats['produced']} text chunks ({stats['skipped_existing']} already stored)!")
+        return stats['produced']
+    
+    def remove_document(self, name: str) -> int:
+        """
+        Remove one document's chunks from the collection
         
-        # Add to ChromaDB
-        logger.info("Adding to vector database...")
-        self.collection.add(
-            ids=all_ids,
-            embeddings=all_embeddings,
-            documents=all_chunks,
-            metadatas=all_metadatas
+        Args:
+            name: PDF file name, as stored in the chunks' 'source' metadata
+            
+        Returns:
+            Number of chunks deleted
+        """
+        return delete_source_chunks(self.collection, name)
+    
+    def export_snapshot(self, path: str) -> Dict:
+        """
+        Write the collection to a snapshot archive (see snapshot.py)
+        
+        Args:
+            path: Archive to create
+            
+        Returns:
+            The snapshot's manifest
+        """
+        return export_snapshot(
+            self.collection,
+            Path(path),
+            self.embedding_key,
+            data_dir=self.data_dir,
+            chunking=self.chunker.signature
         )
+    
+    def import_snapshot(self, path: str, replace: bool = False) -> int:
+        """
+        Load the collection from a snapshot archive instead of ingesting
         
-        logger.info(f"✅ Successfully ingested {len(all_chunks)} text chunks!")
-        return len(all_chunks)
+        Args:
+            path: Snapshot archive made with export_snapshot()
+            replace: Overwrite a non-empty collection
+            
+        Returns:
+            Number of chunks loaded
+        """
+        self.collection, snapshot = import_snapshot(
+            Path(path),
+            self.chroma_client,
+            self.collection_name,
+            self.embedding_key,
+            chunking=self.chunker.signature,
+            dim=self.embedding_model.get_sentence_embedding_dimension(),
+            replace=replace
+        )
+        return snapshot['count']
     
     def retrieve(self, query: str, top_k: int = 3) -> List[Dict]:
         """
         Retrieve relevant documents for a query
         """
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode(query).tolist()
+        return self.retrieve_many([query], top_k=top_k)[0]
+    
+    def retrieve_many(self, queries: List[str], top_k: int = 3) -> List[List[Dict]]:
+        """
+        Retrieve relevant documents for several queries with one encode and one query
+        """
+        if not queries:
+            return []
+        
+        # Generate query embeddings (one batch for the ones not cached)
+        query_embeddings = self.query_cache.encode_many(self.embedding_model, self.embedding_key, queries).tolist()
         
         # Query ChromaDB
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=query_embeddings,
             n_results=top_k
         )
         
         # Format results
-        retrieved_docs = []
-        if results['documents'] and len(results['documents'][0]) > 0:
-            for i in range(len(results['documents'][0])):
-                retrieved_docs.append({
-                    'text': results['documents'][0][i],
-                    'source': results['metadatas'][0][i].get('source', 'Unknown'),
-                    'page': results['metadatas'][0][i].get('page', 'N/A'),
-                    'distance': results['distances'][0][i] if 'distances' in results else None
-                })
+        all_docs = []
+        for q in range(len(queries)):
+            retrieved_docs = []
+            if results['documents'] and len(results['documents'][q]) > 0:
+                for i in range(len(results['documents'][q])):
+                    retrieved_docs.append({
+                        'text': results['documents'][q][i],
+                        'source': results['metadatas'][q][i].get('source', 'Unknown'),
+                        'page': results['metadatas'][q][i].get('page', 'N/A'),
+                        'distance': results['distances'][q][i] if 'distances' in results else None
+                    })
+            all_docs.append(retrieved_docs)
         
-        return retrieved_docs
+        return all_docs
     
     def generate_answer(self, query: str, context_docs: List[Dict]) -> str:
         """
@@ -4,38 +4,60 @@ Handles PDF ingestion, embeddings, retrieval, and generation
 """
 
 import os
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
 from transformers import pipeline
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader
-import uuid
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Iterator
 from pathlib import Path
 
+import config
+from ingestion import ingest_chunk_stream, chunk_id, prune_stale_chunks
+from embedding_cache import EmbeddingCache
+from embedders import create_embedder, embedding_cache_key
+from query_cache import shared_query_cache
+from vector_store import open_vector_client
+from dedup import ChunkDeduplicator, collect_pdf_files
+from ingest_manifest import IngestManifest, manifest_path_for
+
 class SustainabilityRAGPipeline:
     """Main RAG pipeline for sustainability advisor"""
     
-    def __init__(self, db_path: str = "./db_sustainability", model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        db_path: str = "./db_sustainability",
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        ingest_batch_size: int = config.INGEST_BATCH_SIZE
+    ):
         """
         Initialize RAG pipeline
         
         Args:
             db_path: Path to ChromaDB directory
             model_name: HuggingFace model for embeddings
+            ingest_batch_size: Chunks embedded and stored per ingestion batch
         """
+        self.ingest_batch_size = ingest_batch_size
+        self.last_ingest_stats: Dict[str, Any] = {}
+        
         # Initialize embedding model
         print("Loading embedding model...")
-        self.embedding_model = SentenceTransformer(model_name)
+        self.embedding_model = create_embedder(model_name, Path(db_path).parent / config.CACHE_DIR)
+        self.embedding_key = embedding_cache_key(model_name)
+        self.query_cache = shared_query_cache()
+        self.embedding_cache = (
+            EmbeddingCache(Path(db_path).parent / config.CACHE_DIR, self.embedding_key)
+            if config.EMBEDDING_CACHE_ENABLED else None
+        )
         
-        # Initialize ChromaDB
-        print("Initializing ChromaDB...")
-        self.client = chromadb.PersistentClient(path=db_path)
+        # Initialize vector store (ChromaDB or the exact NumPy index)
+        print("Initializing vector store...")
+        self.client = open_vector_client(Path(db_path), "sustainability_knowledge")
         self.collection = self.client.get_or_create_collection(
             name="sustainability_knowledge",
             metadata={"hnsw:space": "cosine"}
         )
+        # Which PDF versions the collection holds, so removed and replaced ones are pruned
+        self.manifest = IngestManifest(manifest_path_for(Path(db_path), "sustainability_knowledge"))
         
         # Initialize LLM pipeline
         print("Loading generation model...")
@@ -49,9 +71,39 @@ class SustainabilityRAGPipeline:
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=500,
             chunk_overlap=50,
-            length_function=len
+            length_function=len,
+            add_start_index=True
         )
         
+    def _iter_chunk_records(self, pdf_files: List[Path]) -> Iterator[Dict[str, Any]]:
+        """Lazily load PDFs page by page and yield chunk records for ChromaDB"""
+        for pdf_path in pdf_files:
+            print(f"Processing {pdf_path.name}...")
+            try:
+                # Load PDF one page at a time
+                loader = PyPDFLoader(str(pdf_path))
+                chunk_index = 0
+                
+                for page in loader.lazy_load():
+                    # Split into chunks
+                    for chunk in self.text_splitter.split_documents([page]):
+                        page_num = chunk.metadata.get("page", 0)
+                        yield {
+                            # Content-addressed, so re-ingesting unchanged text is a no-op
+                            "id": chunk_id(pdf_path.name, page_num, chunk.metadata.get("start_index", chunk_index), chunk.page_content),
+                            "text": chunk.page_content,
+                            "metadata": {
+                                "document": pdf_path.name,
+                                "page": page_num,
+                                "chunk_index": chunk_index
+                            }
+                        }
+                        chunk_index += 1
+                    
+            except Exception as e:
+                print(f"Error processing {pdf_path.name}: {e}")
+                continue
+    
     def ingest_pdfs(self, pdf_directory: str) -> Dict[str, Any]:
         """
         Ingest PDF documents from directory
@@ -62,59 +114,57 @@ class SustainabilityRAGPipeline:
         Returns:
             Dictionary with ingestion statistics
         """
-        pdf_files = list(Path(pdf_directory).glob("*.pdf"))
+        pdf_files = collect_pdf_files(Path(pdf_directory), extra_dirs=[])
+        changes = self.manifest.diff(pdf_files)
+        
+        # Drop chunks of removed and replaced PDFs before streaming: skip_existing
+        # would otherwise keep their old chunk_index metadata on unchanged IDs
+        if self.manifest.files:
+            stale = changes["removed"] + [pdf_path.name for pdf_path in changes["changed"]]
+        else:
+            # Collections built before the manifest existed: rewrite every stored document once
+            stored = self.collection.get(include=["metadatas"])["metadatas"]
+            stale = sorted({metadata["document"] for metadata in stored if metadata and metadata.get("document")})
+        if stale:
+            prune_stale_chunks(self.collection, {name: set() for name in stale}, source_key="document")
+            for name in stale:
+                self.manifest.forget(name)
+            self.manifest.save()
         
         if not pdf_files:
             return {"status": "error", "message": "No PDF files found"}
         
-        all_chunks = []
-        all_metadatas = []
-        all_ids = []
+        chunks = self._iter_chunk_records(pdf_files)
+        deduplicator = ChunkDeduplicator() if config.DEDUP_ENABLED else None
+        if deduplicator is not None:
+            chunks = deduplicator.filter(chunks)
         
-        for pdf_path in pdf_files:
-            print(f"Processing {pdf_path.name}...")
-            try:
-                # Load PDF
-                loader = PyPDFLoader(str(pdf_path))
-                documents = loader.load()
-                
-                # Split into chunks
-                chunks = self.text_splitter.split_documents(documents)
-                
-                # Prepare data for ChromaDB
-                for i, chunk in enumerate(chunks):
-                    chunk_id = str(uuid.uuid4())
-                    all_chunks.append(chunk.page_content)
-                    all_metadatas.append({
-                        "document": pdf_path.name,
-                        "page": chunk.metadata.get("page", 0),
-                        "chunk_index": i
-                    })
-                    all_ids.append(chunk_id)
-                    
-            except Exception as e:
-                print(f"Error processing {pdf_path.name}: {e}")
-                continue
+        # Stream page -> chunk -> embedding batch -> ChromaDB batch
+        print("Generating embeddings and storing in ChromaDB...")
+        stats = ingest_chunk_stream(
+            chunks,
+            self.embedding_model,
+            self.collection,
+            batch_size=self.ingest_batch_size,
+            upsert=True,
+            embedding_cache=self.embedding_cache,
+            skip_existing=True
+        )
+        stats["dedup"] = deduplicator.stats() if deduplicator is not None else None
+        self.last_ingest_stats = stats
         
-        # Add to ChromaDB
-        if all_chunks:
-            # Generate embeddings
-            print("Generating embeddings...")
-            embeddings = self.embedding_model.encode(all_chunks).tolist()
-            
-            # Add to collection
-            print("Storing in ChromaDB...")
-            self.collection.add(
-                ids=all_ids,
-                embeddings=embeddings,
-                documents=all_chunks,
-                metadatas=all_metadatas
-            )
-            
+        if stats["produced"]:
+            # Remove chunks whose text changed since the last ingestion
+            prune_stale_chunks(self.collection, stats["ids_by_source"], source_key="document")
+            for pdf_path in pdf_files:
+                self.manifest.record(pdf_path.name, changes["hashes"][pdf_path.name], stats["per_source"].get(pdf_path.name, 0))
+            self.manifest.save()
             return {
                 "status": "success",
                 "documents_processed": len(pdf_files),
-                "total_chunks": len(all_chunks)
+                "total_chunks": stats["produced"],
+                "new_chunks": stats["chunks"],
+                "duplicate_chunks": deduplicator.exact_dropped + deduplicator.near_dropped if deduplicator else 0
             }
         
         return {"status": "error", "message": "No chunks created"}
@@ -130,30 +180,48 @@ class SustainabilityRAGPipeline:
         Returns:
             List of relevant documents with metadata
         """
+        return self.retrieve_many([query], k=k)[0]
+    
+    def retrieve_many(self, queries: List[str], k: int = 3) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve for several queries with one encoder batch and one ChromaDB query
+        
+        Args:
+            queries: User queries
+            k: Number of results to retrieve per query
+            
+        Returns:
+            One list of relevant documents per query, as retrieve() returns them
+        """
+        if not queries:
+            return []
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode(query).tolist()
+            # Generate query embeddings (one batch for the ones not cached)
+            query_embeddings = self.query_cache.encode_many(self.embedding_model, self.embedding_key, queries).tolist()
             
             # Query ChromaDB
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=query_embeddings,
                 n_results=k
             )
             
             # Format results
-            retrieved_docs = []
-            if results.get('documents') and len(results['documents'][0]) > 0:
-                for i in range(len(results['documents'][0])):
-                    retrieved_docs.append({
-                        "content": results['documents'][0][i],
-                        "metadata": results['metadatas'][0][i] if results.get('metadatas') else {},
-                        "distance": results['distances'][0][i] if results.get('distances') else None
-                    })
+            all_docs = []
+            for q in range(len(queries)):
+                retrieved_docs = []
+                if results.get('documents') and len(results['documents'][q]) > 0:
+                    for i in range(len(results['documents'][q])):
+                        retrieved_docs.append({
+                            "content": results['documents'][q][i],
+                            "metadata": results['metadatas'][q][i] if results.get('metadatas') else {},
+                            "distance": results['distances'][q][i] if results.get('distances') else None
+                        })
+                all_docs.append(retrieved_docs)
             
-            return retrieved_docs
+            return all_docs
         except Exception as e:
             print(f"Retrieval error: {e}")
-            return []
+            return [[] for _ in queries]
     
     def generate_answer(self, query: str, context: str, prompt_template: str) -> str:
         """
@@ -0,0 +1,288 @@
+"""
+Index snapshots for fast cold starts
+Packs a collection (vectors, documents, metadata) with the embedding-model id
+and the source PDF hashes into one versioned archive, and loads it back
+without extracting or embedding anything
+"""
+
+import io
+import json
+import time
+import shutil
+import logging
+import tarfile
+import argparse
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+import config
+from chroma_loader import ChromaBulkLoader
+from dedup import collect_pdf_files
+from ingest_manifest import file_sha256
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "legal-rag-snapshot"
+SNAPSHOT_VERSION = 1
+_READ_PAGE_SIZE = 5000  # Records fetched from ChromaDB per get() while exporting
+
+
+class SnapshotError(Exception):
+    """The archive is damaged or doesn't fit the pipeline importing it"""
+
+
+def export_snapshot(
+    collection,
+    out_path: Path,
+    model_name: str,
+    data_dir: Optional[Path] = None,
+    chunking: str = ""
+) -> Dict:
+    """
+    Write a collection to a snapshot archive
+
+    Args:
+        collection: ChromaDB collection to export
+        out_path: Archive to create (.tar)
+        model_name: Embedding-model id the vectors were made with
+            (embedding_cache_key(), so int8 vectors are told apart)
+        data_dir: PDF directory whose file hashes are recorded
+        chunking: Chunker signature the chunks were made with
+
+    Returns:
+        The snapshot's manifest (snapshot.json)
+    """
+    out_path = Path(out_path)
+    count = collection.count()
+    work_dir = Path(tempfile.mkdtemp(prefix="snapshot_", dir=out_path.parent if out_path.parent.exists() else None))
+    start = time.perf_counter()
+    try:
+        vectors = None
+        with open(work_dir / "records.jsonl", "w", encoding="utf-8") as records:
+            # Paged reads, written straight to disk, so memory doesn't grow with the collection
+            for offset in range(0, count, _READ_PAGE_SIZE):
+                page = collection.get(
+                    limit=_READ_PAGE_SIZE,
+                    offset=offset,
+                    include=["embeddings", "documents", "metadatas"]
+                )
+                embeddings = np.asarray(page["embeddings"], dtype=np.float32)
+                if vectors is None:
+                    vectors = np.lib.format.open_memmap(
+                        work_dir / "vectors.npy", mode="w+", dtype=np.float32, shape=(count, embeddings.shape[1])
+                    )
+                vectors[offset:offset + len(embeddings)] = embeddings
+                for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                    records.write(json.dumps({"id": chunk_id, "document": document, "metadata": metadata}) + "\n")
+        if vectors is None:
+            raise SnapshotError("Collection is empty; nothing to export")
+        dim = int(vectors.shape[1])
+        vectors.flush()
+        del vectors
+
+        pdfs = {}
+        if data_dir is not None and Path(data_dir).exists():
+            pdfs = {pdf_path.name: file_sha256(pdf_path) for pdf_path in collect_pdf_files(Path(data_dir))}
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "created_at": datetime.now().isoformat(),
+            "embedding_model": model_name,
+            "dim": dim,
+            "count": count,
+            "chunking": chunking,
+            "collection_metadata": collection.metadata or {},
+            "pdfs": pdfs,
+            "checksums": {
+                name: file_sha256(work_dir / name) for name in ("vectors.npy", "records.jsonl")
+            }
+        }
+        tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+        with tarfile.open(tmp_path, "w") as archive:
+            data = json.dumps(manifest, indent=2).encode("utf-8")
+            info = tarfile.TarInfo("snapshot.json")
+            info.size = len(data)
+            info.mtime = int(time.time())
+            archive.addfile(info, io.BytesIO(data))
+            archive.add(work_dir / "vectors.npy", arcname="vectors.npy")
+            archive.add(work_dir / "records.jsonl", arcname="records.jsonl")
+        tmp_path.replace(out_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    logger.info(f"Exported {count} chunks to {out_path} in {time.perf_counter() - start:.1f}s")
+    return manifest
+
+
+def read_snapshot_manifest(path: Path) -> Dict:
+    """Read and check an archive's snapshot.json without unpacking the rest"""
+    with tarfile.open(path, "r") as archive:
+        try:
+            manifest = json.load(archive.extractfile("snapshot.json"))
+        except KeyError:
+            raise SnapshotError(f"{path} is not a snapshot (no snapshot.json)")
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"{path} is not a snapshot (format {manifest.get('format')!r})")
+    if manifest.get("version", 0) > SNAPSHOT_VERSION:
+        raise SnapshotError(f"Snapshot version {manifest['version']} is newer than supported ({SNAPSHOT_VERSION})")
+    return manifest
+
+
+def import_snapshot(
+    path: Path,
+    client,
+    collection_name: str,
+    model_name: str,
+    chunking: Optional[str] = None,
+    dim: Optional[int] = None,
+    replace: bool = False
+):
+    """
+    Load a snapshot archive into a collection
+
+    Args:
+        path: Snapshot archive
+        client: ChromaDB client to create the collection with
+        collection_name: Collection to create
+        model_name: Embedding-model id of the importing pipeline; must match
+        chunking: Chunker signature of the importing pipeline; a mismatch is
+            only logged, since queries still work
+        dim: Embedding dimension of the importing model, if known
+        replace: Drop an existing, non-empty collection first
+
+    Returns:
+        (collection, manifest)
+
+    Raises:
+        SnapshotError: Damaged archive, incompatible model/dimension, or a
+            non-empty collection without replace
+    """
+    path = Path(path)
+    start = time.perf_counter()
+    manifest = read_snapshot_manifest(path)
+    if manifest["embedding_model"] != model_name:
+        raise SnapshotError(
+            f"Snapshot vectors are from {manifest['embedding_model']}, this pipeline embeds with {model_name}"
+        )
+    if dim is not None and manifest["dim"] != dim:
+        raise SnapshotError(f"Snapshot vectors have {manifest['dim']} dimensions, the model has {dim}")
+    if chunking is not None and manifest.get("chunking") and manifest["chunking"] != chunking:
+        logger.warning(
+            f"Snapshot was chunked with {manifest['chunking']}, this pipeline uses {chunking}; "
+            "re-ingest to apply the current chunking"
+        )
+
+    # list_collections() returns Collection objects in chromadb < 0.6, names after
+    existing = {getattr(entry, "name", entry) for entry in client.list_collections()}
+    if collection_name in existing:
+        if client.get_collection(name=collection_name).count() and not replace:
+            raise SnapshotError(f"Collection {collection_name} is not empty (use replace=True)")
+        client.delete_collection(collection_name)
+    collection = client.create_collection(
+        name=collection_name,
+        metadata=manifest.get("collection_metadata") or None
+    )
+
+    work_dir = Path(tempfile.mkdtemp(prefix="snapshot_"))
+    try:
+        with tarfile.open(path, "r") as archive:
+            # Refuse links and absolute paths where tarfile supports extraction filters
+            extract_kwargs = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+            for name in ("vectors.npy", "records.jsonl"):
+                archive.extract(name, path=work_dir, **extract_kwargs)
+        for name, checksum in manifest["checksums"].items():
+            if file_sha256(work_dir / name) != checksum:
+                raise SnapshotError(f"{name} in {path} is damaged (checksum mismatch)")
+
+        vectors = np.load(work_dir / "vectors.npy", mmap_mode="r")
+        if vectors.shape != (manifest["count"], manifest["dim"]):
+            raise SnapshotError(f"vectors.npy has shape {vectors.shape}, manifest says {manifest['count']}x{manifest['dim']}")
+
+        loader = ChromaBulkLoader(collection, upsert=False)
+        batch_size = loader.write_batch_size or 5000
+        ids, documents, metadatas = [], [], []
+        offset = 0
+        with open(work_dir / "records.jsonl", "r", encoding="utf-8") as records:
+            for line in records:
+                record = json.loads(line)
+                ids.append(record["id"])
+                documents.append(record["document"])
+                metadatas.append(record["metadata"])
+                if len(ids) == batch_size:
+                    loader.write(ids, vectors[offset:offset + len(ids)].tolist(), documents, metadatas)
+                    offset += len(ids)
+                    ids, documents, metadatas = [], [], []
+        if ids:
+            loader.write(ids, vectors[offset:offset + len(ids)].tolist(), documents, metadatas)
+            offset += len(ids)
+        loader.close()
+        del vectors
+    except Exception:
+        # Don't leave a half-loaded collection behind to be mistaken for a complete one
+        client.delete_collection(collection_name)
+        raise
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if offset != manifest["count"]:
+        client.delete_collection(collection_name)
+        raise SnapshotError(f"records.jsonl has {offset} records, manifest says {manifest['count']}")
+
+    logger.info(f"Imported {offset} chunks from {path} in {time.perf_counter() - start:.1f}s")
+    return collection, manifest
+
+
+def main():
+    from embedders import embedding_cache_key
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write a collection to a snapshot archive")
+    export_parser.add_argument("archive", help="Archive to create, e.g. index.snapshot.tar")
+    export_parser.add_argument("--data-dir", default=config.DATA_DIR, help="PDFs whose hashes are recorded")
+
+    import_parser = subparsers.add_parser("import", help="Load a snapshot archive into a collection")
+    import_parser.add_argument("archive")
+    import_parser.add_argument("--replace", action="store_true", help="Overwrite a non-empty collection")
+
+    for sub in (export_parser, import_parser):
+        sub.add_argument("--db-dir", default=config.DB_DIR)
+        sub.add_argument("--collection", default="legal_docs")
+        sub.add_argument("--model", default=config.EMBEDDING_MODEL)
+    args = parser.parse_args()
+
+    from vector_store import open_vector_client
+    logging.basicConfig(level=logging.INFO)
+    client = open_vector_client(Path(args.db_dir), args.collection)
+    model_name = embedding_cache_key(args.model)
+
+    if args.command == "export":
+        # Recorded so importing pipelines can seed their manifest without re-chunking everything
+        from chunking import TokenChunker
+        from embedders import create_embedder
+        model = create_embedder(args.model, Path(args.db_dir).parent / config.CACHE_DIR)
+        chunking = TokenChunker.from_model(model).signature
+        manifest = export_snapshot(
+            client.get_collection(name=args.collection),
+            Path(args.archive),
+            model_name,
+            Path(args.data_dir),
+            chunking=chunking
+        )
+        print(f"Exported {manifest['count']} chunks ({manifest['dim']} dims, {len(manifest['pdfs'])} PDFs) to {args.archive}")
+    else:
+        try:
+            _, manifest = import_snapshot(Path(args.archive), client, args.collection, model_name, replace=args.replace)
+        except SnapshotError as e:
+            parser.exit(1, f"Import failed: {e}\n")
+        print(f"Imported {manifest['count']} chunks into {args.db_dir}/{args.collection}")
+
+
+if __name__ == "__main__":
+    main()
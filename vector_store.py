@@ -0,0 +1,644 @@
+"""
+Vector store backends behind the pipelines' `collection`
+An exact in-process NumPy index for small corpora (one matrix product per
+query, no HNSW or SQLite round trip) and ChromaDB for large ones, both used
+through ChromaDB's client/collection interface
+"""
+
+import os
+import json
+import shutil
+import argparse
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+import config
+from chroma_loader import ChromaBulkLoader
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("auto", "chroma", "numpy")
+NUMPY_STORE_DIR = "numpy_store"  # Under the DB directory, next to ChromaDB's files
+_TABLE_FORMAT = "numpy-vector-store"
+_TABLE_VERSION = 2  # 2 added log.jsonl; version 1 stores are read as a base without a log
+_MIN_COMPACT_ROWS = 4096  # Logged rows that never trigger a compaction, however small the base
+_COPY_PAGE_SIZE = 5000  # Records per get() when copying a collection between backends
+_MISSING = object()
+
+
+def _compare(op: str, value, operand) -> bool:
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if value is _MISSING or value is None:
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    raise ValueError(f"Unsupported where operator {op}")
+
+
+def matches_where(metadata: Optional[Dict], where: Dict) -> bool:
+    """Whether a record's metadata satisfies a ChromaDB-style where filter"""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        else:
+            value = (metadata or {}).get(key, _MISSING)
+            if isinstance(condition, dict):
+                if not all(_compare(op, value, operand) for op, operand in condition.items()):
+                    return False
+            elif value != condition:
+                return False
+    return True
+
+
+class NumpyCollection:
+    """
+    Exact-search collection held as one contiguous float32 matrix in memory
+
+    Persists as a base generation (vectors-<n>.npy plus a column-wise
+    table.json of ids, documents and metadata) and an append-only log.jsonl:
+    each write adds one small vectors-<n>.npy segment and one log line, and
+    deletes log the IDs removed, so a batch costs time proportional to the
+    batch, not the collection. Once the log holds as many rows as the base,
+    both are compacted into a new base generation. Files are fsynced before
+    they are referenced, and a torn last log line is ignored on load.
+    """
+
+    def __init__(self, client: "NumpyVectorClient", name: str, path: Path, metadata: Optional[Dict] = None):
+        self._client = client
+        self.name = name
+        self.path = Path(path)
+        self.metadata = metadata
+        self._lock = threading.RLock()
+        self._deleted = False
+        self._generation = 0  # Last vectors-<n>.npy number used
+        self._base = 0        # Generation of the base table.json
+        self._ids: List[str] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict]] = []
+        self._rows: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim); rows past count() are unused
+        self._sq_norms: Optional[np.ndarray] = None
+        self._base_rows = 0  # Rows written to the base generation
+        self._log_rows = 0   # Rows written to the log since
+        self._log = None
+        self._log_valid = False  # Whether log.jsonl exists and starts with this base's header
+
+    @property
+    def space(self) -> str:
+        """Distance function, taken from the collection's hnsw:space like ChromaDB (default l2)"""
+        return (self.metadata or {}).get("hnsw:space", "l2")
+
+    @property
+    def _vectors(self) -> Optional[np.ndarray]:
+        return self._matrix[:len(self._ids)] if self._matrix is not None else None
+
+    def _load(self):
+        with open(self.path / "table.json", "r", encoding="utf-8") as f:
+            table = json.load(f)
+        if table.get("format") != _TABLE_FORMAT or table.get("version", 0) > _TABLE_VERSION:
+            raise ValueError(f"{self.path} is not a NumPy vector store this version can read")
+        self.metadata = table.get("metadata")
+        self._base = table["generation"]
+        self._ids = table["ids"]
+        self._documents = table["documents"]
+        self._metadatas = table["metadatas"]
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        # Read into memory, not memory-mapped, so replaced files can be deleted on every OS
+        self._matrix = np.load(self.path / table["vectors"]) if table["vectors"] else None
+        if self._matrix is not None and len(self._matrix) != len(self._ids):
+            raise ValueError(f"{self.path}: {len(self._matrix)} vectors for {len(self._ids)} records")
+        self._base_rows, self._log_rows = len(self._ids), 0
+        self._log_valid = self._replay_log()
+        # New segments must not reuse the name of one left by a crash
+        self._generation = max(
+            [self._base] + [int(vectors.stem.split("-")[1]) for vectors in self.path.glob("vectors-*.npy")]
+        )
+        self._sq_norms = None
+
+    def _replay_log(self) -> bool:
+        """Apply the log on top of the base; returns whether it belongs to this base"""
+        log_path = self.path / "log.jsonl"
+        if not log_path.exists():
+            return False
+        valid_bytes = 0
+        with open(log_path, "rb") as f:
+            for number, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring torn log line in {log_path}")
+                    break
+                if number == 0 and record.get("base") != self._base:
+                    return False  # Left over from before the last compaction; already in the base
+                if number > 0 and record["op"] == "put":
+                    segment = np.load(self.path / record["vectors"])
+                    self._apply_put(record["ids"], segment, record["documents"], record["metadatas"])
+                elif number > 0:
+                    self._apply_delete(set(self._select(record["ids"])))
+                self._log_rows += len(record.get("ids", ()))
+                valid_bytes += len(line)
+        if valid_bytes < log_path.stat().st_size:
+            # Drop the torn line so later records aren't appended to it
+            os.truncate(log_path, valid_bytes)
+        return True
+
+    def _apply_put(self, ids: List[str], vectors: np.ndarray, documents: List, metadatas: List):
+        """Upsert rows in memory (vectors already validated)"""
+        count = len(self._ids)
+        if self._matrix is None:
+            self._matrix = np.empty((max(len(ids), 16), vectors.shape[1]), dtype=np.float32)
+        for i, chunk_id in enumerate(ids):
+            row = self._rows.get(chunk_id)
+            if row is None:
+                if count == len(self._matrix):
+                    # Grow geometrically so appends are amortized O(1) per row
+                    grown = np.empty((2 * len(self._matrix), self._matrix.shape[1]), dtype=np.float32)
+                    grown[:count] = self._matrix[:count]
+                    self._matrix = grown
+                row = count
+                count += 1
+                self._rows[chunk_id] = row
+                self._ids.append(chunk_id)
+                self._documents.append(documents[i])
+                self._metadatas.append(metadatas[i])
+            else:
+                self._documents[row] = documents[i]
+                self._metadatas[row] = metadatas[i]
+            self._matrix[row] = vectors[i]
+        self._sq_norms = None
+
+    def _apply_delete(self, doomed: set):
+        keep = [row for row in range(len(self._ids)) if row not in doomed]
+        self._matrix = np.ascontiguousarray(self._matrix[keep]) if keep else None
+        self._ids = [self._ids[row] for row in keep]
+        self._documents = [self._documents[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._sq_norms = None
+
+    def _write_vectors(self, vectors: np.ndarray) -> str:
+        self._generation += 1
+        name = f"vectors-{self._generation:06d}.npy"
+        with open(self.path / name, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+            f.flush()
+            os.fsync(f.fileno())
+        return name
+
+    def _append_log(self, record: Dict):
+        if self._deleted:
+            raise ValueError(f"Collection {self.name} has been deleted")
+        if self._log is None:
+            if self._log_valid:
+                self._log = open(self.path / "log.jsonl", "a", encoding="utf-8")
+            else:
+                self._log = open(self.path / "log.jsonl", "w", encoding="utf-8")
+                self._log.write(json.dumps({"base": self._base}) + "\n")
+                self._log_valid = True
+        self._log.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def _save(self):
+        """Write the whole collection as a new base generation and start an empty log"""
+        if self._deleted:
+            raise ValueError(f"Collection {self.name} has been deleted")
+        self.path.mkdir(parents=True, exist_ok=True)
+        vectors_name = self._write_vectors(self._vectors) if self._ids else None
+        if vectors_name is None:
+            self._generation += 1
+
+        table = {
+            "format": _TABLE_FORMAT,
+            "version": _TABLE_VERSION,
+            "name": self.name,
+            "metadata": self.metadata,
+            "generation": self._generation,
+            "vectors": vectors_name,
+            "ids": self._ids,
+            "documents": self._documents,
+            "metadatas": self._metadatas
+        }
+        tmp_path = self.path / "table.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(table, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path / "table.json")
+
+        # The old log now describes an older base (and is ignored if a crash leaves it behind)
+        self._base = self._generation
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        (self.path / "log.jsonl").unlink(missing_ok=True)
+        self._log_valid = False
+
+        for old in self.path.glob("vectors-*.npy"):
+            if old.name != vectors_name:
+                old.unlink()
+        self._base_rows, self._log_rows = len(self._ids), 0
+
+    def _logged(self, rows: int):
+        """Count rows appended to the log; compact once it outgrows the base"""
+        self._log_rows += rows
+        if self._log_rows >= max(self._base_rows, _MIN_COMPACT_ROWS):
+            self._save()
+
+    def compact(self):
+        """Fold the log into a new base generation"""
+        with self._lock:
+            if self._log_rows:
+                self._save()
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def _write(self, ids, embeddings, documents, metadatas, replace: bool):
+        if not ids:
+            return
+        new = np.asarray(embeddings, dtype=np.float32)
+        if new.ndim != 2 or len(new) != len(ids):
+            raise ValueError(f"Expected {len(ids)} embeddings, got array of shape {new.shape}")
+        with self._lock:
+            if self._matrix is not None and new.shape[1] != self._matrix.shape[1]:
+                raise ValueError(f"Embedding dimension {new.shape[1]} does not match collection dimensionality {self._matrix.shape[1]}")
+            # Resolve to the final row per ID: adds skip stored IDs, repeats keep the last one
+            chosen: Dict[str, int] = {}
+            for i, chunk_id in enumerate(ids):
+                if chunk_id in self._rows and not replace:
+                    logger.debug(f"Add of existing ID {chunk_id} ignored")
+                elif replace or chunk_id not in chosen:
+                    chosen[chunk_id] = i
+            if not chosen:
+                return
+            rows = list(chosen.values())
+            put_ids = list(chosen)
+            put_documents = [
+                documents[i] if documents is not None else self._current(chunk_id, self._documents)
+                for chunk_id, i in chosen.items()
+            ]
+            put_metadatas = [
+                metadatas[i] if metadatas is not None else self._current(chunk_id, self._metadatas)
+                for chunk_id, i in chosen.items()
+            ]
+            vectors = new[rows]
+            self._append_log({
+                "op": "put",
+                "vectors": self._write_vectors(vectors),
+                "ids": put_ids,
+                "documents": put_documents,
+                "metadatas": put_metadatas
+            })
+            self._apply_put(put_ids, vectors, put_documents, put_metadatas)
+            self._logged(len(put_ids))
+
+    def _current(self, chunk_id: str, column: List):
+        row = self._rows.get(chunk_id)
+        return column[row] if row is not None else None
+
+    def add(self, ids, embeddings, documents=None, metadatas=None, **kwargs):
+        """Store new records; IDs already present are left unchanged (as ChromaDB does)"""
+        self._write(list(ids), embeddings, documents, metadatas, replace=False)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None, **kwargs):
+        """Store records, replacing those whose IDs are present"""
+        self._write(list(ids), embeddings, documents, metadatas, replace=True)
+
+    def _select(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict] = None) -> List[int]:
+        if ids is not None:
+            rows = [self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows]
+        else:
+            rows = list(range(len(self._ids)))
+        if where:
+            rows = [row for row in rows if matches_where(self._metadatas[row], where)]
+        return rows
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict] = None, **kwargs):
+        """Delete records by ID and/or metadata filter"""
+        with self._lock:
+            if ids is None and not where:
+                raise ValueError("delete() needs ids or where")
+            doomed = set(self._select(ids, where))
+            if not doomed:
+                return
+            self._append_log({"op": "delete", "ids": [self._ids[row] for row in sorted(doomed)]})
+            self._apply_delete(doomed)
+            self._logged(len(doomed))
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("documents", "metadatas"),
+        **kwargs
+    ) -> Dict:
+        """Records by ID and/or metadata filter, paged with limit/offset"""
+        with self._lock:
+            rows = self._select(ids, where)
+            start = offset or 0
+            rows = rows[start:start + limit] if limit is not None else rows[start:]
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "embeddings": np.asarray(self._vectors)[rows].tolist() if "embeddings" in include and rows else (
+                    [] if "embeddings" in include else None
+                ),
+                "documents": [self._documents[row] for row in rows] if "documents" in include else None,
+                "metadatas": [self._metadatas[row] for row in rows] if "metadatas" in include else None,
+                "included": list(include)
+            }
+
+    def peek(self, limit: int = 10) -> Dict:
+        return self.get(limit=limit, include=["embeddings", "documents", "metadatas"])
+
+    def _distances(self, vectors: np.ndarray, sq_norms: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """(queries, records) distances in ChromaDB's conventions for the collection's space"""
+        dots = queries @ vectors.T
+        if self.space == "cosine":
+            norms = np.sqrt(sq_norms)
+            query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            return 1.0 - dots / np.maximum(query_norms * norms, 1e-12)
+        if self.space == "ip":
+            return 1.0 - dots
+        # Squared L2, like hnswlib
+        return np.maximum(sq_norms - 2.0 * dots + np.einsum("ij,ij->i", queries, queries)[:, None], 0.0)
+
+    def query(
+        self,
+        query_embeddings=None,
+        n_results: int = 10,
+        where: Optional[Dict] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances"),
+        **kwargs
+    ) -> Dict:
+        """
+        Exact nearest neighbours of each query vector
+
+        Args:
+            query_embeddings: One vector or a list of them
+            n_results: Neighbours per query
+            where: Optional metadata filter
+            include: Fields to return besides ids
+
+        Returns:
+            ChromaDB-shaped result: one list per query under each key
+        """
+        if query_embeddings is None:
+            raise ValueError("NumPy vector store needs query_embeddings (it has no embedding function)")
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+
+        with self._lock:
+            vectors, ids = self._vectors, self._ids
+            if self._sq_norms is None and vectors is not None:
+                self._sq_norms = np.einsum("ij,ij->i", vectors, vectors)
+            sq_norms = self._sq_norms
+            rows = None
+            if where:
+                rows = np.asarray(self._select(where=where), dtype=np.int64)
+                if vectors is not None:
+                    vectors, sq_norms = vectors[rows], sq_norms[rows]
+            total = 0 if vectors is None else len(vectors)
+
+            result = {key: [] for key in ("ids", "distances", "documents", "metadatas", "embeddings")}
+            k = min(n_results, total)
+            distances = self._distances(vectors, sq_norms, queries) if k > 0 else None
+            for q in range(len(queries)):
+                if k == 0:
+                    top = np.empty(0, dtype=np.int64)
+                    top_distances = np.empty(0, dtype=np.float32)
+                else:
+                    row_distances = distances[q]
+                    top = np.argpartition(row_distances, k - 1)[:k] if k < total else np.arange(total)
+                    top = top[np.argsort(row_distances[top], kind="stable")]
+                    top_distances = row_distances[top]
+                records = rows[top] if rows is not None else top
+                result["ids"].append([ids[row] for row in records])
+                result["distances"].append(top_distances.tolist())
+                result["documents"].append([self._documents[row] for row in records])
+                result["metadatas"].append([self._metadatas[row] for row in records])
+                if "embeddings" in include:
+                    result["embeddings"].append(vectors[top].tolist() if k else [])
+
+        for key in ("distances", "documents", "metadatas", "embeddings"):
+            if key not in include:
+                result[key] = None
+        result["included"] = list(include)
+        return result
+
+
+class NumpyVectorClient:
+    """ChromaDB-client-shaped factory for NumpyCollections under one directory"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._collections: Dict[str, NumpyCollection] = {}
+        self._lock = threading.Lock()
+
+    def _exists(self, name: str) -> bool:
+        return (self.path / name / "table.json").exists()
+
+    def list_collections(self) -> List[str]:
+        return sorted(entry.name for entry in self.path.iterdir() if (entry / "table.json").exists())
+
+    def get_collection(self, name: str, **kwargs) -> NumpyCollection:
+        with self._lock:
+            if name not in self._collections:
+                if not self._exists(name):
+                    raise ValueError(f"Collection {name} does not exist.")
+                collection = NumpyCollection(self, name, self.path / name)
+                collection._load()
+                self._collections[name] = collection
+            return self._collections[name]
+
+    def create_collection(self, name: str, metadata: Optional[Dict] = None, get_or_create: bool = False, **kwargs) -> NumpyCollection:
+        with self._lock:
+            if self._exists(name):
+                if not get_or_create:
+                    raise ValueError(f"Collection {name} already exists.")
+            else:
+                collection = NumpyCollection(self, name, self.path / name, metadata)
+                collection._save()
+                self._collections[name] = collection
+        return self.get_collection(name)
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict] = None, **kwargs) -> NumpyCollection:
+        return self.create_collection(name, metadata=metadata, get_or_create=True)
+
+    def delete_collection(self, name: str):
+        with self._lock:
+            if not self._exists(name):
+                raise ValueError(f"Collection {name} does not exist.")
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                with collection._lock:
+                    collection._deleted = True
+                    if collection._log is not None:
+                        collection._log.close()
+                        collection._log = None
+            shutil.rmtree(self.path / name)
+
+
+def copy_collection(source, target_client, name: str):
+    """Copy a collection (vectors, documents, metadata) into another backend's client"""
+    if name in {getattr(entry, "name", entry) for entry in target_client.list_collections()}:
+        target_client.delete_collection(name)
+    target = target_client.create_collection(name=name, metadata=source.metadata or None)
+    loader = ChromaBulkLoader(target, upsert=False)
+    total = source.count()
+    for offset in range(0, total, _COPY_PAGE_SIZE):
+        page = source.get(limit=_COPY_PAGE_SIZE, offset=offset, include=["embeddings", "documents", "metadatas"])
+        loader.write(page["ids"], np.asarray(page["embeddings"], dtype=np.float32).tolist(), page["documents"], page["metadatas"])
+    loader.close()
+    if hasattr(target, "compact"):
+        target.compact()
+    return target
+
+
+def _collection_count(client, name: str) -> Optional[int]:
+    try:
+        return client.get_collection(name=name).count()
+    except Exception:
+        return None
+
+
+def _clients(db_dir: Path, chroma: bool = False):
+    """(NumPy client, ChromaDB client or None); ChromaDB is only opened if asked for or already on disk"""
+    numpy_client = NumpyVectorClient(db_dir / NUMPY_STORE_DIR)
+    chroma_client = None
+    if chroma or (db_dir / "chroma.sqlite3").exists():
+        import chromadb
+        chroma_client = chromadb.PersistentClient(path=str(db_dir))
+    return numpy_client, chroma_client
+
+
+def open_vector_client(db_dir: Path, collection_name: str, backend: str = config.VECTOR_STORE):
+    """
+    Client for a pipeline's vector store
+
+    In "auto" mode the backend is wherever the collection already is; a new
+    collection starts in the NumPy store. If both backends hold it (after
+    `python vector_store.py migrate`), the one suiting its size is used: up
+    to config.VECTOR_STORE_AUTO_MAX_CHUNKS chunks NumPy, beyond that
+    ChromaDB. Data is never moved here; an index that has outgrown its
+    backend, or that sits in the other one, is only reported.
+
+    Args:
+        db_dir: Pipeline's DB directory (ChromaDB's path)
+        collection_name: Collection the pipeline uses
+        backend: "auto", "chroma" or "numpy"
+
+    Returns:
+        chromadb.PersistentClient or NumpyVectorClient
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown vector store {backend!r} (expected one of {', '.join(BACKENDS)})")
+    db_dir = Path(db_dir)
+    db_dir.mkdir(parents=True, exist_ok=True)
+
+    numpy_client, chroma_client = _clients(db_dir, chroma=backend == "chroma")
+    counts = {
+        "numpy": _collection_count(numpy_client, collection_name),
+        "chroma": _collection_count(chroma_client, collection_name) if chroma_client is not None else None
+    }
+
+    if backend == "auto":
+        held = [name for name, count in counts.items() if count]
+        if len(held) == 1:
+            backend = held[0]
+        else:
+            size = max(count or 0 for count in counts.values())
+            backend = "numpy" if size <= config.VECTOR_STORE_AUTO_MAX_CHUNKS else "chroma"
+        suited = "numpy" if (counts[backend] or 0) <= config.VECTOR_STORE_AUTO_MAX_CHUNKS else "chroma"
+        if suited != backend:
+            logger.warning(
+                f"{collection_name} has {counts[backend]} chunks (auto threshold "
+                f"{config.VECTOR_STORE_AUTO_MAX_CHUNKS}); run `python vector_store.py migrate --to {suited}` to switch"
+            )
+        logger.info(f"Vector store: {backend} ({counts[backend] or 0} chunks)")
+    else:
+        other = "chroma" if backend == "numpy" else "numpy"
+        if counts[other] and not counts[backend]:
+            logger.warning(
+                f"{collection_name} is empty in the {backend} vector store but has {counts[other]} chunks in "
+                f"{other}; run `python vector_store.py migrate --to {backend}` to copy them"
+            )
+
+    if backend == "chroma" and chroma_client is None:
+        _, chroma_client = _clients(db_dir, chroma=True)
+    return numpy_client if backend == "numpy" else chroma_client
+
+
+def migrate(db_dir: Path, collection_name: str, to: str, replace: bool = False) -> int:
+    """
+    Copy a collection into the other backend, keeping the source
+
+    The source is left as it is (a fallback until the copy has been
+    checked); delete it with the backend's own tools once it is no longer
+    wanted. It goes stale as soon as the pipeline writes to the copy.
+
+    Args:
+        db_dir: Pipeline's DB directory (ChromaDB's path)
+        collection_name: Collection to copy
+        to: Target backend, "numpy" or "chroma"
+        replace: Overwrite a non-empty collection in the target
+
+    Returns:
+        Number of chunks copied
+    """
+    numpy_client, chroma_client = _clients(Path(db_dir), chroma=True)
+    source, target = (chroma_client, numpy_client) if to == "numpy" else (numpy_client, chroma_client)
+    collection = source.get_collection(name=collection_name)
+    existing = _collection_count(target, collection_name)
+    if existing and not replace:
+        raise ValueError(f"{collection_name} already has {existing} chunks in the {to} vector store (use --replace)")
+    logger.info(f"Copying {collection.count()} chunks of {collection_name} into the {to} vector store")
+    return copy_collection(collection, target, collection_name).count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Copy a collection into the other backend (the source is kept)")
+    migrate_parser.add_argument("--to", required=True, choices=["numpy", "chroma"])
+    migrate_parser.add_argument("--replace", action="store_true", help="Overwrite a non-empty target collection")
+    migrate_parser.add_argument("--db-dir", default=config.DB_DIR)
+    migrate_parser.add_argument("--collection", default="legal_docs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        copied = migrate(Path(args.db_dir), args.collection, args.to, replace=args.replace)
+    except ValueError as e:
+        parser.exit(1, f"Migration failed: {e}\n")
+    print(f"Copied {copied} chunks of {args.collection} into the {args.to} vector store; the source was kept")
+
+
+if __name__ == "__main__":
+    main()